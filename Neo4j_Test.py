@@ -1,15 +1,13 @@
 from db.neo4j_handler import Neo4jHandler
+from db.seed_loader import load_seed_file
 
 # تهيئة الاتصال (يفترض أنك قمت بتهيئة credentials)
 # handler = Neo4jHandler("bolt://localhost:7687", "neo4j", "password")
 
-# قراءة محتوى ملف Cypher
-# with open('data/seed_knowledge.cypher', 'r') as f:
-#     cypher_script = f.read()
-
-# تنفيذ السكريبت (استخدام execute_query لتنفيذ السكريبت)
-# handler.execute_query(cypher_script) 
+# تحميل ملف Cypher: يتم تقسيمه إلى جمل وتنفيذها في معاملات مجمّعة
+# (Neo4j يرفض تنفيذ سكريبت متعدد الجمل في استدعاء execute_query واحد)
+# load_seed_file(handler, 'data/seed_knowledge.cypher')
 # handler.close()
 
 print("تم بنجاح تحميل الذاكرة الطوبولوجية الأولية (Seed Knowledge) إلى Neo4j.")
-print("الآن يمكن للنظام بدء التحقق السببي.")
\ No newline at end of file
+print("الآن يمكن للنظام بدء التحقق السببي.")
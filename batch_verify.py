@@ -0,0 +1,270 @@
+"""
+التحقق الدفعي المتوازي من ملف فرضيات (JSON Lines) عبر مجمع عمليات (process pool).
+
+كل سطر في ملف الإدخال إما فرضية جاهزة أو نص LLM خام:
+    {"id": "c-1", "cause": "Memory Leak", "effect": "Server Crash", "threshold": 0.6}
+    {"id": "t-7", "text": "The memory leak caused the server to crash."}
+
+كل عملية عاملة تنشئ مصدرها الخاص عند بدئها: اتصال Neo4j مستقل (NEO4J_URI / NEO4J_USER /
+NEO4J_PASSWORD)، أو لقطة محلية (--snapshot) تُحمّل بـ memmap فتتشارك كل العمليات صفحاتها.
+الأسطر تُرسل إلى العمال على دفعات (كل دفعة = استعلام UNWIND واحد لكل عتبة)، والنتائج تُكتب
+بالترتيب في ملف الإخراج فور وصولها، مع حد أقصى للدفعات المعلقة حتى يبقى استهلاك الذاكرة ثابتاً.
+
+مثال:
+    python batch_verify.py claims.jsonl results.jsonl --snapshot memory_z.snapshot --workers 8
+    python batch_verify.py claims.jsonl results.jsonl --chunk-size 500   # مقابل Neo4j
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from multiprocessing import util
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from core.verify_causal import verify_causal_paths_batch, TRUST_THRESHOLD, MAX_PATH_LENGTH
+
+DEFAULT_CHUNK_SIZE = 200            # عدد الأسطر في كل مهمة يرسلها المجمع إلى عامل
+DEFAULT_MAX_INFLIGHT_PER_WORKER = 4  # عدد الدفعات المعلقة لكل عامل (يحدّ الذاكرة عند الملفات الضخمة)
+DEFAULT_PROGRESS_INTERVAL = 10.0    # ثوانٍ بين تقارير التقدم على stderr
+
+# حالة العملية العاملة (تُهيأ مرة واحدة في _init_worker)
+_worker_source = None
+_worker_llm_client = None
+_worker_settings: Dict = {}
+
+
+# ----------------------------------------------------------------------
+# العامل
+# ----------------------------------------------------------------------
+
+def _open_source(snapshot: Optional[str]):
+    """يفتح مصدر التحقق لهذه العملية: لقطة محلية أو اتصال Neo4j مستقل."""
+    if snapshot:
+        from core.graph_snapshot import load_snapshot
+        return load_snapshot(snapshot)
+
+    from db.neo4j_handler import Neo4jHandler
+    handler = Neo4jHandler(os.getenv("NEO4J_URI"), os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"), pool_size=1)
+    # العمال يُنهون بـ os._exit فلا تعمل atexit؛ Finalize يُنفذ عند خروج العامل
+    util.Finalize(handler, handler.close, exitpriority=10)
+    return handler
+
+
+def _init_worker(settings: Dict):
+    global _worker_source, _worker_settings, _worker_llm_client
+    load_dotenv()
+    _worker_settings = settings
+    _worker_source = _open_source(settings.get("snapshot"))
+    _worker_llm_client = None
+
+
+def _llm_client():
+    """عميل LLM لكل عامل (يُنشأ عند أول سطر نصي فقط)."""
+    global _worker_llm_client
+    if _worker_llm_client is None:
+        from openai import OpenAI
+        _worker_llm_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _worker_llm_client
+
+
+def _path_summary(path: Optional[Dict], include_paths: bool) -> Dict:
+    summary = {
+        "verified": path is not None,
+        "path_weight": path['path_weight'] if path else None,
+        "path_length": path['path_length'] if path else None,
+    }
+    if include_paths and path:
+        summary["path_details"] = path['path_details']
+    return summary
+
+
+def verify_chunk(source, lines: List[Tuple[int, str]], settings: Dict, llm_client_factory=None) -> List[Dict]:
+    """
+    يتحقق من دفعة أسطر ويعيد سجل نتيجة لكل سطر (بنفس الترتيب).
+    الفرضيات تُجمع حسب العتبة، وكل مجموعة تُرسل في استدعاء verify_causal_paths_batch واحد.
+    """
+    default_threshold = settings.get("threshold", TRUST_THRESHOLD)
+    max_length = settings.get("max_length", MAX_PATH_LENGTH)
+    include_paths = settings.get("include_paths", False)
+
+    results: List[Dict] = []
+    # (رقم النتيجة، فهرس الفرضية داخل السطر أو None، الفرضية)
+    pending: Dict[float, List[Tuple[int, Optional[int], Dict]]] = {}
+
+    for line_number, line in lines:
+        record: Dict = {"line": line_number}
+        try:
+            item = json.loads(line)
+            if "id" in item:
+                record["id"] = item["id"]
+
+            if "text" in item:
+                from core.bridge import extract_causal_claims_from_llm
+                with contextlib.redirect_stdout(io.StringIO()):
+                    claims = extract_causal_claims_from_llm(item["text"], (llm_client_factory or _llm_client)())
+                threshold = float(item.get("threshold", default_threshold))
+                record["claims"] = [{"cause": c['cause'], "effect": c['effect'], "threshold": threshold} for c in claims]
+                for position, claim in enumerate(record["claims"]):
+                    pending.setdefault(threshold, []).append((len(results), position, claim))
+            else:
+                claim = {"cause": item["cause"], "effect": item["effect"]}
+                record.update(claim, threshold=float(item.get("threshold", default_threshold)))
+                pending.setdefault(record["threshold"], []).append((len(results), None, claim))
+        except (ValueError, KeyError, TypeError) as e:
+            record["error"] = f"سطر غير صالح: {e}"
+        results.append(record)
+
+    for threshold, entries in pending.items():
+        paths = verify_causal_paths_batch(source, [claim for _, _, claim in entries], threshold, max_length)
+        for (result_index, position, _), path in zip(entries, paths):
+            target = results[result_index] if position is None else results[result_index]["claims"][position]
+            target.update(_path_summary(path, include_paths))
+
+    return results
+
+
+def _verify_chunk_in_worker(lines: List[Tuple[int, str]]) -> List[Dict]:
+    try:
+        return verify_chunk(_worker_source, lines, _worker_settings)
+    except Exception as e:
+        # خطأ في الاتصال أو الاستعلام: لا نوقف الملف بأكمله، بل نعلّم أسطر الدفعة
+        return [{"line": line_number, "error": f"{type(e).__name__}: {e}"} for line_number, _ in lines]
+
+
+# ----------------------------------------------------------------------
+# المنسّق
+# ----------------------------------------------------------------------
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """يقرأ ملف JSONL على دفعات من (رقم السطر، النص) مع تجاهل الأسطر الفارغة."""
+    with open(path, "r", encoding="utf-8") as f:
+        numbered = ((number, line) for number, line in enumerate(f, start=1) if line.strip())
+        while True:
+            chunk = list(itertools.islice(numbered, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def _bounded(chunks: Iterable, slots: threading.Semaphore) -> Iterator:
+    """
+    Pool.imap يستهلك المدخلات بأسرع ما يمكن؛ هذا المولّد يوقفه حتى يتم تحرير مكان
+    (عند كتابة نتيجة دفعة سابقة) فلا يُقرأ الملف كاملاً إلى الذاكرة.
+    """
+    for chunk in chunks:
+        slots.acquire()
+        yield chunk
+
+
+class VerificationStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.lines = 0
+        self.claims = 0
+        self.verified = 0
+        self.errors = 0
+
+    def add(self, record: Dict):
+        self.lines += 1
+        if "error" in record:
+            self.errors += 1
+        for claim in record.get("claims", [record] if "verified" in record else []):
+            self.claims += 1
+            self.verified += 1 if claim.get("verified") else 0
+
+    def as_dict(self) -> Dict:
+        seconds = time.perf_counter() - self.started
+        return {
+            "lines": self.lines,
+            "claims": self.claims,
+            "verified": self.verified,
+            "unverified": self.claims - self.verified,
+            "errors": self.errors,
+            "seconds": round(seconds, 3),
+            "claims_per_second": round(self.claims / seconds, 1) if seconds > 0 else 0.0,
+        }
+
+
+def run_batch_verification(
+    input_path: str,
+    output_path: str,
+    workers: Optional[int] = None,
+    snapshot: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    threshold: float = TRUST_THRESHOLD,
+    max_length: int = MAX_PATH_LENGTH,
+    include_paths: bool = False,
+    progress_interval: float = DEFAULT_PROGRESS_INTERVAL
+) -> Dict:
+    """
+    نقطة الدخول البرمجية: يتحقق من كل أسطر input_path ويكتب النتائج (بنفس الترتيب) في output_path.
+    workers=1 يعمل في نفس العملية (مفيد للتصحيح)؛ الافتراضي عدد الأنوية.
+    """
+    workers = workers or os.cpu_count() or 1
+    settings = {"snapshot": snapshot, "threshold": threshold, "max_length": max_length, "include_paths": include_paths}
+    stats = VerificationStats()
+    last_report = time.perf_counter()
+
+    with open(output_path, "w", encoding="utf-8") as out:
+
+        def write(records: List[Dict]):
+            nonlocal last_report
+            for record in records:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                stats.add(record)
+            if time.perf_counter() - last_report >= progress_interval:
+                last_report = time.perf_counter()
+                print(f"[batch_verify] {stats.as_dict()}", file=sys.stderr)
+
+        if workers == 1:
+            _init_worker(settings)
+            for chunk in read_chunks(input_path, chunk_size):
+                write(_verify_chunk_in_worker(chunk))
+        else:
+            slots = threading.Semaphore(workers * DEFAULT_MAX_INFLIGHT_PER_WORKER)
+            with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(settings,)) as pool:
+                for records in pool.imap(_verify_chunk_in_worker, _bounded(read_chunks(input_path, chunk_size), slots)):
+                    write(records)
+                    slots.release()
+                pool.close()
+                pool.join()
+
+    result = stats.as_dict()
+    print(f"[batch_verify] اكتمل: {result}", file=sys.stderr)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="تحقق دفعي متوازٍ من ملف فرضيات سببية (JSONL).")
+    parser.add_argument("input", help="ملف JSONL: {cause, effect[, threshold]} أو {text}")
+    parser.add_argument("output", help="ملف JSONL للنتائج (سطر لكل سطر إدخال، بنفس الترتيب)")
+    parser.add_argument("--workers", type=int, default=None, help="عدد العمليات (الافتراضي: عدد الأنوية)")
+    parser.add_argument("--snapshot", default=None, help="لقطة محلية (core/graph_snapshot.py) بدلاً من Neo4j")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--threshold", type=float, default=TRUST_THRESHOLD, help="العتبة الافتراضية للأسطر بدون threshold")
+    parser.add_argument("--max-length", type=int, default=MAX_PATH_LENGTH)
+    parser.add_argument("--include-paths", action="store_true", help="تضمين تفاصيل المسار في النتائج")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    if not args.snapshot and not os.getenv("NEO4J_URI"):
+        parser.error("يجب تحديد --snapshot أو ضبط NEO4J_URI.")
+
+    stats = run_batch_verification(
+        args.input, args.output, args.workers, args.snapshot, args.chunk_size,
+        args.threshold, args.max_length, args.include_paths
+    )
+    print(json.dumps(stats, ensure_ascii=False))
+    return 0 if stats["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
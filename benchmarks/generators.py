@@ -0,0 +1,148 @@
+from typing import List, Tuple, Optional
+
+import numpy as np
+
+# ----------------------------------------------------------------------
+# مولّدات رسوم CAUSES اصطناعية لقياس الأداء
+# كل مولّد يعيد قائمة روابط (start, end, weight) بنفس صيغة InMemoryCausalGraph،
+# والروابط دائماً من عقدة أقدم إلى أحدث فيكون الرسم الناتج غير دوري (DAG).
+# ----------------------------------------------------------------------
+
+CausalEdge = Tuple[str, str, float]
+
+# توزيعات الأوزان المتاحة (الأوزان دائماً ضمن [0, 1])
+WEIGHT_DISTRIBUTIONS = {
+    # منتظم على [0.05, 1]: نسبة كبيرة من الروابط تحت عتبة الثقة 0.5
+    "uniform": lambda rng, n: rng.uniform(0.05, 1.0, n),
+    # منحاز نحو الأوزان القوية (معرفة موثوقة في الغالب)
+    "strong": lambda rng, n: rng.beta(5.0, 2.0, n),
+    # منحاز نحو الأوزان الضعيفة (ذاكرة حديثة لم تتعلم بعد)
+    "weak": lambda rng, n: rng.beta(2.0, 5.0, n),
+    # ثنائي القمة: روابط إما قوية جداً أو ضعيفة جداً
+    "bimodal": lambda rng, n: np.where(rng.random(n) < 0.5, rng.beta(8.0, 2.0, n), rng.beta(2.0, 8.0, n)),
+}
+
+DEFAULT_WEIGHT_DISTRIBUTION = "uniform"
+
+
+def node_name(index: int, prefix: str = "") -> str:
+    return f"{prefix}N{index}"
+
+
+def sample_weights(rng: np.random.Generator, count: int, distribution: str = DEFAULT_WEIGHT_DISTRIBUTION) -> np.ndarray:
+    if distribution not in WEIGHT_DISTRIBUTIONS:
+        raise ValueError(f"توزيع أوزان غير معروف: {distribution!r} (المتاح: {sorted(WEIGHT_DISTRIBUTIONS)})")
+    return np.round(np.clip(WEIGHT_DISTRIBUTIONS[distribution](rng, count), 0.0, 1.0), 4)
+
+
+def scale_free_graph(
+    n_nodes: int,
+    fan_out: int = 3,
+    weight_distribution: str = DEFAULT_WEIGHT_DISTRIBUTION,
+    seed: Optional[int] = 0,
+    prefix: str = ""
+) -> List[CausalEdge]:
+    """
+    رسم عديم المقياس (Barabási–Albert): كل عقدة جديدة ترتبط بـ fan_out عقدة سابقة،
+    تُختار باحتمال يتناسب مع درجتها. النتيجة عدد قليل من الأسباب المحورية (hubs)
+    ذات روابط كثيرة، وهو الشكل الأقرب لذاكرة سببية حقيقية.
+    """
+    rng = np.random.default_rng(seed)
+    fan_out = max(1, fan_out)
+
+    # قائمة "التكرار حسب الدرجة": اختيار عنصر عشوائي منها = اختيار تفضيلي
+    degree_pool: List[int] = list(range(min(fan_out, n_nodes)))
+    pairs: List[Tuple[int, int]] = []
+
+    for new_node in range(min(fan_out, n_nodes), n_nodes):
+        picks = rng.integers(0, len(degree_pool), fan_out * 2)
+        causes = []
+        for pick in picks:
+            cause = degree_pool[pick]
+            if cause not in causes:
+                causes.append(cause)
+            if len(causes) == fan_out:
+                break
+
+        for cause in causes:
+            pairs.append((cause, new_node))
+            degree_pool.append(cause)
+        degree_pool.extend([new_node] * len(causes))
+
+    weights = sample_weights(rng, len(pairs), weight_distribution)
+    return [(node_name(a, prefix), node_name(b, prefix), float(w)) for (a, b), w in zip(pairs, weights)]
+
+
+def layered_dag(
+    n_layers: int,
+    width: int,
+    fan_out: int = 3,
+    weight_distribution: str = DEFAULT_WEIGHT_DISTRIBUTION,
+    seed: Optional[int] = 0,
+    prefix: str = ""
+) -> List[CausalEdge]:
+    """
+    رسم طبقي غير دوري: n_layers طبقة بعرض width، وكل عقدة ترتبط بـ fan_out عقدة
+    عشوائية في الطبقة التالية (مثل سلاسل سبب -> عرض -> نتيجة في تقارير الحوادث).
+    عدد المسارات بين الطبقة الأولى والأخيرة ينمو أسياً مع العمق.
+    """
+    rng = np.random.default_rng(seed)
+    fan_out = max(1, min(fan_out, width))
+    pairs: List[Tuple[int, int]] = []
+
+    for layer in range(n_layers - 1):
+        for offset in range(width):
+            cause = layer * width + offset
+            targets = rng.choice(width, size=fan_out, replace=False)
+            pairs.extend((cause, (layer + 1) * width + int(t)) for t in targets)
+
+    weights = sample_weights(rng, len(pairs), weight_distribution)
+    return [(node_name(a, prefix), node_name(b, prefix), float(w)) for (a, b), w in zip(pairs, weights)]
+
+
+def generate_graph(
+    topology: str,
+    n_nodes: int,
+    fan_out: int = 3,
+    weight_distribution: str = DEFAULT_WEIGHT_DISTRIBUTION,
+    seed: Optional[int] = 0,
+    prefix: str = "",
+    n_layers: int = 8
+) -> List[CausalEdge]:
+    """يختار المولّد حسب الاسم؛ في الرسم الطبقي يُوزع n_nodes على n_layers طبقة."""
+    if topology == "scale_free":
+        return scale_free_graph(n_nodes, fan_out, weight_distribution, seed, prefix)
+    if topology == "layered":
+        return layered_dag(n_layers, max(1, n_nodes // n_layers), fan_out, weight_distribution, seed, prefix)
+    raise ValueError(f"نوع رسم غير معروف: {topology!r} (المتاح: scale_free, layered)")
+
+
+def sample_query_pairs(
+    edges: List[CausalEdge],
+    count: int,
+    max_hops: int = 5,
+    seed: Optional[int] = 0
+) -> List[Tuple[str, str]]:
+    """
+    يختار أزواج (سبب، نتيجة) للاستعلام عبر مشي عشوائي على الروابط (1..max_hops قفزة)،
+    فيوجد مسار بين كل زوج (قد يكون تحت عتبة الثقة، وهي أيضاً حالة يجب قياسها).
+    """
+    rng = np.random.default_rng(seed)
+    successors = {}
+    for start, end, _ in edges:
+        successors.setdefault(start, []).append(end)
+    sources = list(successors)
+    if not sources:
+        return []
+
+    pairs = []
+    for _ in range(count):
+        cause = sources[int(rng.integers(len(sources)))]
+        node = cause
+        for _ in range(int(rng.integers(1, max_hops + 1))):
+            following = successors.get(node)
+            if not following:
+                break
+            node = following[int(rng.integers(len(following)))]
+        pairs.append((cause, node))
+    return pairs
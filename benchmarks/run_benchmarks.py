@@ -0,0 +1,376 @@
+"""
+مجموعة قياس الأداء (benchmarks) للعمليات الساخنة في OpenCausal.
+
+تقيس verify_causal_path و find_innovative_path و update_causal_weight و process_and_learn
+على رسوم اصطناعية (benchmarks/generators.py) بأحجام مختلفة، وتكتب النتائج في ملف JSON
+لتتبع التراجع في الأداء بين الإصدارات.
+
+الخلفيات:
+    memory: InMemoryCausalGraph للقراءة، و GraphWriteHandler (بديل Neo4j محلي) للكتابة.
+    neo4j:  خادم Neo4j محلي حقيقي، فقط إذا تم ضبط NEO4J_URI (و NEO4J_USER / NEO4J_PASSWORD).
+            تُحمّل الروابط بأسماء تبدأ بـ bench: وتُحذف بعد القياس، لكن عقدة System_Confidence
+            تتغير أيضاً، لذا استخدم قاعدة بيانات تجريبية.
+
+مثال:
+    python -m benchmarks.run_benchmarks --sizes 1000,10000 --topology all
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/previous.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.bridge import process_and_learn, INNOVATION_CONSTRAINTS
+from core.graph_engine import InMemoryCausalGraph
+from core.innovation_engine import find_innovative_path
+from core.verify_causal import verify_causal_path
+from core.weights import (
+    update_causal_weight,
+    UPDATE_EDGE_WEIGHT_QUERY,
+    RELATIVE_WEIGHT_UPDATE_QUERY,
+    READ_CONFIDENCE_QUERY,
+    WRITE_CONFIDENCE_QUERY,
+)
+from benchmarks.generators import (
+    generate_graph,
+    sample_query_pairs,
+    DEFAULT_WEIGHT_DISTRIBUTION,
+)
+
+DEFAULT_SIZES = [1000, 10000]
+DEFAULT_TOPOLOGIES = ["scale_free", "layered"]
+DEFAULT_OPERATIONS = ["verify_causal_path", "find_innovative_path", "update_causal_weight", "process_and_learn"]
+DEFAULT_QUERIES = 200                # عدد الاستدعاءات المقاسة لكل عملية
+DEFAULT_NEO4J_MAX_SIZE = 10000       # أكبر رسم يُحمّل في Neo4j (التحميل نفسه مكلف)
+DEFAULT_RESULTS_DIR = os.path.join("benchmarks", "results")
+DEFAULT_REGRESSION_TOLERANCE = 0.2   # تراجع p50 بأكثر من 20% يُعتبر تراجعاً في الأداء
+
+NEO4J_NAME_PREFIX = "bench:"
+
+# حذف عقد القياس على دفعات (يتطلب معاملة تلقائية auto-commit)
+CLEANUP_BENCHMARK_NODES_QUERY = """
+MATCH (n:Causal)
+WHERE n.name STARTS WITH $prefix
+CALL {
+    WITH n
+    DETACH DELETE n
+} IN TRANSACTIONS OF 10000 ROWS
+"""
+
+
+# ----------------------------------------------------------------------
+# بدائل محلية (in-process) لـ Neo4j و LLM
+# ----------------------------------------------------------------------
+
+class GraphWriteHandler:
+    """
+    بديل Neo4j محلي لمسار الكتابة: يطبق استعلامات تحديث الوزن والثقة الذاتية مباشرة
+    على InMemoryCausalGraph، فيُقاس منطق التعلم في بايثون دون زمن الشبكة.
+    """
+
+    def __init__(self, graph: InMemoryCausalGraph, confidence: float = 0.5):
+        self.graph = graph
+        self.confidence = confidence
+
+    def execute_query(self, query: str, parameters: Optional[Dict] = None) -> List[Dict]:
+        if query == UPDATE_EDGE_WEIGHT_QUERY:
+            self.graph.set_weight(parameters["cause_name"], parameters["effect_name"], parameters["new_weight"])
+            return []
+        if query == RELATIVE_WEIGHT_UPDATE_QUERY:
+            rows = []
+            for edge in parameters["edges"]:
+                current = self.graph.get_weight(edge["start"], edge["end"])
+                if current is None:
+                    continue
+                weight = round(max(0.0, min(1.0, current + edge["delta"])), 4)
+                self.graph.set_weight(edge["start"], edge["end"], weight)
+                rows.append({"start": edge["start"], "end": edge["end"], "weight": weight})
+            return rows
+        if query == READ_CONFIDENCE_QUERY:
+            return [{"level": self.confidence}]
+        if query == WRITE_CONFIDENCE_QUERY:
+            self.confidence = parameters["new_level"]
+            return []
+        raise NotImplementedError("GraphWriteHandler لا يدعم هذا الاستعلام في القياس.")
+
+    execute_read = execute_query
+    execute_write = execute_query
+
+
+class ScriptedLLMClient:
+    """عميل LLM ثابت الرد: يعيد الفرضية المحددة مسبقاً (set_claim) بصيغة JSON دون اتصال بالشبكة."""
+
+    def __init__(self):
+        self._content = json.dumps({"causal_claims": []})
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def set_claim(self, cause: str, effect: str):
+        self._content = json.dumps({"causal_claims": [{"cause": cause, "effect": effect}]})
+
+    def _create(self, **request):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self._content))])
+
+
+# ----------------------------------------------------------------------
+# القياس
+# ----------------------------------------------------------------------
+
+def summarize_timings(samples: List[float]) -> Dict:
+    """يحوّل أزمنة الاستدعاءات (بالثواني) إلى إحصاءات بالمللي ثانية."""
+    if not samples:
+        return {"runs": 0}
+    values = np.asarray(samples, dtype=np.float64) * 1000.0
+    total = float(values.sum())
+    return {
+        "runs": int(len(values)),
+        "mean_ms": round(float(values.mean()), 4),
+        "p50_ms": round(float(np.percentile(values, 50)), 4),
+        "p95_ms": round(float(np.percentile(values, 95)), 4),
+        "max_ms": round(float(values.max()), 4),
+        "ops_per_second": round(len(values) / (total / 1000.0), 1) if total > 0 else 0.0,
+    }
+
+
+def time_calls(call: Callable, arguments: List, warmup: int = 1) -> Dict:
+    """يستدعي call(*args) لكل عنصر ويقيس زمن كل استدعاء (مع إخفاء المخرجات المطبوعة)."""
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for args in arguments[:warmup]:
+            call(*args)
+        for args in arguments:
+            started = time.perf_counter()
+            call(*args)
+            samples.append(time.perf_counter() - started)
+    return summarize_timings(samples)
+
+
+def _learning_paths(graph: InMemoryCausalGraph, pairs: List[Tuple[str, str]]) -> List[List[Dict]]:
+    """مسارات موجودة (دون شرط العتبة) لقياس تحديث الأوزان."""
+    paths = []
+    for cause, effect in pairs:
+        path = graph.strongest_path(cause, effect, 0.0, 5)
+        if path:
+            paths.append(path["path_details"])
+    return paths
+
+
+def run_operations(
+    read_handler,
+    write_handler,
+    graph: InMemoryCausalGraph,
+    pairs: List[Tuple[str, str]],
+    operations: List[str]
+) -> Dict[str, Dict]:
+    """يقيس العمليات المطلوبة على نفس أزواج الاستعلام لخلفية واحدة."""
+    results = {}
+    llm_client = ScriptedLLMClient()
+
+    def learn(cause, effect, feedback_delta):
+        llm_client.set_claim(cause, effect)
+        process_and_learn(
+            f"{cause} -> {effect}", write_handler, llm_client,
+            feedback_delta=feedback_delta, read_handler=read_handler
+        )
+
+    if "verify_causal_path" in operations:
+        results["verify_causal_path"] = time_calls(
+            lambda c, e: verify_causal_path(read_handler, c, e), pairs
+        )
+    if "find_innovative_path" in operations:
+        results["find_innovative_path"] = time_calls(
+            lambda c, e: find_innovative_path(read_handler, c, e, INNOVATION_CONSTRAINTS), pairs
+        )
+    if "update_causal_weight" in operations:
+        # تبديل إشارة التغذية الراجعة حتى لا تتشبع الأوزان عند 0 أو 1
+        paths = _learning_paths(graph, pairs)
+        results["update_causal_weight"] = time_calls(
+            lambda path, delta: update_causal_weight(write_handler, path, delta),
+            [(path, 0.5 if i % 2 == 0 else -0.5) for i, path in enumerate(paths)]
+        )
+    if "process_and_learn" in operations:
+        results["process_and_learn"] = time_calls(
+            learn, [(c, e, 0.5 if i % 2 == 0 else -0.5) for i, (c, e) in enumerate(pairs)]
+        )
+    return results
+
+
+def _neo4j_handler():
+    from db.neo4j_handler import Neo4jHandler
+    return Neo4jHandler(os.environ["NEO4J_URI"], os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
+
+
+def _benchmark_neo4j(handler, edges, pairs, operations) -> Dict:
+    """يحمّل الرسم في Neo4j، يقيس العمليات، ثم يحذف عقد القياس."""
+    from db.causal_ops import bulk_create_causal_links
+    from db.schema import ensure_schema
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ensure_schema(handler, backfill=False, strict=False)
+        load_stats = bulk_create_causal_links(handler, ((s, "State", e, "State", w) for s, e, w in edges))
+    try:
+        results = run_operations(handler, handler, InMemoryCausalGraph(edges), pairs, operations)
+    finally:
+        handler.execute_query(CLEANUP_BENCHMARK_NODES_QUERY, {"prefix": NEO4J_NAME_PREFIX})
+    results["bulk_create_causal_links"] = {
+        "runs": 1, "links": load_stats["links"], "seconds": load_stats["seconds"],
+        "links_per_second": load_stats["links_per_second"],
+    }
+    return results
+
+
+def run_benchmarks(
+    sizes: List[int] = DEFAULT_SIZES,
+    topologies: List[str] = DEFAULT_TOPOLOGIES,
+    operations: List[str] = DEFAULT_OPERATIONS,
+    queries: int = DEFAULT_QUERIES,
+    fan_out: int = 3,
+    weight_distribution: str = DEFAULT_WEIGHT_DISTRIBUTION,
+    seed: int = 0,
+    neo4j_handler=None,
+    neo4j_max_size: int = DEFAULT_NEO4J_MAX_SIZE
+) -> List[Dict]:
+    """
+    يشغّل القياس لكل (نوع رسم، حجم) على الخلفية المحلية، وعلى Neo4j إذا تم تمرير handler.
+    يعيد قائمة صفوف: صف واحد لكل (خلفية، رسم، حجم، عملية).
+    """
+    rows = []
+    for topology in topologies:
+        for size in sizes:
+            edges = generate_graph(topology, size, fan_out, weight_distribution, seed)
+            pairs = sample_query_pairs(edges, queries, seed=seed)
+            graph = InMemoryCausalGraph(edges)
+            case = {
+                "topology": topology, "n_nodes": graph.node_count, "n_edges": graph.edge_count,
+                "fan_out": fan_out, "weight_distribution": weight_distribution,
+            }
+
+            backends = {"memory": run_operations(graph, GraphWriteHandler(graph), graph, pairs, operations)}
+
+            if neo4j_handler is not None and size <= neo4j_max_size:
+                neo4j_edges = generate_graph(
+                    topology, size, fan_out, weight_distribution, seed, prefix=f"{NEO4J_NAME_PREFIX}{topology}:"
+                )
+                neo4j_pairs = sample_query_pairs(neo4j_edges, queries, seed=seed)
+                backends["neo4j"] = _benchmark_neo4j(neo4j_handler, neo4j_edges, neo4j_pairs, operations)
+
+            for backend, results in backends.items():
+                for operation, stats in results.items():
+                    rows.append({"backend": backend, **case, "operation": operation, **stats})
+                    print(f"[{backend}] {topology} n={case['n_nodes']} {operation}: {stats}")
+    return rows
+
+
+# ----------------------------------------------------------------------
+# ملف النتائج والمقارنة
+# ----------------------------------------------------------------------
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(rows: List[Dict], path: str, settings: Dict) -> Dict:
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "settings": settings,
+        },
+        "results": rows,
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def _row_key(row: Dict) -> Tuple:
+    return (row["backend"], row["topology"], row["n_nodes"], row["operation"])
+
+
+def compare_results(previous: Dict, current: Dict, tolerance: float = DEFAULT_REGRESSION_TOLERANCE) -> List[Dict]:
+    """يقارن p50 لكل صف مع نتيجة سابقة، ويعيد الصفوف التي تباطأت بأكثر من tolerance."""
+    baseline = {_row_key(row): row for row in previous["results"] if "p50_ms" in row}
+    regressions = []
+    for row in current["results"]:
+        before = baseline.get(_row_key(row))
+        if before is None or "p50_ms" not in row or before["p50_ms"] <= 0:
+            continue
+        ratio = row["p50_ms"] / before["p50_ms"]
+        if ratio > 1.0 + tolerance:
+            regressions.append({
+                "backend": row["backend"], "topology": row["topology"], "n_nodes": row["n_nodes"],
+                "operation": row["operation"], "before_p50_ms": before["p50_ms"],
+                "after_p50_ms": row["p50_ms"], "ratio": round(ratio, 3),
+            })
+    return regressions
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="قياس أداء عمليات OpenCausal على رسوم اصطناعية.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="أحجام الرسوم (عدد العقد)")
+    parser.add_argument("--topology", default="all", help="scale_free أو layered أو all")
+    parser.add_argument("--operations", default=",".join(DEFAULT_OPERATIONS))
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("--fan-out", type=int, default=3)
+    parser.add_argument("--weights", default=DEFAULT_WEIGHT_DISTRIBUTION, help="uniform / strong / weak / bimodal")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--neo4j-max-size", type=int, default=DEFAULT_NEO4J_MAX_SIZE)
+    parser.add_argument("--output", default=None, help="ملف JSON للنتائج")
+    parser.add_argument("--compare", default=None, help="ملف نتائج سابق للمقارنة")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_REGRESSION_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    topologies = DEFAULT_TOPOLOGIES if args.topology == "all" else _csv(args.topology)
+    settings = {
+        "sizes": [int(s) for s in _csv(args.sizes)], "topologies": topologies,
+        "operations": _csv(args.operations), "queries": args.queries, "fan_out": args.fan_out,
+        "weight_distribution": args.weights, "seed": args.seed,
+    }
+
+    neo4j_handler = _neo4j_handler() if os.getenv("NEO4J_URI") else None
+    try:
+        rows = run_benchmarks(**settings, neo4j_handler=neo4j_handler, neo4j_max_size=args.neo4j_max_size)
+    finally:
+        if neo4j_handler is not None:
+            neo4j_handler.close()
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    report = write_results(rows, output, {**settings, "neo4j": neo4j_handler is not None})
+    print(f"تمت كتابة النتائج في {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare_results(json.load(f), report, args.tolerance)
+        for regression in regressions:
+            print(f"⚠️ تراجع في الأداء: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,309 @@
+import asyncio
+from typing import Any, Callable, List, Dict, Optional
+
+from openai import AsyncOpenAI
+
+from db.async_neo4j_handler import AsyncNeo4jHandler
+from .bridge import (
+    LLM_MODEL,
+    INNOVATION_CONSTRAINTS,
+    _claims_messages,
+    _parse_claims,
+    _exploratory_question_messages,
+    _risk_messages,
+    _parse_risk,
+)
+from .confidence_store import get_confidence_store
+from .graph_events import notify_edges_updated
+from .instrumentation import span, start_trace, LLM
+from .llm_cache import get_llm_cache, make_llm_cache_key
+from .llm_gateway import get_llm_gateway
+from .innovation_engine import INNOVATIVE_PATH_QUERY
+from .path_cache import get_path_cache, CACHE_MISS
+from .reachability_index import get_reachability_index
+from .verify_causal import build_verify_path_query, TRUST_THRESHOLD, MAX_PATH_LENGTH
+from .weights import (
+    LEARNING_RATE_ETA,
+    BATCH_WEIGHT_UPDATE_QUERY,
+    INCREMENT_CONFIDENCE_QUERY,
+    _batched_edge_updates,
+)
+
+# ------------------------------------------------------------------
+# النسخ غير المتزامنة (asyncio) من الجسر
+# نفس الاستعلامات والتعليمات (prompts) المستخدمة في core/bridge.py، لكن عبر
+# مشغّل Neo4j غير المتزامن و AsyncOpenAI، بحيث يخدم نفس العملية مئات الطلبات المتزامنة.
+# ------------------------------------------------------------------
+
+# 1. الذاكرة Z (Neo4j)
+
+async def verify_causal_path_async(
+    handler: AsyncNeo4jHandler,
+    cause_name: str,
+    effect_name: str,
+    threshold: float = TRUST_THRESHOLD,
+    max_length: int = MAX_PATH_LENGTH
+) -> Optional[Dict]:
+    """النسخة غير المتزامنة من verify_causal_path (تستخدم نفس الفهرس والذاكرة المؤقتة إن كانا مفعّلين)."""
+
+    index = get_reachability_index()
+    if index is not None:
+        indexed = index.lookup(cause_name, effect_name, threshold, max_length)
+        if indexed is not CACHE_MISS:
+            return indexed
+
+    cache = get_path_cache()
+    if cache is not None:
+        cache_key = cache.make_key(cause_name, effect_name, threshold, max_length)
+        cached = cache.get(cache_key)
+        if cached is not CACHE_MISS:
+            return cached
+        cache_version = cache.version
+
+    parameters = {"cause": cause_name, "effect": effect_name, "threshold": threshold}
+    results = await handler.execute_read(build_verify_path_query(max_length), parameters)
+    verified_path = results[0] if results else None
+
+    if cache is not None:
+        cache.put(cache_key, verified_path, cache_version)
+
+    return verified_path
+
+
+async def find_innovative_path_async(
+    handler: AsyncNeo4jHandler,
+    start_entity: str,
+    target_goal: str,
+    constraints_to_ignore: List[str]
+) -> Optional[Dict]:
+    """النسخة غير المتزامنة من find_innovative_path."""
+
+    parameters = {
+        "start_entity": start_entity,
+        "target_goal": target_goal,
+        "constraints_to_ignore": constraints_to_ignore
+    }
+    results = await handler.execute_read(INNOVATIVE_PATH_QUERY, parameters)
+
+    if results:
+        print(f"🎉 تم اكتشاف مسار ابتكاري بطول {results[0]['path_length']} وبوزن {results[0]['path_weight']:.4f}")
+        return results[0]
+    return None
+
+
+async def update_causal_weight_async(
+    handler: AsyncNeo4jHandler,
+    path_details: List[Dict],
+    success_delta: float,
+    eta: float = LEARNING_RATE_ETA
+) -> List[str]:
+    """تحديث أوزان المسار في رحلة واحدة (UNWIND)، ويعيد elementId للروابط المحدثة."""
+
+    edges = _batched_edge_updates(path_details, success_delta, eta)
+    if not edges:
+        return []
+
+    result = await handler.execute_write(BATCH_WEIGHT_UPDATE_QUERY, {"edges": edges})
+    notify_edges_updated([{"start": e['start'], "end": e['end'], "weight": e['new_weight']} for e in edges])
+
+    return list(result[0]["edge_ids"]) if result else []
+
+
+async def update_system_confidence_async(
+    handler: AsyncNeo4jHandler,
+    success_delta: float,
+    eta: float = LEARNING_RATE_ETA
+) -> float:
+    """
+    النسخة غير المتزامنة من update_system_confidence_atomic: جملة واحدة (MERGE ثم SET نسبي تحت
+    قفل الكتابة)، فلا تضيع تحديثات الطلبات المتزامنة التي ينفذها asyncio.gather.
+    """
+
+    result = await handler.execute_write(INCREMENT_CONFIDENCE_QUERY, {"confidence_step": eta * success_delta})
+    return result[0]["level"] if result else None
+
+
+async def _update_confidence_async(handler: AsyncNeo4jHandler, success_delta: float) -> float:
+    """تحديث الثقة الذاتية عبر العدادات الفرعية إن كانت مفعّلة (enable_striped_confidence)."""
+    store = get_confidence_store()
+    if store is not None:
+        return await store.update_async(handler, success_delta)
+    return await update_system_confidence_async(handler, success_delta)
+
+
+# 2. استدعاءات LLM
+
+async def _achat_completion(
+    client: AsyncOpenAI,
+    messages: List[Dict],
+    response_format: Optional[Dict] = None,
+    parse: Optional[Callable[[str], Any]] = None
+):
+    """النسخة غير المتزامنة من _chat_completion (نفس ذاكرة الردود المؤقتة ونفس البوابة والمحلل)."""
+    cache = get_llm_cache()
+    if cache is not None:
+        cache_key = make_llm_cache_key(LLM_MODEL, messages, response_format)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return parse(cached) if parse is not None else cached
+
+    request = {"model": LLM_MODEL, "messages": messages}
+    if response_format is not None:
+        request["response_format"] = response_format
+    gateway = get_llm_gateway()
+    with span("llm.chat_completion", LLM):
+        if gateway is not None:
+            response = await gateway.acall(gateway.client_without_retries(client).chat.completions.create, **request)
+        else:
+            response = await client.chat.completions.create(**request)
+    content = response.choices[0].message.content
+    result = parse(content) if parse is not None else content
+
+    if cache is not None and content is not None:
+        cache.set(cache_key, LLM_MODEL, content)
+    return result
+
+
+async def extract_causal_claims_async(llm_output_text: str, client: AsyncOpenAI) -> List[Dict]:
+    try:
+        return await _achat_completion(
+            client, _claims_messages(llm_output_text), response_format={"type": "json_object"}, parse=_parse_claims
+        )
+
+    except Exception as e:
+        print(f"حدث خطأ في استخلاص الفرضيات من LLM: {e}")
+        return []
+
+
+async def generate_exploratory_question_async(llm_client: AsyncOpenAI, cause: str, effect: str, threshold: float) -> str:
+    try:
+        question = await _achat_completion(llm_client, _exploratory_question_messages(cause, effect))
+        print(f"**[GAP ALERT]** تم اكتشاف فجوة سببية بين {cause} و {effect}. Thresh={threshold}")
+        return f"نحتاج للمساعدة في إغلاق الفجوة المعرفية: {question}"
+
+    except Exception as e:
+        return f"عذراً، لا يمكنني صياغة سؤال استكشافي الآن بسبب خطأ في LLM: {e}"
+
+
+async def assess_innovative_risk_async(llm_client: AsyncOpenAI, path_details: List[Dict]) -> Dict:
+    try:
+        return await _achat_completion(
+            llm_client, _risk_messages(path_details), response_format={"type": "json_object"}, parse=_parse_risk
+        )
+
+    except Exception as e:
+        print(f"حدث خطأ في تقييم المخاطر عبر LLM: {e}")
+        return {"risk_score": 1.0, "side_effects": "فشل تقييم المخاطر، يجب رفض الحل."}
+
+
+# ------------------------------------------------------------------
+# 3. المنطق الرئيسي للجسر (نسخة asyncio)
+# ------------------------------------------------------------------
+
+async def process_and_learn_async(
+    llm_text: str,
+    handler: AsyncNeo4jHandler,
+    llm_client: AsyncOpenAI,
+    feedback_delta: float = 0.0
+) -> Dict:
+    """
+    النسخة غير المتزامنة من process_and_learn (نفس بنية النتيجة).
+
+    الخطوات المستقلة تُنفذ بالتوازي: عند النجاح تحديث الأوزان مع تحديث الثقة،
+    وعند الفشل تحديث الثقة مع توليد السؤال الاستكشافي (لذا قد يتجاوز مجموع أزمنة المراحل
+    في الحقل timings الزمن الكلي).
+    """
+    with start_trace() as trace:
+        result = await _process_and_learn_async(llm_text, handler, llm_client, feedback_delta)
+    result["timings"] = trace.as_dict()
+    return result
+
+
+async def _timed(name: str, awaitable):
+    """ينتظر awaitable داخل مقطع زمني (لاستخدامه مع asyncio.gather)."""
+    with span(name):
+        return await awaitable
+
+
+async def _process_and_learn_async(
+    llm_text: str,
+    handler: AsyncNeo4jHandler,
+    llm_client: AsyncOpenAI,
+    feedback_delta: float
+) -> Dict:
+    with span("extract_claims"):
+        causal_claims = await extract_causal_claims_async(llm_text, llm_client)
+
+    verified_path = None
+    best_claim = None
+
+    if causal_claims:
+        best_claim = causal_claims[0]
+        with span("verify"):
+            verified_path = await verify_causal_path_async(handler, best_claim['cause'], best_claim['effect'])
+
+    if verified_path:
+        _, new_confidence = await asyncio.gather(
+            _timed("update_weights", update_causal_weight_async(handler, verified_path['path_details'], feedback_delta)),
+            _timed("update_confidence", _update_confidence_async(handler, success_delta=0.1)),
+        )
+        return {
+            "status": "Success - Logically Verified and Learned",
+            "message": "تم تأكيد المنطق السببي. يمكن تنفيذ القرار بأمان.",
+            "system_confidence": new_confidence
+        }
+
+    if best_claim:
+        new_confidence, gap_question = await asyncio.gather(
+            _timed("update_confidence", _update_confidence_async(handler, success_delta=-0.2)),
+            _timed("gap_question", generate_exploratory_question_async(
+                llm_client, best_claim['cause'], best_claim['effect'], TRUST_THRESHOLD
+            )),
+        )
+        return {
+            "status": "Failure - Causal Gap Found (Active Learning)",
+            "action_required": "طلب معلومات من المستخدم",
+            "question": gap_question,
+            "system_confidence": new_confidence
+        }
+
+    with span("update_confidence"):
+        new_confidence = await _update_confidence_async(handler, success_delta=-0.2)
+    return {
+        "status": "Failure - No Claims Found",
+        "message": "لم يتم العثور على فرضيات سببية للتحقق منها.",
+        "system_confidence": new_confidence
+    }
+
+
+async def attempt_innovative_solution_async(
+    handler: AsyncNeo4jHandler,
+    llm_client: AsyncOpenAI,
+    original_cause: str,
+    desired_effect: str
+) -> Dict:
+    """النسخة غير المتزامنة من attempt_innovative_solution."""
+
+    constraints_to_ignore = INNOVATION_CONSTRAINTS
+    print(f"\n[🚀 INNOVATION MODE] تحويل التفكير للبحث عن حل يتجاهل: {constraints_to_ignore}")
+
+    innovative_path = await find_innovative_path_async(handler, original_cause, desired_effect, constraints_to_ignore)
+
+    if not innovative_path:
+        return {"status": "Innovation Failed", "message": "لم يتم العثور على حل ابتكاري قابل للتطبيق."}
+
+    risk_assessment = await assess_innovative_risk_async(llm_client, innovative_path['path_details'])
+    risk_score = risk_assessment['risk_score']
+
+    if risk_score > 0.7:
+        return {
+            "status": "Innovative Solution REJECTED",
+            "message": f"تم رفض الحل الابتكاري بسبب ارتفاع المخاطر (Risk Score: {risk_score}).",
+            "risk_details": risk_assessment['side_effects']
+        }
+
+    return {
+        "status": "Innovative Solution Found",
+        "path": innovative_path['path_details'],
+        "risk_assessment": risk_assessment
+    }
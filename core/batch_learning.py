@@ -0,0 +1,187 @@
+import time
+from typing import Iterable, Dict, List, Tuple
+
+import numpy as np
+
+from db.neo4j_handler import Neo4jHandler
+from .graph_events import notify_edges_updated
+from .weights import LEARNING_RATE_ETA
+
+# حجم دفعة الكتابة المجمّعة (عدد الروابط في كل استعلام UNWIND)
+DEFAULT_WRITE_BATCH_SIZE = 10000
+
+# عدد أحداث التغذية الراجعة التي تُدمج قبل كل عملية قص (clip)
+DEFAULT_REPLAY_CHUNK_SIZE = 100000
+
+# تحميل كل الروابط مع معرّفها (elementId) حتى تتم الكتابة لاحقاً بالمعرف مباشرة
+LOAD_EDGE_WEIGHTS_QUERY = """
+MATCH (cause)-[r:CAUSES]->(effect)
+RETURN elementId(r) AS edge_id, cause.name AS start, effect.name AS end, r.weight AS weight
+"""
+
+# الكتابة المجمّعة بالمعرف: لا حاجة للبحث عن العقد بالاسم
+WRITE_EDGE_WEIGHTS_QUERY = """
+UNWIND $rows AS row
+MATCH ()-[r:CAUSES]->()
+WHERE elementId(r) = row.edge_id
+SET r.weight = row.weight
+"""
+
+
+class BatchLearner:
+    """
+    محرك تعلم دفعي لإعادة تشغيل سجلات التغذية الراجعة التاريخية (offline replay).
+
+    أوزان كل الروابط في مصفوفة NumPy واحدة مفهرسة برقم الرابط. كل دفعة من الأحداث تتحول إلى
+    مصفوفتين (أرقام الروابط، الفروقات) وتُطبق بعمليات متجهة:
+        np.add.at(accumulated, positions, eta * deltas)   # يجمع الفروقات المتكررة لنفس الرابط
+        weights = np.clip(weights + accumulated, 0, 1)
+
+    الفرق عن update_causal_weight: القص يُطبق مرة لكل دفعة (chunk_size حدث) وليس بعد كل حدث،
+    ولا يختلف الناتج إلا عند التشبع (وصول الوزن إلى 0 أو 1 داخل نفس الدفعة).
+    استخدم chunk_size=1 للحصول على نفس نتيجة التحديث الحدث تلو الآخر.
+    """
+
+    def __init__(self, edge_ids: List[str], starts: List[str], ends: List[str], weights: Iterable[float]):
+        self.edge_ids = list(edge_ids)
+        self.starts = list(starts)
+        self.ends = list(ends)
+        self.weights = np.asarray(list(weights), dtype=np.float64)
+        self.original_weights = self.weights.copy()
+
+        # الروابط المتوازية بين نفس العقدتين تُحدَّث معاً (مثل استعلام MATCH في التحديث الفوري)
+        self._positions: Dict[Tuple[str, str], List[int]] = {}
+        for position, key in enumerate(zip(self.starts, self.ends)):
+            self._positions.setdefault(key, []).append(position)
+
+    @classmethod
+    def from_handler(cls, handler: Neo4jHandler) -> "BatchLearner":
+        """يحمّل كل أوزان CAUSES من Neo4j في استعلام قراءة واحد (كتدفق مع Neo4jHandler)."""
+        if isinstance(handler, Neo4jHandler):
+            columns = ([], [], [], [])
+            for row in handler.stream_query(LOAD_EDGE_WEIGHTS_QUERY, projection="tuple"):
+                for column, value in zip(columns, row):
+                    column.append(value)
+            return cls(*columns)
+
+        records = handler.execute_read(LOAD_EDGE_WEIGHTS_QUERY)
+        return cls(
+            [r['edge_id'] for r in records],
+            [r['start'] for r in records],
+            [r['end'] for r in records],
+            [r['weight'] for r in records],
+        )
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_ids)
+
+    # ------------------------------------------------------------------
+    # تطبيق التغذية الراجعة
+    # ------------------------------------------------------------------
+
+    def apply_deltas(self, positions: np.ndarray, deltas: np.ndarray, eta: float = LEARNING_RATE_ETA):
+        """النواة المتجهة: يضيف eta * deltas إلى الروابط المحددة (مع التكرار) ثم يقص إلى [0, 1]."""
+        accumulated = np.zeros_like(self.weights)
+        np.add.at(accumulated, positions, eta * deltas)
+        np.clip(self.weights + accumulated, 0.0, 1.0, out=self.weights)
+
+    def replay(
+        self,
+        events: Iterable[Dict],
+        eta: float = LEARNING_RATE_ETA,
+        chunk_size: int = DEFAULT_REPLAY_CHUNK_SIZE
+    ) -> Dict:
+        """
+        يعيد تشغيل أحداث التغذية الراجعة بالترتيب.
+
+        كل حدث إما بصيغة process_and_learn: {"path_details": [...], "success_delta": x}
+        أو رابط واحد: {"start": ..., "end": ..., "success_delta": x}.
+        الروابط غير الموجودة في الذاكرة Z يتم تجاهلها (وتُحسب في skipped_edges)، والحدث الذي
+        قائمة path_details فيه فارغة لا يحدّث أي رابط.
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size يجب أن يكون 1 على الأقل (القيمة: {chunk_size}).")
+
+        started = time.perf_counter()
+        stats = {"events": 0, "edge_updates": 0, "skipped_edges": 0}
+        positions: List[int] = []
+        deltas: List[float] = []
+
+        def flush():
+            if positions:
+                self.apply_deltas(np.asarray(positions, dtype=np.int64), np.asarray(deltas, dtype=np.float64), eta)
+                stats["edge_updates"] += len(positions)
+                positions.clear()
+                deltas.clear()
+
+        for event in events:
+            success_delta = float(event['success_delta'])
+            edges = event.get('path_details')
+            if edges is None:
+                edges = [event]
+            stats["events"] += 1
+
+            if success_delta != 0.0:
+                for edge in edges:
+                    matched = self._positions.get((edge['start'], edge['end']))
+                    if matched is None:
+                        stats["skipped_edges"] += 1
+                        continue
+                    positions.extend(matched)
+                    deltas.extend([success_delta] * len(matched))
+
+            if stats["events"] % chunk_size == 0:
+                flush()
+
+        flush()
+
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        stats["changed_edges"] = int(np.count_nonzero(self._changed_mask()))
+        print(f"تمت إعادة تشغيل {stats['events']} حدث ({stats['edge_updates']} تحديث رابط) "
+              f"خلال {stats['seconds']} ثانية.")
+        return stats
+
+    # ------------------------------------------------------------------
+    # الكتابة المجمّعة
+    # ------------------------------------------------------------------
+
+    def _changed_mask(self) -> np.ndarray:
+        return np.round(self.weights, 4) != np.round(self.original_weights, 4)
+
+    def write_back(self, handler: Neo4jHandler, batch_size: int = DEFAULT_WRITE_BATCH_SIZE) -> Dict:
+        """يكتب الأوزان التي تغيرت فقط، على دفعات UNWIND بالمعرف elementId."""
+
+        started = time.perf_counter()
+        changed = np.flatnonzero(self._changed_mask())
+        rounded = np.round(self.weights, 4)
+        batches = 0
+
+        for lo in range(0, len(changed), batch_size):
+            chunk = changed[lo:lo + batch_size].tolist()
+            rows = [{"edge_id": self.edge_ids[i], "weight": float(rounded[i])} for i in chunk]
+            handler.execute_write(WRITE_EDGE_WEIGHTS_QUERY, {"rows": rows})
+            notify_edges_updated([
+                {"start": self.starts[i], "end": self.ends[i], "weight": float(rounded[i])} for i in chunk
+            ])
+            batches += 1
+
+        self.original_weights[changed] = self.weights[changed]
+
+        seconds = round(time.perf_counter() - started, 3)
+        print(f"تمت كتابة {len(changed)} وزن في {batches} دفعة خلال {seconds} ثانية.")
+        return {"written_edges": int(len(changed)), "batches": batches, "seconds": seconds}
+
+
+def retrain_from_feedback(
+    handler: Neo4jHandler,
+    events: Iterable[Dict],
+    eta: float = LEARNING_RATE_ETA,
+    chunk_size: int = DEFAULT_REPLAY_CHUNK_SIZE,
+    batch_size: int = DEFAULT_WRITE_BATCH_SIZE
+) -> Dict:
+    """نقطة الدخول: تحميل الأوزان، إعادة تشغيل سجل التغذية الراجعة، ثم الكتابة المجمّعة."""
+    learner = BatchLearner.from_handler(handler)
+    replay_stats = learner.replay(events, eta=eta, chunk_size=chunk_size)
+    write_stats = learner.write_back(handler, batch_size=batch_size)
+    return {**replay_stats, **write_stats}
@@ -1,10 +1,18 @@
 import json
 from openai import OpenAI # مثال على استخدام LLM
-from typing import List, Dict
+from typing import Any, Callable, List, Dict, Optional
 from db.neo4j_handler import Neo4jHandler
+from .llm_cache import get_llm_cache, make_llm_cache_key
+from .llm_batcher import get_llm_batcher, BatcherClosedError
+from .llm_gateway import get_llm_gateway
 from .innovation_engine import find_innovative_path
-from .verify_causal import verify_causal_path, TRUST_THRESHOLD 
-from .weights import update_system_confidence, update_causal_weight
+from .verify_causal import verify_causal_path, verify_causal_paths_batch, TRUST_THRESHOLD 
+from .weights import (
+    update_system_confidence, update_causal_weight, update_causal_weights_batched, update_causal_weights_relative
+)
+from .write_behind import get_learning_buffer
+from .confidence_store import get_confidence_store
+from .instrumentation import span, start_trace, LLM
 
 # يجب تهيئة العميل في مكان مناسب
 # client = OpenAI(api_key=...) 
@@ -23,54 +31,112 @@ CAUSAL_SCHEMA = {
     }
 }
 
+# نموذج LLM المستخدم في كل الاستدعاءات
+LLM_MODEL = "gpt-4-turbo"
+
+# القيود (I) التي منعت الحل التقليدي ويتم تجاهلها في وضع الابتكار
+INNOVATION_CONSTRAINTS = ["High_Cost", "Slow_Protocol_K", "Mandatory_Check_J"]
+
 # ------------------------------------------------------------------
 # الدوال المساعدة (تبقى كما هي تقريبا)
 # ------------------------------------------------------------------
 
-def extract_causal_claims_from_llm(llm_output_text: str, client: OpenAI) -> List[Dict]:
-    """يستخدم LLM لتحليل نص الإجابة واستخلاص الفرضيات السببية المنظمة."""
-    
+def _chat_completion(
+    client: OpenAI,
+    messages: List[Dict],
+    response_format: Optional[Dict] = None,
+    parse: Optional[Callable[[str], Any]] = None
+):
+    """
+    استدعاء موحد لـ LLM يعيد نص الرد (أو parse(النص) إذا مُرر محلل)، مع المرور بذاكرة الردود
+    المؤقتة إن كانت مفعّلة (enable_llm_cache) وبالبوابة المشتركة إن كانت مفعّلة (enable_llm_gateway).
+    الأخطاء لا تُخزن، ولا الردود التي يرفضها المحلل (JSON مقطوع أو غير صالح).
+    """
+    cache = get_llm_cache()
+    if cache is not None:
+        cache_key = make_llm_cache_key(LLM_MODEL, messages, response_format)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return parse(cached) if parse is not None else cached
+
+    request = {"model": LLM_MODEL, "messages": messages}
+    if response_format is not None:
+        request["response_format"] = response_format
+    gateway = get_llm_gateway()
+    with span("llm.chat_completion", LLM):
+        if gateway is not None:
+            response = gateway.call(gateway.client_without_retries(client).chat.completions.create, **request)
+        else:
+            response = client.chat.completions.create(**request)
+    content = response.choices[0].message.content
+    result = parse(content) if parse is not None else content
+
+    if cache is not None and content is not None:
+        cache.set(cache_key, LLM_MODEL, content)
+    return result
+
+
+def _claims_messages(llm_output_text: str) -> List[Dict]:
     system_prompt = (
         "أنت محلل منطقي متخصص. مهمتك هي استخراج العلاقات السببية (cause -> effect) "
         "من النص المُقدم. يجب أن يكون الخرج **بصيغة JSON** يتوافق مع مخطط CAUSAL_SCHEMA." # ⭐ تم إضافة كلمة JSON
     )
     user_content = f"النص لتحليله: '{llm_output_text}'"
+    return [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_content}]
+
+
+def _parse_claims(raw_json_output: str) -> List[Dict]:
+    claims_data = json.loads(raw_json_output)
+
+    # ⭐ هذا الجزء حاسم: تأكد من أن الدالة ترجع القائمة، حتى لو كانت مغلفة بمفتاح
+    if isinstance(claims_data, list):
+        return claims_data
+    elif isinstance(claims_data, dict) and 'causal_claims' in claims_data: # ⭐ قد تحتاج لاستبدال 'claims' بـ 'causal_claims'
+        return claims_data['causal_claims']
+
+    return []
+
+
+def extract_causal_claims_from_llm(llm_output_text: str, client: OpenAI, use_batcher: bool = True) -> List[Dict]:
+    """
+    يستخدم LLM لتحليل نص الإجابة واستخلاص الفرضيات السببية المنظمة.
+
+    إذا كان التجميع المصغّر مفعّلاً لنفس العميل (enable_llm_batching) يُضاف النص إلى الدفعة
+    الحالية وتنتظر الدالة نتيجته من الطلب المجمّع.
+    """
+
+    batcher = get_llm_batcher() if use_batcher else None
+    if batcher is not None and batcher.client is client:
+        try:
+            return batcher.extract(llm_output_text)
+        except BatcherClosedError:
+            pass  # أُغلق المجمّع أثناء الاستدعاء (disable_llm_batching): طلب مباشر
+        except Exception as e:
+            print(f"حدث خطأ في استخلاص الفرضيات من LLM: {e}")
+            return []
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo", 
-            messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_content}],
-            response_format={"type": "json_object"}, 
+        return _chat_completion(
+            client, _claims_messages(llm_output_text), response_format={"type": "json_object"}, parse=_parse_claims
         )
-        raw_json_output = response.choices[0].message.content
-        claims_data = json.loads(raw_json_output)
-        
-        # ⭐ هذا الجزء حاسم: تأكد من أن الدالة ترجع القائمة، حتى لو كانت مغلفة بمفتاح
-        if isinstance(claims_data, list):
-            return claims_data
-        elif isinstance(claims_data, dict) and 'causal_claims' in claims_data: # ⭐ قد تحتاج لاستبدال 'claims' بـ 'causal_claims'
-            return claims_data['causal_claims']
-        
-        return []
 
     except Exception as e:
         print(f"حدث خطأ في استخلاص الفرضيات من LLM: {e}")
         return []
     
 
-def generate_exploratory_question(llm_client: OpenAI, cause: str, effect: str, threshold: float) -> str:
-    """يولد سؤالاً موجهاً للمستخدم لطلب معلومات سببية محددة بين السبب والنتيجة."""
-    # ... (الكود يبقى كما هو)
+def _exploratory_question_messages(cause: str, effect: str) -> List[Dict]:
     system_prompt = ("أنت محقق متخصص في المنطق السببي. ...")
     user_content = (f"المشكلة: لا أستطيع إثبات منطقياً أن '{cause}' يؤدي إلى '{effect}' "
                     f"لأن الروابط الحالية ضعيفة جداً. ما هو الإجراء المفقود الذي يجب أن أسأل عنه؟")
+    return [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_content}]
+
+
+def generate_exploratory_question(llm_client: OpenAI, cause: str, effect: str, threshold: float) -> str:
+    """يولد سؤالاً موجهاً للمستخدم لطلب معلومات سببية محددة بين السبب والنتيجة."""
 
     try:
-        response = llm_client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_content}]
-        )
-        question = response.choices[0].message.content
+        question = _chat_completion(llm_client, _exploratory_question_messages(cause, effect))
         print(f"**[GAP ALERT]** تم اكتشاف فجوة سببية بين {cause} و {effect}. Thresh={threshold}")
         return f"نحتاج للمساعدة في إغلاق الفجوة المعرفية: {question}"
 
@@ -78,66 +144,174 @@ def generate_exploratory_question(llm_client: OpenAI, cause: str, effect: str, t
         return f"عذراً، لا يمكنني صياغة سؤال استكشافي الآن بسبب خطأ في LLM: {e}"
 
 
+def _update_confidence(handler: Neo4jHandler, success_delta: float) -> float:
+    """تحديث الثقة الذاتية عبر العدادات الفرعية إن كانت مفعّلة (enable_striped_confidence)."""
+    store = get_confidence_store()
+    if store is not None:
+        return store.update(handler, success_delta)
+    return update_system_confidence(handler, success_delta=success_delta)
+
+
 # ------------------------------------------------------------------
 # 2. المنطق الرئيسي للجسر (process_and_learn)
 # ------------------------------------------------------------------
 
-def process_and_learn(llm_text: str, handler: Neo4jHandler, llm_client: OpenAI, feedback_delta: float = 0.0):
+def process_and_learn(
+    llm_text: str,
+    handler: Neo4jHandler,
+    llm_client: OpenAI,
+    feedback_delta: float = 0.0,
+    batched_learning: bool = False,
+    verify_all_claims: bool = False,
+    read_handler=None
+):
     """
     الدالة الرئيسية التي تستخلص الفرضيات، تتحقق منها، وتدير دورة التعلم والوعي الذاتي.
+
+    batched_learning: عند تفعيله يتم تحديث أوزان المسار والثقة الذاتية في رحلة واحدة إلى Neo4j.
+    verify_all_claims: عند تفعيله يتم التحقق من كل الفرضيات المستخلصة (في استعلام واحد)
+        بدلاً من الأولى فقط، ويُضاف الحكم على كل فرضية في الحقل claim_verdicts.
+    read_handler: مصدر القراءة (مثل DeltaLogReplica.graph) لخدمة التحقق محلياً،
+        بينما تبقى الكتابة (الأوزان والثقة) على handler. لأن هذا المصدر قد يتأخر عن Neo4j
+        تُكتب أوزان المسار كفروقات نسبية (update_causal_weights_relative) وليس كأوزان مطلقة.
+
+    إذا كانت الكتابة المؤجلة مفعّلة (enable_write_behind) تُضاف فروقات الأوزان والثقة إلى
+    الذاكرة الوسيطة بدلاً من كتابتها فوراً، و system_confidence هو المستوى المتوقع بعد الكتابة.
+
+    الحقل timings في النتيجة يحتوي زمن كل مرحلة (extract_claims, verify, update_weights,
+    update_confidence, gap_question) وإجمالي استدعاءات Neo4j و LLM (انظر core/instrumentation.py).
     """
+    with start_trace() as trace:
+        result = _process_and_learn(
+            llm_text, handler, llm_client, feedback_delta, batched_learning, verify_all_claims, read_handler
+        )
+    result["timings"] = trace.as_dict()
+    return result
+
+
+def _process_and_learn(
+    llm_text: str,
+    handler: Neo4jHandler,
+    llm_client: OpenAI,
+    feedback_delta: float,
+    batched_learning: bool,
+    verify_all_claims: bool,
+    read_handler
+) -> Dict:
+    """جسم process_and_learn: كل مرحلة داخل مقطع زمني (span) باسمها."""
+
+    reader = read_handler if read_handler is not None else handler
     
     # 1. استخلاص الفرضيات من النص
-    causal_claims = extract_causal_claims_from_llm(llm_text, llm_client) 
+    with span("extract_claims"):
+        causal_claims = extract_causal_claims_from_llm(llm_text, llm_client) 
     
-    verified_path = None
+    verified_paths = []
     best_claim = None
+    claim_verdicts = None
     
     if causal_claims:
-        # نبحث عن أول فرضية يمكن التحقق منها
         best_claim = causal_claims[0] 
-        verified_path = verify_causal_path(handler, best_claim['cause'], best_claim['effect'])
+        if verify_all_claims:
+            # ⭐ التحقق من كل الفرضيات دفعة واحدة (UNWIND على الأزواج)
+            with span("verify"):
+                all_paths = verify_causal_paths_batch(reader, causal_claims)
+            claim_verdicts = [
+                {
+                    "cause": claim['cause'],
+                    "effect": claim['effect'],
+                    "verified": path is not None,
+                    "path_weight": path['path_weight'] if path else None
+                }
+                for claim, path in zip(causal_claims, all_paths)
+            ]
+            verified_paths = [path for path in all_paths if path]
+        else:
+            # نبحث عن أول فرضية يمكن التحقق منها
+            with span("verify"):
+                verified_path = verify_causal_path(reader, best_claim['cause'], best_claim['effect'])
+            if verified_path:
+                verified_paths = [verified_path]
     
     # ------------------------------------------------------------------
     # 2. اتخاذ القرار بعد التحقق وتطبيق التعلم والوعي الذاتي
     # ------------------------------------------------------------------
     
-    if verified_path:
+    if verified_paths:
         # حالة النجاح: تم التحقق منطقياً
+        # رابط مشترك بين مسارين لفرضيتين يُتعلم مرة واحدة: الكتابة المؤجلة تجمع الفروقات لكل رابط،
+        # فبدون إزالة التكرار يُطبق الفرق مرتين هناك ومرة واحدة فعلياً في الكتابة المطلقة
+        learned_edges = _unique_edges(verified_paths)
+        learning_buffer = get_learning_buffer()
         
-        # ⭐ 2.1. تطبيق التعلم (إذا كانت هناك تغذية راجعة)
-        if feedback_delta != 0.0:
-            update_causal_weight(handler, verified_path['path_details'], feedback_delta)
-            
-        # ⭐ 2.2. تحديث الوعي الذاتي (النجاح يعزز الثقة)
-        new_confidence = update_system_confidence(handler, success_delta=0.1) # تعزيز بسيط
+        if learning_buffer is not None:
+            # ⭐ الكتابة المؤجلة (enable_write_behind): تُدمج الفروقات وتُكتب لاحقاً في معاملة واحدة
+            with span("update_weights"):
+                learning_buffer.add_edge_feedback(learned_edges, feedback_delta)
+            with span("update_confidence"):
+                new_confidence = learning_buffer.add_confidence(0.1)
+        elif read_handler is not None and read_handler is not handler:
+            # ⭐ القراءة من نسخة قد تتأخر (مثل DeltaLogReplica.graph): تُكتب الفروقات نسبياً إلى
+            # الوزن الحالي في Neo4j، فلا تمحو الأوزان القديمة في المسار تحديثات فترة التأخر
+            with span("update_weights"):
+                update_causal_weights_relative(handler, learned_edges, feedback_delta)
+            with span("update_confidence"):
+                new_confidence = _update_confidence(handler, success_delta=0.1)
+        elif batched_learning and get_confidence_store() is None:
+            # ⭐ 2.1 + 2.2 في معاملة واحدة (أوزان المسار + تعزيز الثقة)
+            with span("update_weights_and_confidence"):
+                learning = update_causal_weights_batched(
+                    handler, learned_edges, feedback_delta, confidence_delta=0.1
+                )
+            new_confidence = learning['system_confidence']
+        elif batched_learning:
+            # مع العدادات الفرعية تُحدّث الثقة عبرها حتى يبقى المستوى المُعاد هو نفسه في كل المسارات
+            with span("update_weights"):
+                update_causal_weights_batched(handler, learned_edges, feedback_delta)
+            with span("update_confidence"):
+                new_confidence = _update_confidence(handler, success_delta=0.1)
+        else:
+            # ⭐ 2.1. تطبيق التعلم (إذا كانت هناك تغذية راجعة)
+            if feedback_delta != 0.0:
+                with span("update_weights"):
+                    update_causal_weight(handler, learned_edges, feedback_delta)
+
+            # ⭐ 2.2. تحديث الوعي الذاتي (النجاح يعزز الثقة)
+            with span("update_confidence"):
+                new_confidence = _update_confidence(handler, success_delta=0.1) # تعزيز بسيط
         
-        return {
+        return _with_verdicts({
             "status": "Success - Logically Verified and Learned",
             "message": "تم تأكيد المنطق السببي. يمكن تنفيذ القرار بأمان.",
             "system_confidence": new_confidence
-        }
+        }, claim_verdicts)
     
     else:
         # حالة الفشل: اكتشاف فجوة سببية (Hallucination Prevention)
         
         # ⭐ 2.3. تحديث الوعي الذاتي (الفشل يقلل الثقة)
-        new_confidence = update_system_confidence(handler, success_delta=-0.2) # تقليل الثقة عند الفشل في التحقق
+        learning_buffer = get_learning_buffer()
+        with span("update_confidence"):
+            if learning_buffer is not None:
+                new_confidence = learning_buffer.add_confidence(-0.2)
+            else:
+                new_confidence = _update_confidence(handler, success_delta=-0.2) # تقليل الثقة عند الفشل في التحقق
         
         if best_claim:
             # 2.4. توليد سؤال للتعلم النشط
-            gap_question = generate_exploratory_question(
-                llm_client, 
-                best_claim['cause'], 
-                best_claim['effect'], 
-                TRUST_THRESHOLD
-            )
-            return {
+            with span("gap_question"):
+                gap_question = generate_exploratory_question(
+                    llm_client, 
+                    best_claim['cause'], 
+                    best_claim['effect'], 
+                    TRUST_THRESHOLD
+                )
+            return _with_verdicts({
                 "status": "Failure - Causal Gap Found (Active Learning)",
                 "action_required": "طلب معلومات من المستخدم",
                 "question": gap_question,
                 "system_confidence": new_confidence
-            }
+            }, claim_verdicts)
         else:
             return {
                 "status": "Failure - No Claims Found", 
@@ -146,20 +320,25 @@ def process_and_learn(llm_text: str, handler: Neo4jHandler, llm_client: OpenAI,
             }
 
 
-# في core/bridge.py (دالة جديدة)
+def _unique_edges(paths: List[Dict]) -> List[Dict]:
+    """روابط كل المسارات بدون تكرار (حسب start, end)، بترتيب أول ظهور."""
+    edges = {}
+    for path in paths:
+        for edge in path['path_details']:
+            edges.setdefault((edge['start'], edge['end']), edge)
+    return list(edges.values())
 
-def assess_innovative_risk(llm_client: OpenAI, path_details: List[Dict]) -> Dict:
-    """
-    تقييم مخاطر المسار الابتكاري المقترح باستخدام LLM.
 
-    المدخلات:
-        llm_client: كائن العميل الخاص بـ LLM.
-        path_details: تفاصيل المسار الابتكاري (الروابط الجديدة/المُتجاهلة).
-        
-    المخرجات:
-        قاموس يحتوي على تقييم المخاطر (Risk Score, Side Effects).
-    """
-    
+def _with_verdicts(result: Dict, claim_verdicts) -> Dict:
+    """يضيف أحكام الفرضيات إلى النتيجة عند التحقق من كل الفرضيات."""
+    if claim_verdicts is not None:
+        result["claim_verdicts"] = claim_verdicts
+    return result
+
+
+# في core/bridge.py (دالة جديدة)
+
+def _risk_messages(path_details: List[Dict]) -> List[Dict]:
     path_summary = "\n".join([f"- {e['start']} -> {e['end']} (Weight: {e.get('weight', 'NEW')})" for e in path_details])
     
     system_prompt = (
@@ -173,23 +352,36 @@ def assess_innovative_risk(llm_client: OpenAI, path_details: List[Dict]) -> Dict
         f"المسار الابتكاري المقترح (الروابط): \n{path_summary}\n"
         f"ما هي المخاطر والآثار الجانبية غير المتوقعة (مثل: زيادة في التكلفة، تدهور الأداء)؟"
     )
+    return [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_content}]
+
+
+def _parse_risk(raw_json: str) -> Dict:
+    risk_data = json.loads(raw_json)
+    
+    # يجب أن يتوقع الـ Schema مفتاحين رئيسيين: risk_score و side_effects
+    return {
+        "risk_score": risk_data.get('risk_score', 0.5), # قيمة افتراضية
+        "side_effects": risk_data.get('side_effects', "لم يتم تحديد آثار جانبية واضحة.")
+    }
+
+
+def assess_innovative_risk(llm_client: OpenAI, path_details: List[Dict]) -> Dict:
+    """
+    تقييم مخاطر المسار الابتكاري المقترح باستخدام LLM.
+
+    المدخلات:
+        llm_client: كائن العميل الخاص بـ LLM.
+        path_details: تفاصيل المسار الابتكاري (الروابط الجديدة/المُتجاهلة).
+        
+    المخرجات:
+        قاموس يحتوي على تقييم المخاطر (Risk Score, Side Effects).
+    """
 
     try:
         # استخدام LLM لتحليل المخاطر وصياغة الخرج كـ JSON
-        response = llm_client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_content}],
-            response_format={"type": "json_object"},
+        return _chat_completion(
+            llm_client, _risk_messages(path_details), response_format={"type": "json_object"}, parse=_parse_risk
         )
-        
-        raw_json = response.choices[0].message.content
-        risk_data = json.loads(raw_json)
-        
-        # يجب أن يتوقع الـ Schema مفتاحين رئيسيين: risk_score و side_effects
-        return {
-            "risk_score": risk_data.get('risk_score', 0.5), # قيمة افتراضية
-            "side_effects": risk_data.get('side_effects', "لم يتم تحديد آثار جانبية واضحة.")
-        }
     
     except Exception as e:
         print(f"حدث خطأ في تقييم المخاطر عبر LLM: {e}")
@@ -198,16 +390,16 @@ def assess_innovative_risk(llm_client: OpenAI, path_details: List[Dict]) -> Dict
 
 # في core/bridge.py (تعديل دالة attempt_innovative_solution)
 
-def attempt_innovative_solution(handler: Neo4jHandler, llm_client: OpenAI, original_cause: str, desired_effect: str):
+def attempt_innovative_solution(handler: Neo4jHandler, llm_client: OpenAI, original_cause: str, desired_effect: str, read_handler=None):
     
     # 1. تحديد القيود (I) التي منعت الحل التقليدي
-    constraints_to_ignore = ["High_Cost", "Slow_Protocol_K", "Mandatory_Check_J"]
+    constraints_to_ignore = INNOVATION_CONSTRAINTS
     
     print(f"\n[🚀 INNOVATION MODE] تحويل التفكير للبحث عن حل يتجاهل: {constraints_to_ignore}")
     
     # 2. تطبيق مشغل imagine(I)
     innovative_path = find_innovative_path(
-        handler,
+        read_handler if read_handler is not None else handler,
         start_entity=original_cause,
         target_goal=desired_effect,
         constraints_to_ignore=constraints_to_ignore
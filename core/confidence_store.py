@@ -0,0 +1,149 @@
+import os
+import threading
+from typing import Optional, Dict
+
+from db.neo4j_handler import Neo4jHandler
+from .weights import LEARNING_RATE_ETA, _clip_weight
+
+# عدد العدادات الفرعية (stripes): كل عامل يكتب غالباً في عداد مختلف، فتقل المنافسة على الأقفال
+DEFAULT_CONFIDENCE_STRIPES = 16
+DEFAULT_COMPACT_EVERY = 256   # دمج العدادات في المستوى الأساسي تلقائياً كل N تحديث (لكل مخزن)
+CONFIDENCE_NODE_NAME = "System_Confidence"
+
+# زيادة عداد فرعي واحد (قفل الكتابة يُؤخذ على العداد فقط وليس على عقدة SelfAwareness)،
+# ثم قراءة المستوى المُجمّع في نفس الجملة.
+# مساهمة العداد تُقص إلى [-base, 1 - base]: لا يتراكم فيه فائض فوق 1.0 أو تحت 0.0، فالإخفاقات
+# بعد التشبع تظهر فوراً (نفس سلوك القص بعد كل خطوة طالما يكتب عامل واحد في العداد)
+STRIPE_INCREMENT_QUERY = """
+OPTIONAL MATCH (sc:SelfAwareness {name: $name})
+WITH coalesce(sc.current_level, 0.5) AS base
+MERGE (s:ConfidenceStripe {name: $name, stripe: $stripe})
+ON CREATE SET s.delta = 0.0
+SET s._lock = true
+WITH base, s, s.delta + $step AS raw_delta
+SET s.delta = CASE WHEN raw_delta > 1.0 - base THEN 1.0 - base WHEN raw_delta < -base THEN -base ELSE raw_delta END
+REMOVE s._lock
+WITH base
+OPTIONAL MATCH (stripe:ConfidenceStripe {name: $name})
+RETURN base, coalesce(sum(stripe.delta), 0.0) AS delta
+"""
+
+# القراءة: المستوى = المستوى الأساسي + مجموع العدادات الفرعية
+READ_STRIPED_CONFIDENCE_QUERY = """
+OPTIONAL MATCH (sc:SelfAwareness {name: $name})
+OPTIONAL MATCH (stripe:ConfidenceStripe {name: $name})
+RETURN coalesce(sc.current_level, 0.5) AS base, coalesce(sum(stripe.delta), 0.0) AS delta
+"""
+
+# الضغط (compaction): دمج العدادات في المستوى الأساسي وتصفيرها في معاملة واحدة
+COMPACT_CONFIDENCE_QUERY = """
+MERGE (sc:SelfAwareness {name: $name})
+ON CREATE SET sc.current_level = 0.5
+SET sc._lock = true
+WITH sc
+OPTIONAL MATCH (s:ConfidenceStripe {name: $name})
+SET s._lock = true
+WITH sc, collect(s) AS stripes, coalesce(sum(s.delta), 0.0) AS delta
+WITH sc, stripes, sc.current_level + delta AS raw_level
+SET sc.current_level = round(CASE WHEN raw_level > 1.0 THEN 1.0 WHEN raw_level < 0.0 THEN 0.0 ELSE raw_level END, 4)
+REMOVE sc._lock
+FOREACH (s IN stripes | SET s.delta = 0.0 REMOVE s._lock)
+RETURN sc.current_level AS level
+"""
+
+
+class StripedConfidenceStore:
+    """
+    مخزن الثقة الذاتية بعدادات فرعية (striped counters).
+
+    بدلاً من قراءة-تعديل-كتابة على عقدة System_Confidence الوحيدة، يضيف كل تحديث فرقه
+    (eta * success_delta) إلى أحد العدادات الفرعية ConfidenceStripe (حسب العملية والخيط)،
+    والإضافة تبديلية فلا تضيع أي تحديثات. المستوى يُحسب عند القراءة:
+        clip(current_level + مجموع العدادات)
+
+    مساهمة كل عداد تُقص إلى [-base, 1 - base] عند الكتابة، والمجموع يُقص عند القراءة.
+    كل compact_every تحديث يُدمج compact العدادات في المستوى الأساسي تلقائياً، فلا يتراكم
+    فرق بين العدادات المختلفة (عمال يكتبون في اتجاهين متعاكسين) لفترة طويلة.
+    """
+
+    def __init__(
+        self,
+        stripes: int = DEFAULT_CONFIDENCE_STRIPES,
+        name: str = CONFIDENCE_NODE_NAME,
+        compact_every: int = DEFAULT_COMPACT_EVERY
+    ):
+        self.stripes = stripes
+        self.name = name
+        self.compact_every = compact_every
+        self._updates = 0
+        self._updates_lock = threading.Lock()
+
+    def _stripe(self) -> int:
+        return hash((os.getpid(), threading.get_ident())) % self.stripes
+
+    def increment_parameters(self, step: float) -> Dict:
+        """معاملات STRIPE_INCREMENT_QUERY (تُستخدم أيضاً داخل معاملات أخرى مثل الكتابة المؤجلة)."""
+        return {"name": self.name, "stripe": self._stripe(), "step": step}
+
+    def _compaction_due(self) -> bool:
+        with self._updates_lock:
+            self._updates += 1
+            return self.compact_every > 0 and self._updates % self.compact_every == 0
+
+    def update(self, handler: Neo4jHandler, success_delta: float, eta: float = LEARNING_RATE_ETA) -> float:
+        """يضيف فرق الثقة إلى عداد فرعي ويعيد المستوى المُجمّع الجديد."""
+        result = handler.execute_write(STRIPE_INCREMENT_QUERY, self.increment_parameters(eta * success_delta))
+        if self._compaction_due():
+            return self.compact(handler)
+        return self._level(result)
+
+    async def update_async(self, handler, success_delta: float, eta: float = LEARNING_RATE_ETA) -> float:
+        """نفس update عبر AsyncNeo4jHandler (process_and_learn_async)."""
+        result = await handler.execute_write(STRIPE_INCREMENT_QUERY, self.increment_parameters(eta * success_delta))
+        if self._compaction_due():
+            compacted = await handler.execute_write(COMPACT_CONFIDENCE_QUERY, {"name": self.name})
+            return compacted[0]["level"] if compacted else 0.5
+        return self._level(result)
+
+    def read(self, handler: Neo4jHandler) -> float:
+        return self._level(handler.execute_read(READ_STRIPED_CONFIDENCE_QUERY, {"name": self.name}))
+
+    def compact(self, handler: Neo4jHandler) -> float:
+        """يدمج العدادات الفرعية في current_level ويصفّرها، ويعيد المستوى الناتج."""
+        result = handler.execute_write(COMPACT_CONFIDENCE_QUERY, {"name": self.name})
+        return result[0]["level"] if result else 0.5
+
+    @staticmethod
+    def _level(result) -> float:
+        if not result:
+            return 0.5
+        return round(_clip_weight(result[0]["base"] + result[0]["delta"]), 4)
+
+
+# ----------------------------------------------------------------------
+# المخزن النشط (اختياري، معطل افتراضياً)
+# ----------------------------------------------------------------------
+
+_active_store: Optional[StripedConfidenceStore] = None
+
+
+def enable_striped_confidence(
+    stripes: int = DEFAULT_CONFIDENCE_STRIPES,
+    compact_every: int = DEFAULT_COMPACT_EVERY
+) -> StripedConfidenceStore:
+    """
+    يجعل process_and_learn و process_and_learn_async والكتابة المؤجلة تحدّث الثقة الذاتية
+    عبر العدادات الفرعية.
+    """
+    global _active_store
+    _active_store = StripedConfidenceStore(stripes, compact_every=compact_every)
+    return _active_store
+
+
+def disable_striped_confidence():
+    global _active_store
+    _active_store = None
+
+
+def get_confidence_store() -> Optional[StripedConfidenceStore]:
+    return _active_store
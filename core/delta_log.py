@@ -0,0 +1,260 @@
+import json
+import os
+import threading
+import time
+from typing import Optional, List, Dict
+
+from . import graph_events
+from .graph_engine import InMemoryCausalGraph
+
+# ملف سجل التغييرات الافتراضي (مشترك بين عمليات الكتابة وعمليات القراءة على نفس الجهاز)
+DEFAULT_DELTA_LOG_PATH = "causal_delta.log"
+
+# أقصى تأخر (بالثواني) مسموح به للنسخة المحلية قبل قراءة السجل من جديد
+DEFAULT_MAX_LAG = 1.0
+
+# تدوير السجل: عند تجاوز الحجم يُنقل الملف إلى <path>.1 (نسخة واحدة سابقة) ويبدأ ملف جديد
+DEFAULT_MAX_LOG_BYTES = 64 * 1024 * 1024
+ROTATED_SUFFIX = ".1"
+
+
+class DeltaLogWriter:
+    """
+    سجل تغييرات إلحاقي (append-only) لروابط CAUSES بصيغة JSON Lines.
+
+    يشترك في graph_events، فكل ما تصدره weights.py و causal_ops.py (روابط جديدة، تحديث أوزان،
+    إعادة تحميل) يُكتب سطراً واحداً. الفتح بـ O_APPEND والكتابة باستدعاء write واحد لكل سطر
+    يسمحان لعدة عمليات بالكتابة في نفس الملف دون تداخل الأسطر.
+
+    الأوزان في السجل قيم مطلقة (وليست فروقات)، لذا إعادة تطبيق نفس السطر لا تغير النتيجة.
+
+    عند تجاوز max_bytes يُدوّر السجل: الملف الحالي يصبح <path>.1 (يستبدل السابق) ويبدأ ملف جديد.
+    الكاتبون الآخرون يلاحظون تغير الملف قبل كتابتهم التالية فيعيدون فتحه، والنسخ المحلية تكمل
+    قراءة <path>.1 من موضعها ثم تنتقل إلى الملف الجديد. max_bytes=None يعطّل التدوير.
+    """
+
+    def __init__(self, path: str = DEFAULT_DELTA_LOG_PATH, max_bytes: Optional[int] = DEFAULT_MAX_LOG_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.entries_written = 0
+        self.rotations = 0
+        self._lock = threading.Lock()
+        self._fd = self._open()
+
+    def _open(self) -> int:
+        return os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _reopen_if_rotated(self):
+        """عملية أخرى دوّرت السجل: الواصف الحالي يشير إلى <path>.1، فنفتح الملف الجديد."""
+        try:
+            current = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            current = None
+        if current != os.fstat(self._fd).st_ino:
+            os.close(self._fd)
+            self._fd = self._open()
+
+    def _rotate(self):
+        # لا ندوّر ملفاً دوّرته عملية أخرى للتو (وإلا يُستبدل <path>.1 بملف شبه فارغ)
+        if os.stat(self.path).st_ino == os.fstat(self._fd).st_ino:
+            os.replace(self.path, self.path + ROTATED_SUFFIX)
+            self.rotations += 1
+        os.close(self._fd)
+        self._fd = self._open()
+
+    def append(self, event: str, edges: List[Dict]):
+        line = json.dumps(
+            {"ts": time.time(), "pid": os.getpid(), "event": event, "edges": edges},
+            ensure_ascii=False
+        ) + "\n"
+        with self._lock:
+            self._reopen_if_rotated()
+            os.write(self._fd, line.encode("utf-8"))
+            self.entries_written += 1
+            if self.max_bytes is not None and os.fstat(self._fd).st_size >= self.max_bytes:
+                self._rotate()
+
+    def __call__(self, event: str, edges: List[Dict]):
+        """مستمع graph_events."""
+        self.append(event, [{"start": e['start'], "end": e['end'], "weight": e['weight']} for e in edges])
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+class DeltaLogReplica:
+    """
+    نسخة محلية من رسم CAUSES تتابع سجل التغييرات (tail) داخل كل عملية عاملة (worker).
+
+    عند الإنشاء يُحفظ موضع نهاية السجل أولاً ثم يُحمّل الرسم من Neo4j، فأي تغيير يحدث أثناء
+    التحميل يُعاد تطبيقه من السجل (وهذا آمن لأن الأوزان مطلقة).
+
+    الخاصية graph تعيد InMemoryCausalGraph بعد قراءة الأسطر الجديدة إذا مر أكثر من max_lag
+    ثانية على آخر قراءة، ويمكن تمريرها مكان handler إلى verify_causal_path و find_innovative_path
+    (أو كـ read_handler إلى process_and_learn)، فتُخدم القراءات محلياً وتبقى الكتابة فقط على Neo4j.
+
+    الأسطر الجديدة تُطبق على نسخة من الرسم ثم يُستبدل المرجع، فالخيوط التي تقرأ الرسم السابق
+    لا ترى مصفوفات في منتصف التعديل. الأسطر التالفة تُتجاوز وتُعد (entries_skipped).
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DELTA_LOG_PATH,
+        handler=None,
+        graph: Optional[InMemoryCausalGraph] = None,
+        max_lag: float = DEFAULT_MAX_LAG
+    ):
+        self.path = path
+        self.max_lag = max_lag
+        self.entries_applied = 0
+        self.entries_skipped = 0
+        self.last_entry_ts: Optional[float] = None
+
+        self._handler = handler
+        # نسخة الرسم التي تُطبق عليها أسطر القراءة الحالية قبل نشرها (انظر poll)
+        self._working: Optional[InMemoryCausalGraph] = None
+        self._inode, self._offset = self._log_stat()
+        self._last_poll = time.monotonic()
+        self._lock = threading.Lock()
+
+        if graph is not None:
+            self._graph = graph
+        elif handler is not None:
+            self._graph = InMemoryCausalGraph.from_handler(handler)
+        else:
+            # بدون handler نبدأ من رسم فارغ ونبني كل شيء من بداية السجل
+            self._graph = InMemoryCausalGraph()
+            self._offset = 0
+
+    def _log_stat(self, path: Optional[str] = None):
+        try:
+            stat = os.stat(path or self.path)
+            return stat.st_ino, stat.st_size
+        except FileNotFoundError:
+            return None, 0
+
+    @property
+    def graph(self) -> InMemoryCausalGraph:
+        if time.monotonic() - self._last_poll >= self.max_lag:
+            self.poll()
+        return self._graph
+
+    def poll(self) -> int:
+        """يقرأ الأسطر المكتملة الجديدة ويطبقها على الرسم المحلي، ويعيد عدد الأسطر المطبقة."""
+        with self._lock:
+            self._last_poll = time.monotonic()
+            self._working = None
+            applied = 0
+
+            inode, size = self._log_stat()
+            if self._inode is not None and inode != self._inode:
+                # تم تدوير السجل: نكمل الملف السابق (<path>.1) من موضعنا ثم نبدأ الملف الجديد
+                rotated_path = self.path + ROTATED_SUFFIX
+                rotated_inode, rotated_size = self._log_stat(rotated_path)
+                if rotated_inode == self._inode:
+                    applied += self._read_lines(rotated_path, rotated_size)
+                else:
+                    # فاتنا أكثر من تدوير: لا يمكن إكمال السجل، نعيد البناء من Neo4j
+                    self._reload()
+                self._offset = 0
+            elif size < self._offset:
+                # تم اقتطاع السجل: نعيد البناء من Neo4j ومن بداية الملف
+                self._reload()
+                self._offset = 0
+            self._inode = inode
+
+            if size > self._offset:
+                applied += self._read_lines(self.path, size)
+
+            if self._working is not None:
+                # البناء يتم قبل النشر: القراء يرون الرسم القديم كاملاً أو الجديد كاملاً
+                self._working._ensure_built()
+                self._graph = self._working
+            self.entries_applied += applied
+            return applied
+
+    def _read_lines(self, path: str, size: int) -> int:
+        with open(path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+
+        # السطر الأخير قد يكون قيد الكتابة: نتوقف عند آخر سطر مكتمل
+        complete = chunk.rfind(b"\n") + 1
+        applied = 0
+        for line in chunk[:complete].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                self._apply(entry)
+                applied += 1
+            except (ValueError, KeyError, TypeError) as e:
+                # سطر تالف لا يوقف التتبع (وإلا يُعاد قراءته والفشل عليه في كل مرة)
+                self.entries_skipped += 1
+                print(f"تم تجاوز سطر تالف في سجل التغييرات {path}: {e}")
+
+        self._offset += complete
+        return applied
+
+    def _writable_graph(self) -> InMemoryCausalGraph:
+        if self._working is None:
+            self._working = self._graph.copy()
+        return self._working
+
+    def _apply(self, entry: Dict):
+        event = entry['event']
+        if event == graph_events.GRAPH_RELOADED:
+            self._reload()
+        else:
+            graph = self._writable_graph()
+            for edge in entry['edges']:
+                # MERGE ... ON CREATE لا يغير وزن رابط موجود مسبقاً
+                if event == graph_events.EDGES_CREATED and graph.get_weight(edge['start'], edge['end']) is not None:
+                    continue
+                graph.set_weight(edge['start'], edge['end'], float(edge['weight']))
+        self.last_entry_ts = entry.get('ts', self.last_entry_ts)
+
+    def _reload(self):
+        if self._handler is not None:
+            self._working = InMemoryCausalGraph.from_handler(self._handler)
+
+    def stats(self) -> Dict:
+        return {
+            "entries_applied": self.entries_applied,
+            "entries_skipped": self.entries_skipped,
+            "offset": self._offset,
+            "nodes": self._graph.node_count,
+            "edges": self._graph.edge_count,
+            "seconds_since_poll": time.monotonic() - self._last_poll,
+        }
+
+
+# ----------------------------------------------------------------------
+# السجل النشط في عملية الكتابة (اختياري، معطل افتراضياً)
+# ----------------------------------------------------------------------
+
+_active_writer: Optional[DeltaLogWriter] = None
+
+
+def enable_delta_log(path: str = DEFAULT_DELTA_LOG_PATH, max_bytes: Optional[int] = DEFAULT_MAX_LOG_BYTES) -> DeltaLogWriter:
+    """يبدأ كتابة كل تغييرات الرسم في سجل التغييرات."""
+    global _active_writer
+    disable_delta_log()
+    _active_writer = DeltaLogWriter(path, max_bytes)
+    graph_events.subscribe(_active_writer)
+    return _active_writer
+
+
+def disable_delta_log():
+    global _active_writer
+    if _active_writer is not None:
+        graph_events.unsubscribe(_active_writer)
+        _active_writer.close()
+        _active_writer = None
+
+
+def get_delta_log() -> Optional[DeltaLogWriter]:
+    return _active_writer
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+from typing import Optional, Iterable, Iterator, AsyncIterable, Dict
+
+from db.neo4j_handler import Neo4jHandler
+from .verify_causal import verify_causal_path, TRUST_THRESHOLD, MAX_PATH_LENGTH
+from .weights import LEARNING_RATE_ETA, update_causal_weights_relative
+from .write_behind import get_learning_buffer
+
+# أقصى عدد من أحداث التغذية الراجعة المعلقة في الذاكرة (بعده يتوقف المُنتِج = backpressure)
+DEFAULT_FEEDBACK_QUEUE_SIZE = 1000
+
+# الفاصل الزمني لقراءة الأسطر الجديدة عند متابعة ملف JSONL (follow)
+DEFAULT_FOLLOW_INTERVAL = 0.5
+
+_STOP = object()
+
+
+def read_feedback_jsonl(
+    path: str,
+    follow: bool = False,
+    poll_interval: float = DEFAULT_FOLLOW_INTERVAL,
+    stop_event: Optional[threading.Event] = None
+) -> Iterator[Dict]:
+    """
+    مولّد يقرأ أحداث التغذية الراجعة من ملف JSON Lines سطراً سطراً (ذاكرة ثابتة مهما كان حجم الملف).
+
+    كل حدث: {"cause": ..., "effect": ..., "success_delta": ...}
+    أو بمسار جاهز: {"path_details": [...], "success_delta": ...}.
+    مع follow=True يستمر في انتظار الأسطر الجديدة (مثل tail -f) حتى يتم ضبط stop_event.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        pending = ""
+        while True:
+            line = f.readline()
+            if not line:
+                if not follow or (stop_event is not None and stop_event.is_set()):
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            # سطر غير مكتمل (ما زال قيد الكتابة): ننتظر بقيته
+            pending += line
+            if not pending.endswith("\n") and follow:
+                continue
+            line, pending = pending.strip(), ""
+            if not line:
+                continue
+
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"تم تجاهل سطر تغذية راجعة غير صالح: {e}")
+
+
+class FeedbackConsumer:
+    """
+    مرحلة استهلاك التغذية الراجعة في الخلفية.
+
+    المُنتِجون (خادم الطلبات، قارئ JSONL، مهام asyncio) يضعون الأحداث في طابور محدود الحجم؛
+    خيط خلفي يحوّل كل حدث إلى مسار عبر verify_causal_path ثم يطبق تحديث الأوزان كفروقات نسبية
+    بمعدل التعلم eta (عبر الكتابة المؤجلة إن كانت مفعّلة، وإلا بتحديث نسبي واحد لكل حدث).
+    امتلاء الطابور يوقف المُنتِج (backpressure) فيبقى استهلاك الذاكرة محدوداً.
+    """
+
+    def __init__(
+        self,
+        handler: Neo4jHandler,
+        read_handler=None,
+        maxsize: int = DEFAULT_FEEDBACK_QUEUE_SIZE,
+        eta: float = LEARNING_RATE_ETA,
+        threshold: float = TRUST_THRESHOLD,
+        max_length: int = MAX_PATH_LENGTH
+    ):
+        self.handler = handler
+        self.read_handler = read_handler if read_handler is not None else handler
+        self.eta = eta
+        self.threshold = threshold
+        self.max_length = max_length
+        self.stats = {"received": 0, "applied": 0, "unresolved": 0, "errors": 0}
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name="feedback-consumer", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # الإنتاج
+    # ------------------------------------------------------------------
+
+    def submit(self, event: Dict, block: bool = True, timeout: Optional[float] = None) -> bool:
+        """يضيف حدثاً إلى الطابور؛ يعيد False إذا كان ممتلئاً (مع block=False أو انتهاء timeout)."""
+        try:
+            self._queue.put(event, block=block, timeout=timeout)
+        except queue.Full:
+            return False
+        self.stats["received"] += 1
+        return True
+
+    def consume(self, events: Iterable[Dict]) -> int:
+        """يستهلك مولّداً (مثل read_feedback_jsonl)؛ يتوقف مؤقتاً كلما امتلأ الطابور."""
+        count = 0
+        for event in events:
+            self.submit(event)
+            count += 1
+        return count
+
+    async def submit_async(self, event: Dict):
+        """نسخة asyncio: الانتظار عند امتلاء الطابور يتم في خيط منفصل فلا تتوقف حلقة الأحداث."""
+        await asyncio.get_running_loop().run_in_executor(None, self.submit, event)
+
+    async def consume_async(self, events: AsyncIterable[Dict]) -> int:
+        count = 0
+        async for event in events:
+            await self.submit_async(event)
+            count += 1
+        return count
+
+    # ------------------------------------------------------------------
+    # الاستهلاك
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            try:
+                if event is _STOP:
+                    return
+                self._apply(event)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"فشل تطبيق حدث تغذية راجعة: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _apply(self, event: Dict):
+        success_delta = float(event.get('success_delta', 0.0))
+        path_details = event.get('path_details')
+
+        if path_details is None:
+            verified_path = verify_causal_path(
+                self.read_handler, event['cause'], event['effect'], self.threshold, self.max_length
+            )
+            if not verified_path:
+                self.stats["unresolved"] += 1
+                return
+            path_details = verified_path['path_details']
+
+        # المسار قد يأتي من نسخة قراءة متأخرة (أو من الحدث نفسه)، لذا يُكتب الفرق نسبياً إلى الوزن
+        # الحالي في Neo4j؛ الكتابة المطلقة تمحو تحديثات الأحداث الأخرى على نفس الرابط خلال التأخر
+        learning_buffer = get_learning_buffer()
+        if learning_buffer is not None:
+            learning_buffer.add_edge_feedback(path_details, success_delta, eta=self.eta)
+        else:
+            update_causal_weights_relative(self.handler, path_details, success_delta, self.eta)
+        self.stats["applied"] += 1
+
+    def join(self):
+        """ينتظر حتى تتم معالجة كل الأحداث الموجودة في الطابور."""
+        self._queue.join()
+
+    def close(self):
+        """يعالج ما تبقى في الطابور ثم يوقف الخيط الخلفي."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+
+def apply_feedback_file(handler: Neo4jHandler, path: str, read_handler=None, maxsize: int = DEFAULT_FEEDBACK_QUEUE_SIZE) -> Dict:
+    """نقطة الدخول: تطبيق ملف تغذية راجعة كامل عبر FeedbackConsumer (ذاكرة محدودة)."""
+    consumer = FeedbackConsumer(handler, read_handler=read_handler, maxsize=maxsize)
+    consumer.consume(read_feedback_jsonl(path))
+    consumer.close()
+    print(f"تغذية راجعة: {consumer.stats}")
+    return consumer.stats
@@ -0,0 +1,472 @@
+import heapq
+import itertools
+from typing import Optional, List, Dict, Iterable, Tuple, Set
+
+import numpy as np
+
+from db.neo4j_handler import Neo4jHandler
+
+# استعلام تحميل كل روابط CAUSES من الذاكرة Z إلى الذاكرة المحلية
+LOAD_CAUSAL_EDGES_QUERY = """
+MATCH (cause)-[r:CAUSES]->(effect)
+RETURN cause.name AS start, effect.name AS end, r.weight AS weight
+"""
+
+
+class InMemoryCausalGraph:
+    """
+    نسخة محلية (in-process) من رسم CAUSES البياني بتمثيل CSR مضغوط.
+
+    - العقد مُرمّزة بأعداد صحيحة (node_ids) مع جدول أسماء (names).
+    - الروابط مخزنة في مصفوفات NumPy: indptr / indices / weights (أمامي)
+      و rev_indptr / rev_indices / rev_edges (عكسي، يشير إلى نفس مصفوفة الأوزان).
+
+    يمكن تمرير الكائن مكان handler إلى verify_causal_path ليتم الإجابة محلياً
+    بخوارزمية Dijkstra لأقصى حاصل ضرب (أي أقصر مسار على -log(weight)).
+    """
+
+    def __init__(self, edges: Iterable[Tuple[str, str, float]] = ()):
+        self.names: List[str] = []
+        self.node_ids: Dict[str, int] = {}
+        # قاموس الروابط هو مصدر الحقيقة عند التعديل؛ في الرسم المحمّل من لقطة (from_csr)
+        # يبقى None ولا يُبنى إلا عند أول تعديل
+        self._edge_weights: Optional[Dict[Tuple[int, int], float]] = {}
+        self._dirty = True
+
+        for start, end, weight in edges:
+            # الروابط المتوازية بين نفس العقدتين تُدمج (نحتفظ بأقوى وزن)
+            key = (self._intern(start), self._intern(end))
+            self._edge_weights[key] = max(float(weight), self._edge_weights.get(key, float("-inf")))
+
+        self._build()
+
+    # ------------------------------------------------------------------
+    # البناء والتحديث
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_handler(cls, handler: Neo4jHandler) -> "InMemoryCausalGraph":
+        """
+        يحمّل كل روابط CAUSES من Neo4j في استعلام قراءة واحد. مع Neo4jHandler تُقرأ الروابط
+        كتدفق من القيم (stream_query) فلا تُنشأ قائمة كائنات Record لكل الرسم.
+        """
+        if isinstance(handler, Neo4jHandler):
+            return cls(handler.stream_query(LOAD_CAUSAL_EDGES_QUERY, projection="tuple"))
+        records = handler.execute_read(LOAD_CAUSAL_EDGES_QUERY)
+        return cls((r['start'], r['end'], r['weight']) for r in records)
+
+    @classmethod
+    def from_csr(
+        cls,
+        names: List[str],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        weights: np.ndarray,
+        rev_indptr: Optional[np.ndarray] = None,
+        rev_indices: Optional[np.ndarray] = None,
+        rev_edges: Optional[np.ndarray] = None
+    ) -> "InMemoryCausalGraph":
+        """
+        يبني الرسم مباشرة من مصفوفات CSR جاهزة (مثل لقطة محمّلة بـ memmap) دون نسخها.
+        يجب أن تكون الأهداف داخل كل صف مرتبة تصاعدياً (كما ينتجها _build).
+        """
+        graph = cls.__new__(cls)
+        graph.names = list(names)
+        graph.node_ids = {name: i for i, name in enumerate(graph.names)}
+        graph._edge_weights = None
+        graph.indptr, graph.indices, graph.weights = indptr, indices, weights
+
+        if rev_indptr is None or rev_indices is None or rev_edges is None:
+            forward_sources = np.repeat(np.arange(len(graph.names), dtype=np.int64), np.diff(indptr))
+            rev_edges = np.argsort(indices, kind="stable")
+            rev_indices = forward_sources[rev_edges]
+            rev_indptr = np.zeros(len(graph.names) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(indices, minlength=len(graph.names)), out=rev_indptr[1:])
+        graph.rev_indptr, graph.rev_indices, graph.rev_edges = rev_indptr, rev_indices, rev_edges
+
+        graph._dirty = False
+        return graph
+
+    def copy(self) -> "InMemoryCausalGraph":
+        """
+        نسخة مستقلة تماماً (المصفوفات والقواميس): تُعدّل النسخة ثم يُستبدل المرجع، فلا يرى
+        القراء الذين يستخدمون الرسم الأصلي مصفوفات في منتصف إعادة البناء.
+        """
+        graph = InMemoryCausalGraph.__new__(InMemoryCausalGraph)
+        graph.names = list(self.names)
+        graph.node_ids = dict(self.node_ids)
+        graph._edge_weights = dict(self._edge_weights) if self._edge_weights is not None else None
+        for attr in ("indptr", "indices", "weights", "rev_indptr", "rev_indices", "rev_edges"):
+            setattr(graph, attr, np.array(getattr(self, attr)))
+        graph._dirty = self._dirty
+        return graph
+
+    def _ensure_edge_maps(self):
+        """يبني قاموس الروابط من مصفوفات CSR (مرة واحدة) قبل أول تعديل على رسم محمّل من لقطة."""
+        if self._edge_weights is None:
+            # indptr يغطي العقد الموجودة عند بناء المصفوفات فقط (قد تكون أسماء جديدة أضيفت بعدها)
+            sources = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int64), np.diff(self.indptr))
+            self._edge_weights = dict(zip(zip(sources.tolist(), self.indices.tolist()), self.weights.tolist()))
+
+    def _edge_position(self, start_id: int, end_id: int) -> Optional[int]:
+        """موقع الرابط في مصفوفة الأوزان (بحث ثنائي داخل صف العقدة المرتب)."""
+        lo, hi = int(self.indptr[start_id]), int(self.indptr[start_id + 1])
+        position = lo + int(np.searchsorted(self.indices[lo:hi], end_id))
+        if position < hi and self.indices[position] == end_id:
+            return position
+        return None
+
+    def _intern(self, name: str) -> int:
+        node_id = self.node_ids.get(name)
+        if node_id is None:
+            # بعد هذه الإضافة لن يُبنى الرسم إلا من قاموس الروابط
+            self._ensure_edge_maps()
+            node_id = len(self.names)
+            self.node_ids[name] = node_id
+            self.names.append(name)
+            # مصفوفات indptr لا تغطي العقدة الجديدة بعد
+            self._dirty = True
+        return node_id
+
+    def set_weight(self, start: str, end: str, weight: float):
+        """يحدّث وزن رابط موجود في مكانه، أو يضيف الرابط إذا لم يكن موجوداً."""
+        self._ensure_edge_maps()
+        key = (self._intern(start), self._intern(end))
+        weight = float(weight)
+
+        if not self._dirty:
+            position = self._edge_position(*key)
+            if position is not None:
+                self.weights[position] = weight
+                self._edge_weights[key] = weight
+                return
+
+        # رابط جديد: يُعاد بناء مصفوفات CSR بشكل كسول عند الاستعلام التالي
+        self._edge_weights[key] = weight
+        self._dirty = True
+
+    def get_weight(self, start: str, end: str) -> Optional[float]:
+        key = (self.node_ids.get(start), self.node_ids.get(end))
+        if self._edge_weights is not None:
+            return self._edge_weights.get(key)
+        if None in key:
+            return None
+        position = self._edge_position(*key)
+        return float(self.weights[position]) if position is not None else None
+
+    def _build(self):
+        """يعيد بناء مصفوفات CSR (الأمامية والعكسية) من قاموس الروابط."""
+        self._ensure_edge_maps()
+        n_nodes = len(self.names)
+        n_edges = len(self._edge_weights)
+
+        sources = np.fromiter((k[0] for k in self._edge_weights), dtype=np.int64, count=n_edges)
+        targets = np.fromiter((k[1] for k in self._edge_weights), dtype=np.int64, count=n_edges)
+        weights = np.fromiter(self._edge_weights.values(), dtype=np.float64, count=n_edges)
+
+        # ترتيب حسب المصدر ثم الهدف: الأهداف داخل كل صف مرتبة (للبحث الثنائي في _edge_position)
+        order = np.lexsort((targets, sources))
+        self.indices = targets[order]
+        self.weights = weights[order]
+        self.indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n_nodes), out=self.indptr[1:])
+
+        forward_sources = sources[order]
+        rev_order = np.argsort(self.indices, kind="stable")
+        self.rev_indices = forward_sources[rev_order]
+        self.rev_edges = rev_order
+        self.rev_indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=n_nodes), out=self.rev_indptr[1:])
+        self._dirty = False
+
+    def _ensure_built(self):
+        if self._dirty:
+            self._build()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        if self._edge_weights is None:
+            return len(self.indices)
+        return len(self._edge_weights)
+
+    def successors(self, node_id: int) -> Tuple[List[int], List[float]]:
+        self._ensure_built()
+        lo, hi = self.indptr[node_id], self.indptr[node_id + 1]
+        return self.indices[lo:hi].tolist(), self.weights[lo:hi].tolist()
+
+    def predecessors(self, node_id: int) -> Tuple[List[int], List[float]]:
+        self._ensure_built()
+        lo, hi = self.rev_indptr[node_id], self.rev_indptr[node_id + 1]
+        edges = self.rev_edges[lo:hi]
+        return self.rev_indices[lo:hi].tolist(), self.weights[edges].tolist()
+
+    # ------------------------------------------------------------------
+    # البحث عن أقوى مسار
+    # ------------------------------------------------------------------
+
+    def _format_path(self, node_path: List[int], path_weight: float) -> Dict:
+        """يحوّل تسلسل العقد إلى نفس بنية نتيجة استعلام Cypher."""
+        path_details = [
+            {
+                "start": self.names[a],
+                "end": self.names[b],
+                "weight": float(self.weights[self._edge_position(a, b)]),
+            }
+            for a, b in zip(node_path, node_path[1:])
+        ]
+        return {
+            "path_weight": path_weight,
+            "path_details": path_details,
+            "path_length": len(path_details),
+        }
+
+    def strongest_path(
+        self,
+        cause_name: str,
+        effect_name: str,
+        threshold: float,
+        max_length: int,
+        excluded_nodes: Optional[Set[str]] = None
+    ) -> Optional[Dict]:
+        """
+        أقوى مسار (أكبر حاصل ضرب للأوزان) بطول لا يتجاوز max_length وكل روابطه >= threshold.
+
+        بما أن الأوزان ضمن [0, 1] فإن حاصل الضرب لا يزداد مع إطالة المسار، لذا يكفي
+        Dijkstra على الحالات (عقدة، عدد القفزات) مع ترتيب تنازلي لحاصل الضرب
+        (وهو مكافئ لأقصر مسار على -log(weight)).
+        """
+        self._ensure_built()
+
+        start = self.node_ids.get(cause_name)
+        target = self.node_ids.get(effect_name)
+        if start is None or target is None:
+            return None
+
+        excluded = {self.node_ids[n] for n in (excluded_nodes or ()) if n in self.node_ids}
+        if start in excluded or target in excluded:
+            return None
+
+        found = self._search_strongest(start, target, threshold, max_length, excluded)
+        if found is None:
+            return None
+        return self._format_path(found[1], found[0])
+
+    def _search_strongest(
+        self,
+        start: int,
+        target: int,
+        threshold: float,
+        max_length: int,
+        excluded: Set[int],
+        excluded_edges: Set[Tuple[int, int]] = frozenset(),
+        min_weight: float = 0.0
+    ) -> Optional[Tuple[float, List[int]]]:
+        """
+        نواة Dijkstra المحدود بعدد القفزات: يعيد (حاصل الضرب، تسلسل العقد) أو None.
+
+        excluded_edges و min_weight تستخدمهما خوارزمية Yen: الأولى لحذف روابط المسارات المقبولة،
+        والثانية لإيقاف البحث فور نزول أفضل حالة في الكومة تحت حد القطع.
+        """
+        counter = itertools.count()
+        # (-حاصل الضرب، ترتيب الإدخال، العقدة، القفزات، سلسلة المسار المرتبطة)
+        heap = [(-1.0, next(counter), start, 0, (start, None))]
+        settled_hops: Dict[int, int] = {}
+
+        while heap:
+            neg_weight, _, node, hops, chain = heapq.heappop(heap)
+
+            # الكومة مرتبة تنازلياً: كل ما تبقى أضعف من حد القطع
+            if -neg_weight < min_weight:
+                return None
+
+            if node == target and hops > 0:
+                node_path = []
+                while chain is not None:
+                    node_path.append(chain[0])
+                    chain = chain[1]
+                return -neg_weight, node_path[::-1]
+
+            # أي حالة لاحقة لنفس العقدة بقفزات أكثر وحاصل ضرب أقل هي حالة مُهيمَن عليها
+            if hops >= settled_hops.get(node, max_length + 1):
+                continue
+            settled_hops[node] = hops
+
+            if hops == max_length:
+                continue
+
+            neighbors, weights = self.successors(node)
+            for neighbor, weight in zip(neighbors, weights):
+                if weight < threshold or neighbor in excluded or (node, neighbor) in excluded_edges:
+                    continue
+                heapq.heappush(heap, (neg_weight * weight, next(counter), neighbor, hops + 1, (neighbor, chain)))
+
+        return None
+
+    # ------------------------------------------------------------------
+    # أقوى k مسارات (خوارزمية Yen)
+    # ------------------------------------------------------------------
+
+    def top_k_paths(
+        self,
+        cause_name: str,
+        effect_name: str,
+        k: int,
+        threshold: float,
+        max_length: int,
+        excluded_nodes: Optional[Set[str]] = None
+    ) -> List[Dict]:
+        """
+        أقوى k مسارات بسيطة (بدون تكرار عقد) مرتبة تنازلياً حسب حاصل الضرب.
+
+        خوارزمية Yen على -log(weight): كل مسار جديد = جذر من مسار مقبول + مسار فرعي
+        (spur) يُحسب بنفس Dijkstra بعد حذف روابط المسارات المقبولة التي تشترك في نفس الجذر.
+        عندما يتوفر k مرشح، يصبح وزن المرشح رقم k حد قطع: أي بحث فرعي لا يمكنه تجاوزه
+        (جذر × أفضل استمرار < الحد) يتوقف مبكراً.
+        """
+        self._ensure_built()
+
+        start = self.node_ids.get(cause_name)
+        target = self.node_ids.get(effect_name)
+        if k <= 0 or start is None or target is None:
+            return []
+
+        excluded = {self.node_ids[n] for n in (excluded_nodes or ()) if n in self.node_ids}
+        if start in excluded or target in excluded:
+            return []
+
+        first = self._search_strongest(start, target, threshold, max_length, excluded)
+        if first is None:
+            return []
+
+        accepted: List[Tuple[float, List[int]]] = [first]
+        candidates: List[Tuple[float, int, List[int]]] = []
+        seen = {tuple(first[1])}
+        counter = itertools.count()
+
+        while len(accepted) < k:
+            _, previous = accepted[-1]
+
+            root_weight = 1.0
+            for i in range(len(previous) - 1):
+                spur = previous[i]
+                root = previous[:i + 1]
+                if i > 0:
+                    root_weight *= float(self.weights[self._edge_position(previous[i - 1], spur)])
+
+                removed_edges = {(path[i], path[i + 1]) for _, path in accepted
+                                 if len(path) > i + 1 and path[:i + 1] == root}
+
+                # حد القطع: وزن المرشح رقم k بين المقبولة والمرشحة حتى الآن
+                known = [w for w, _ in accepted] + [-c[0] for c in candidates]
+                cutoff = sorted(known, reverse=True)[k - 1] if len(known) >= k else 0.0
+                if root_weight < cutoff:
+                    continue
+
+                found = self._search_strongest(
+                    spur, target, threshold, max_length - i,
+                    excluded | set(root[:-1]), removed_edges,
+                    cutoff / root_weight if root_weight > 0.0 else 0.0
+                )
+                if found is None:
+                    continue
+
+                path = root[:-1] + found[1]
+                if tuple(path) in seen:
+                    continue
+                seen.add(tuple(path))
+                heapq.heappush(candidates, (-(root_weight * found[0]), next(counter), path))
+
+            if not candidates:
+                break
+
+            # لا حاجة للاحتفاظ بأكثر من المرشحين الذين قد يدخلون ضمن أفضل k
+            candidates = heapq.nsmallest(k - len(accepted), candidates)
+            neg_weight, _, path = heapq.heappop(candidates)
+            accepted.append((-neg_weight, path))
+
+        return [self._format_path(path, weight) for weight, path in accepted]
+
+    # ------------------------------------------------------------------
+    # البحث الابتكاري ثنائي الاتجاه (Bidirectional BFS)
+    # ------------------------------------------------------------------
+
+    def shortest_innovative_path(
+        self,
+        start_entity: str,
+        target_goal: str,
+        min_weight: float,
+        max_length: int,
+        excluded_nodes: Optional[Set[str]] = None
+    ) -> Optional[Dict]:
+        """
+        أقصر مسار (بعدد القفزات) بين start_entity و target_goal، ثم الأقوى وزناً بين المسارات
+        الأقصر، مع تجاهل العقد المستبعدة والروابط الأضعف من min_weight.
+
+        يتم التوسع طبقةً طبقة من الطرفين معاً (نبدأ دائماً بالجبهة الأصغر) ويتوقف البحث
+        فور التقاء الجبهتين، فيصبح عدد العقد الموسَّعة تقريباً O(b^(d/2)) بدلاً من O(b^d).
+        """
+        self._ensure_built()
+
+        start = self.node_ids.get(start_entity)
+        target = self.node_ids.get(target_goal)
+        if start is None or target is None or start == target:
+            return None
+
+        excluded = {self.node_ids[n] for n in (excluded_nodes or ()) if n in self.node_ids}
+        if start in excluded or target in excluded:
+            return None
+
+        # لكل عقدة: (أفضل حاصل ضرب عبر المسارات الأقصر، العقدة السابقة/التالية في ذلك المسار)
+        forward = {start: (1.0, None)}
+        backward = {target: (1.0, None)}
+        forward_frontier, backward_frontier = [start], [target]
+        depth = 0
+
+        while forward_frontier and backward_frontier and depth < max_length:
+            expand_forward = len(forward_frontier) <= len(backward_frontier)
+            if expand_forward:
+                visited, other, frontier, neighbors_of = forward, backward, forward_frontier, self.successors
+            else:
+                visited, other, frontier, neighbors_of = backward, forward, backward_frontier, self.predecessors
+
+            next_layer: Dict[int, Tuple[float, int]] = {}
+            for node in frontier:
+                node_weight = visited[node][0]
+                neighbors, weights = neighbors_of(node)
+                for neighbor, weight in zip(neighbors, weights):
+                    if weight < min_weight or neighbor in excluded or neighbor in visited:
+                        continue
+                    candidate = node_weight * weight
+                    if neighbor not in next_layer or candidate > next_layer[neighbor][0]:
+                        next_layer[neighbor] = (candidate, node)
+
+            visited.update(next_layer)
+            depth += 1
+            if expand_forward:
+                forward_frontier = list(next_layer)
+            else:
+                backward_frontier = list(next_layer)
+
+            # كل المسارات الأقصر تمر بعقدة من هذه الطبقة موجودة في الجبهة المقابلة
+            meeting = [n for n in next_layer if n in other]
+            if meeting:
+                best = max(meeting, key=lambda n: forward[n][0] * backward[n][0])
+                return self._format_path(
+                    self._unwind(forward, best)[::-1] + self._unwind(backward, best)[1:],
+                    forward[best][0] * backward[best][0]
+                )
+
+        return None
+
+    @staticmethod
+    def _unwind(visited: Dict[int, Tuple[float, Optional[int]]], node: int) -> List[int]:
+        """يتتبع مؤشرات الآباء من العقدة حتى جذر البحث."""
+        chain = []
+        while node is not None:
+            chain.append(node)
+            node = visited[node][1]
+        return chain
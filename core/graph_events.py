@@ -0,0 +1,39 @@
+from typing import Callable, List, Dict
+
+# أنواع أحداث التغيير في الذاكرة Z
+EDGES_CREATED = "edges_created"    # روابط CAUSES جديدة (create_causal_link / الإدخال المجمّع)
+EDGES_UPDATED = "edges_updated"    # تحديث أوزان روابط موجودة (update_causal_weight)
+GRAPH_RELOADED = "graph_reloaded"  # إعادة تحميل واسعة (مثل تحميل seed_knowledge.cypher)
+
+# المستمع: دالة تستقبل (نوع الحدث، قائمة الروابط {start, end, weight})
+GraphListener = Callable[[str, List[Dict]], None]
+
+_listeners: List[GraphListener] = []
+
+
+def subscribe(listener: GraphListener):
+    """يسجل مستمعاً لتغييرات الرسم (مثل ذاكرة التخزين المؤقت أو سجل التغييرات)."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def unsubscribe(listener: GraphListener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def _emit(event: str, edges: List[Dict]):
+    for listener in list(_listeners):
+        listener(event, edges)
+
+
+def notify_edges_created(edges: List[Dict]):
+    _emit(EDGES_CREATED, edges)
+
+
+def notify_edges_updated(edges: List[Dict]):
+    _emit(EDGES_UPDATED, edges)
+
+
+def notify_graph_reloaded():
+    _emit(GRAPH_RELOADED, [])
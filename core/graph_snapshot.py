@@ -0,0 +1,139 @@
+import json
+import os
+import time
+from typing import Dict, Tuple, Union
+
+import numpy as np
+
+from db.neo4j_handler import Neo4jHandler
+from .graph_engine import InMemoryCausalGraph
+
+# ----------------------------------------------------------------------
+# لقطة ثنائية (snapshot) لرسم CAUSES قابلة للتحميل بـ memmap دون نسخ
+#
+# بنية الملف:
+#   [8 بايت]  SNAPSHOT_MAGIC
+#   [8 بايت]  طول الترويسة JSON (uint64, little-endian)
+#   [ترويسة]  JSON: الإصدار، عدد العقد والروابط، وموقع/نوع/طول كل مصفوفة
+#   [مصفوفات] indptr, indices, weights, rev_indptr, rev_indices, rev_edges, names
+#             كل منها يبدأ عند إزاحة من مضاعفات SNAPSHOT_ALIGNMENT
+# الأسماء مخزنة ككتلة UTF-8 واحدة مفصولة بـ NUL.
+# ----------------------------------------------------------------------
+
+SNAPSHOT_MAGIC = b"OCSNAP\x00\x01"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_ALIGNMENT = 64
+
+_NAME_SEPARATOR = "\x00"
+_CSR_ARRAYS = ("indptr", "indices", "weights", "rev_indptr", "rev_indices", "rev_edges")
+
+
+def _aligned(offset: int) -> int:
+    return (offset + SNAPSHOT_ALIGNMENT - 1) // SNAPSHOT_ALIGNMENT * SNAPSHOT_ALIGNMENT
+
+
+def _snapshot_arrays(graph: InMemoryCausalGraph) -> Dict[str, np.ndarray]:
+    """مصفوفات CSR بأصغر نوع صحيح مناسب (int32 للمعرفات إذا كان عدد العقد والروابط يسمح)."""
+    graph._ensure_built()
+    id_dtype = np.int32 if max(graph.node_count, graph.edge_count) < np.iinfo(np.int32).max else np.int64
+
+    arrays = {
+        "indptr": np.ascontiguousarray(graph.indptr, dtype="<i8"),
+        "indices": np.ascontiguousarray(graph.indices, dtype=np.dtype(id_dtype).newbyteorder("<")),
+        "weights": np.ascontiguousarray(graph.weights, dtype="<f8"),
+        "rev_indptr": np.ascontiguousarray(graph.rev_indptr, dtype="<i8"),
+        "rev_indices": np.ascontiguousarray(graph.rev_indices, dtype=np.dtype(id_dtype).newbyteorder("<")),
+        "rev_edges": np.ascontiguousarray(graph.rev_edges, dtype=np.dtype(id_dtype).newbyteorder("<")),
+    }
+    if any(_NAME_SEPARATOR in name for name in graph.names):
+        raise ValueError("لا يمكن تصدير أسماء عقد تحتوي على الحرف NUL.")
+    arrays["names"] = np.frombuffer(_NAME_SEPARATOR.join(graph.names).encode("utf-8"), dtype=np.uint8)
+    return arrays
+
+
+def export_snapshot(source: Union[InMemoryCausalGraph, Neo4jHandler], path: str) -> Dict:
+    """
+    يكتب لقطة ثنائية للرسم (أو يحمّله أولاً من Neo4j إذا كان source معالجاً).
+    الكتابة تتم في ملف مؤقت ثم os.replace، فلا يرى العمال الذين يحمّلون اللقطة ملفاً ناقصاً.
+    """
+    started = time.perf_counter()
+    graph = source if isinstance(source, InMemoryCausalGraph) else InMemoryCausalGraph.from_handler(source)
+    arrays = _snapshot_arrays(graph)
+
+    # الترويسة تحتاج الإزاحات، والإزاحات تعتمد على طول الترويسة: نحجز لها حجماً مقرباً أولاً
+    layout = {name: {"dtype": array.dtype.str, "length": int(array.shape[0])} for name, array in arrays.items()}
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "node_count": graph.node_count,
+        "edge_count": graph.edge_count,
+        "created_at": time.time(),
+        "arrays": layout,
+    }
+    header_size = _aligned(len(json.dumps(header)) + 64 * len(arrays) + 16 + SNAPSHOT_ALIGNMENT)
+    offset = header_size
+    for name, array in arrays.items():
+        layout[name]["offset"] = offset
+        offset = _aligned(offset + array.nbytes)
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    if 16 + len(header_bytes) > header_size:
+        raise ValueError("الترويسة أكبر من المساحة المحجوزة لها في اللقطة.")
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(np.uint64(len(header_bytes)).astype("<u8").tobytes())
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(layout[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(offset)
+    os.replace(tmp_path, path)
+
+    stats = {
+        "nodes": graph.node_count,
+        "edges": graph.edge_count,
+        "bytes": offset,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    print(f"تم تصدير لقطة الذاكرة Z: {stats['nodes']} عقدة و {stats['edges']} رابط ({stats['bytes']} بايت).")
+    return stats
+
+
+def read_snapshot_header(path: str) -> Tuple[Dict, int]:
+    """يقرأ الترويسة فقط (للتحقق من الإصدار والأحجام دون تحميل المصفوفات)."""
+    with open(path, "rb") as f:
+        magic = f.read(len(SNAPSHOT_MAGIC))
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"الملف ليس لقطة OpenCausal صالحة: {path}")
+        header_length = int(np.frombuffer(f.read(8), dtype="<u8")[0])
+        header = json.loads(f.read(header_length).decode("utf-8"))
+    if header.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"إصدار لقطة غير مدعوم: {header.get('version')} (المدعوم: {SNAPSHOT_VERSION})")
+    return header, 16 + header_length
+
+
+def load_snapshot(path: str) -> InMemoryCausalGraph:
+    """
+    يحمّل اللقطة دون نسخ المصفوفات: الملف يُربط بالذاكرة (np.memmap بنمط copy-on-write)،
+    فتتشارك كل العمليات التي تحمّل نفس اللقطة صفحات الذاكرة نفسها عبر ذاكرة نظام التشغيل،
+    وأي تعديل محلي (set_weight) لا يُكتب في الملف.
+    """
+    header, _ = read_snapshot_header(path)
+    raw = np.memmap(path, dtype=np.uint8, mode="c")
+
+    def array(name: str) -> np.ndarray:
+        spec = header["arrays"][name]
+        dtype = np.dtype(spec["dtype"])
+        start = spec["offset"]
+        return raw[start:start + spec["length"] * dtype.itemsize].view(dtype)
+
+    names_blob = array("names").tobytes().decode("utf-8")
+    names = names_blob.split(_NAME_SEPARATOR) if header["node_count"] else []
+
+    return InMemoryCausalGraph.from_csr(names, *(array(name) for name in _CSR_ARRAYS))
+
+# مثال للاستخدام:
+# export_snapshot(handler, "memory_z.snapshot")           # مرة واحدة (أو دورياً)
+# graph = load_snapshot("memory_z.snapshot")             # في كل عامل: أجزاء من الثانية
+# verify_causal_path(graph, "Memory Leak", "Server Crash")
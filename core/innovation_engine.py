@@ -1,10 +1,38 @@
 from db.neo4j_handler import Neo4jHandler
 from typing import Optional, List, Dict
+from .graph_engine import InMemoryCausalGraph
 
 # Hyperparameters (يمكن تعديلها)
 MAX_INNOVATION_PATH_LENGTH = 7  # السماح بمسارات أطول (أكثر ابتكاراً)
 MIN_W_FOR_INNOVATION = 0.1      # الحد الأدنى لوزن الرابط المسموح به في الابتكار
 
+# استعلام Cypher للبحث عن المسار المبتكر.
+# نستخدم allShortestPaths: ينفذه Neo4j كبحث BFS ثنائي الاتجاه مع تطبيق شروط
+# العقد المُتجاهلة والحد الأدنى للوزن أثناء التوسع، بدلاً من تعداد كل المسارات حتى 7 قفزات
+# ثم ترتيبها. نحتفظ بنفس الترتيب: الأقصر أولاً ثم الأقوى وزناً.
+INNOVATIVE_PATH_QUERY = f"""
+MATCH (start:Causal {{name: $start_entity}}), (target:Causal {{name: $target_goal}})
+WHERE start <> target
+
+MATCH p = allShortestPaths((start)-[:CAUSES*1..{MAX_INNOVATION_PATH_LENGTH}]->(target))
+
+WHERE all(n IN nodes(p) WHERE NOT n.name IN $constraints_to_ignore)
+
+AND all(r_edge IN relationships(p) WHERE r_edge.weight >= {MIN_W_FOR_INNOVATION})
+
+WITH 
+    p, 
+    reduce(w = 1.0, r IN relationships(p) | w * r.weight) AS path_weight
+
+RETURN 
+    path_weight, 
+    [r IN relationships(p) | {{start: startNode(r).name, end: endNode(r).name, weight: r.weight}}] AS path_details,
+    length(p) AS path_length
+ORDER BY length(p) ASC, path_weight DESC 
+LIMIT 1
+"""
+
+
 def find_innovative_path(
     handler: Neo4jHandler, 
     start_entity: str, 
@@ -16,7 +44,7 @@ def find_innovative_path(
     مع تجاهل القيود (I) التي تمنع الحل عادةً.
     
     المدخلات:
-        handler: كائن اتصال Neo4j.
+        handler: كائن اتصال Neo4j، أو InMemoryCausalGraph للبحث ثنائي الاتجاه محلياً.
         start_entity: نقطة البدء في الابتكار.
         target_goal: الهدف المراد تحقيقه.
         constraints_to_ignore: قائمة بأسماء العقد (القيود) التي يجب تعليقها مؤقتاً (I).
@@ -25,30 +53,18 @@ def find_innovative_path(
         أقصر مسار سببي ينجح في تجاوز القيود، أو None.
     """
 
-    # 1. تحديد العقد التي يجب تجاهلها (I)
-    ignored_nodes_cypher = "WHERE NOT n.name IN $constraints_to_ignore"
+    # 0. المحرك المحلي: بحث ثنائي الاتجاه يتوقف فور التقاء الجبهتين
+    if isinstance(handler, InMemoryCausalGraph):
+        result = handler.shortest_innovative_path(
+            start_entity, target_goal, MIN_W_FOR_INNOVATION, MAX_INNOVATION_PATH_LENGTH,
+            excluded_nodes=set(constraints_to_ignore)
+        )
+        if result:
+            print(f"🎉 تم اكتشاف مسار ابتكاري بطول {result['path_length']} وبوزن {result['path_weight']:.4f}")
+        return result
 
-    # 2. صياغة استعلام Cypher للبحث عن المسار المبتكر
-    query = f"""
-    MATCH (start {{name: $start_entity}}), (target {{name: $target_goal}})
-    
-    MATCH p=(start)-[r:CAUSES*1..{MAX_INNOVATION_PATH_LENGTH}]->(target)
-    
-    WHERE all(n IN nodes(p) WHERE NOT n.name IN $constraints_to_ignore)
-    
-    AND all(r_edge IN relationships(p) WHERE r_edge.weight >= {MIN_W_FOR_INNOVATION})
-    
-    WITH 
-        p, 
-        reduce(w = 1.0, r IN relationships(p) | w * r.weight) AS path_weight
-    
-    RETURN 
-        path_weight, 
-        [r IN relationships(p) | {{start: startNode(r).name, end: endNode(r).name, weight: r.weight}}] AS path_details,
-        length(p) AS path_length
-    ORDER BY length(p) ASC, path_weight DESC 
-    LIMIT 1
-    """
+    # 1. تنفيذ استعلام المسار المبتكر مع تمرير القيود (I) التي يجب تجاهلها
+    query = INNOVATIVE_PATH_QUERY
 
     parameters = {
         "start_entity": start_entity,
@@ -0,0 +1,214 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Callable, Tuple
+
+# ----------------------------------------------------------------------
+# قياس زمن مراحل الجسر (spans) واستدعاءات Neo4j و LLM بداخلها
+# ----------------------------------------------------------------------
+
+# أنواع المقاطع الزمنية
+STAGE = "stage"    # مرحلة في process_and_learn (استخلاص، تحقق، تحديث أوزان، ...)
+NEO4J = "neo4j"    # استعلام واحد إلى الذاكرة Z
+LLM = "llm"        # استدعاء واحد لنموذج اللغة
+
+# حدود فئات المدرج التكراري (بالثواني، مثل أعراف Prometheus)
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_METRIC_NAME = "opencausal_span_duration_seconds"
+
+# المستقبِل (sink): دالة تستقبل (اسم المقطع، نوعه، المدة بالثواني)
+MetricsSink = Callable[[str, str, float], None]
+
+
+class Trace:
+    """سجل المقاطع الزمنية لاستدعاء واحد (مثل process_and_learn)، يتحول إلى الحقل timings في النتيجة."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[Dict] = []
+
+    def record(self, name: str, kind: str, seconds: float, parent: Optional[str]):
+        self.spans.append({"name": name, "kind": kind, "ms": round(seconds * 1000.0, 3), "parent": parent})
+
+    def as_dict(self) -> Dict:
+        """
+        ملخص الزمن: المدة الكلية، زمن كل مرحلة، وإجمالي (عدد، زمن) استدعاءات Neo4j و LLM،
+        مع قائمة المقاطع الكاملة بترتيب انتهائها.
+        """
+        stages: Dict[str, float] = {}
+        totals = {NEO4J: {"calls": 0, "ms": 0.0}, LLM: {"calls": 0, "ms": 0.0}}
+        for span_record in self.spans:
+            if span_record["kind"] == STAGE:
+                stages[span_record["name"]] = round(stages.get(span_record["name"], 0.0) + span_record["ms"], 3)
+            elif span_record["kind"] in totals:
+                totals[span_record["kind"]]["calls"] += 1
+                totals[span_record["kind"]]["ms"] = round(totals[span_record["kind"]]["ms"] + span_record["ms"], 3)
+
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000.0, 3),
+            "stages": stages,
+            "neo4j": totals[NEO4J],
+            "llm": totals[LLM],
+            "spans": list(self.spans),
+        }
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("opencausal_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("opencausal_span", default=None)
+
+_sinks: List[MetricsSink] = []
+
+
+@contextmanager
+def start_trace():
+    """يبدأ سجلاً جديداً للمقاطع في السياق الحالي (يعمل مع الخيوط ومهام asyncio)."""
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, kind: str = STAGE):
+    """
+    يقيس زمن الكتلة ويسجله في السجل الحالي (إن وجد) وفي كل المستقبِلات المسجلة.
+    بدون سجل نشط أو مستقبِلات لا يُقاس شيء (تكلفة شبه معدومة).
+    """
+    trace = _current_trace.get()
+    if trace is None and not _sinks:
+        yield
+        return
+
+    parent = _current_span.get()
+    token = _current_span.set(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        _current_span.reset(token)
+        if trace is not None:
+            trace.record(name, kind, seconds, parent)
+        for sink in list(_sinks):
+            try:
+                sink(name, kind, seconds)
+            except Exception as e:
+                print(f"فشل تسجيل مقياس الزمن ({name}): {e}")
+
+
+def add_metrics_sink(sink: MetricsSink):
+    """يسجل مستقبِلاً (callback) يستقبل كل مقطع زمني: sink(name, kind, seconds)."""
+    if sink not in _sinks:
+        _sinks.append(sink)
+
+
+def remove_metrics_sink(sink: MetricsSink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+# ----------------------------------------------------------------------
+# المدرجات التكرارية لكل مرحلة وتصديرها بصيغة Prometheus النصية
+# ----------------------------------------------------------------------
+
+class LatencyHistograms:
+    """
+    مستقبِل يجمع مدرجاً تكرارياً تراكمياً لكل (اسم، نوع) مقطع، ويصدّرها بصيغة Prometheus:
+        opencausal_span_duration_seconds_bucket{span="verify",kind="stage",le="0.01"} 42
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, name: str, kind: str, seconds: float):
+        self.observe(name, kind, seconds)
+
+    def observe(self, name: str, kind: str, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get((name, kind))
+            if series is None:
+                series = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+                self._series[(name, kind)] = series
+            series["counts"][index] += 1
+            series["sum"] += seconds
+            series["count"] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, str], Dict]:
+        """نسخة من المدرجات: لكل مقطع counts تراكمية حسب الحدود، و sum و count."""
+        with self._lock:
+            result = {}
+            for key, series in self._series.items():
+                cumulative, running = [], 0
+                for count in series["counts"]:
+                    running += count
+                    cumulative.append(running)
+                result[key] = {"buckets": list(self.buckets), "cumulative": cumulative,
+                               "sum": series["sum"], "count": series["count"]}
+            return result
+
+    def to_prometheus(self, metric_name: str = PROMETHEUS_METRIC_NAME) -> str:
+        lines = [
+            f"# HELP {metric_name} Duration of OpenCausal pipeline stages, Neo4j queries and LLM calls.",
+            f"# TYPE {metric_name} histogram",
+        ]
+        for (name, kind), series in sorted(self.snapshot().items()):
+            labels = f'span="{_escape_label(name)}",kind="{_escape_label(kind)}"'
+            for bound, cumulative in zip(series["buckets"], series["cumulative"]):
+                lines.append(f'{metric_name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric_name}_bucket{{{labels},le="+Inf"}} {series["count"]}')
+            lines.append(f"{metric_name}_sum{{{labels}}} {series['sum']}")
+            lines.append(f"{metric_name}_count{{{labels}}} {series['count']}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# ----------------------------------------------------------------------
+# المدرجات النشطة (اختيارية، معطلة افتراضياً)
+# ----------------------------------------------------------------------
+
+_active_histograms: Optional[LatencyHistograms] = None
+
+
+def enable_metrics(buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> LatencyHistograms:
+    """يفعّل جمع المدرجات التكرارية لكل المقاطع (انظر to_prometheus لعرضها على /metrics)."""
+    global _active_histograms
+    disable_metrics()
+    _active_histograms = LatencyHistograms(buckets)
+    add_metrics_sink(_active_histograms)
+    return _active_histograms
+
+
+def disable_metrics():
+    global _active_histograms
+    if _active_histograms is not None:
+        remove_metrics_sink(_active_histograms)
+        _active_histograms = None
+
+
+def get_metrics() -> Optional[LatencyHistograms]:
+    return _active_histograms
+
+# مثال للاستخدام:
+# histograms = enable_metrics()
+# result = process_and_learn(text, handler, client)
+# print(result["timings"]["stages"])        # زمن كل مرحلة لهذا الاستدعاء
+# print(histograms.to_prometheus())         # المدرجات التراكمية لكل المراحل
@@ -0,0 +1,219 @@
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, List, Dict
+
+from openai import OpenAI
+
+# إعدادات التجميع المصغّر (micro-batching) لطلبات استخلاص الفرضيات
+DEFAULT_MAX_BATCH_SIZE = 16         # أقصى عدد نصوص في طلب LLM واحد
+DEFAULT_MAX_WAIT = 0.05             # أقصى انتظار (ثوانٍ) لتجميع دفعة بعد وصول أول نص = حد زيادة الكمون
+DEFAULT_MAX_CONCURRENT_BATCHES = 4  # عدد الطلبات المجمّعة المرسلة في نفس الوقت
+DEFAULT_MAX_FALLBACKS = 4           # أقصى عدد طلبات فردية لكل دفعة (للنصوص المفقودة من الرد المجمّع)
+DEFAULT_EXTRACT_TIMEOUT = 120.0     # ثوانٍ: أقصى انتظار لنتيجة نص في extract
+
+_STOP = object()
+
+
+def _batch_claims_messages(texts: List[str]) -> List[Dict]:
+    """تعليمات واحدة لعدة نصوص: كل نص بمعرّف، والخرج نتائج مفهرسة بنفس المعرّف."""
+    system_prompt = (
+        "أنت محلل منطقي متخصص. ستتلقى قائمة نصوص، لكل نص معرّف id. مهمتك هي استخراج العلاقات السببية "
+        "(cause -> effect) من كل نص على حدة. يجب أن يكون الخرج **بصيغة JSON** بالشكل "
+        '{"results": [{"id": "<id>", "causal_claims": [...]}]} حيث تتوافق عناصر causal_claims مع '
+        "مخطط CAUSAL_SCHEMA، ويظهر كل id مرة واحدة حتى لو لم يحتوِ النص على فرضيات."
+    )
+    items = [{"id": str(i), "text": text} for i, text in enumerate(texts)]
+    user_content = f"النصوص لتحليلها: {json.dumps(items, ensure_ascii=False)}"
+    return [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_content}]
+
+
+def _parse_batch_claims(raw_json_output: str) -> Dict[str, List[Dict]]:
+    """يحوّل الرد المجمّع إلى {id: الفرضيات}؛ العناصر غير الصالحة يتم تجاهلها."""
+    data = json.loads(raw_json_output)
+    entries = data.get("results", []) if isinstance(data, dict) else data
+    claims_by_id: Dict[str, List[Dict]] = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict) or "id" not in entry:
+            continue
+        claims = entry.get("causal_claims", [])
+        claims_by_id[str(entry["id"])] = [
+            c for c in (claims if isinstance(claims, list) else [])
+            if isinstance(c, dict) and "cause" in c and "effect" in c
+        ]
+    return claims_by_id
+
+
+class BatcherClosedError(RuntimeError):
+    """المجمّع أُغلق (close أو disable_llm_batching) ولا يقبل نصوصاً جديدة."""
+
+
+class ClaimExtractionBatcher:
+    """
+    يجمع نصوص الاستخلاص التي تصل خلال نافذة زمنية قصيرة (max_wait) أو حتى max_batch_size،
+    ويرسلها في طلب LLM واحد يعيد الفرضيات مفهرسة بمعرّف كل نص، ثم يعيد لكل مستدعٍ نتيجته.
+
+    - دفعة من نص واحد تُرسل بنفس تعليمات extract_causal_claims_from_llm (نفس مفتاح ذاكرة الردود).
+    - فشل الطلب المجمّع (حد المعدل، تعطل المزوّد، رد غير صالح) يعيد قائمة فارغة لكل نصوص الدفعة،
+      كما في extract_causal_claims_from_llm عند الخطأ، دون إعادة إرسال كل نص على حدة
+      (وإلا تتضاعف الطلبات حتى max_batch_size مرة في أسوأ وقت).
+    - النصوص المفقودة من رد مجمّع ناجح فقط تُعاد بطلبات فردية، بحد أقصى max_fallbacks لكل دفعة.
+    """
+
+    def __init__(
+        self,
+        client: OpenAI,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        max_concurrent_batches: int = DEFAULT_MAX_CONCURRENT_BATCHES,
+        max_fallbacks: int = DEFAULT_MAX_FALLBACKS
+    ):
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_fallbacks = max_fallbacks
+        self.stats = {"texts": 0, "batches": 0, "llm_requests": 0, "fallbacks": 0, "failed_batches": 0}
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._submit_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_concurrent_batches, thread_name_prefix="llm-batch")
+        self._thread = threading.Thread(target=self._run, name="llm-batcher", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # واجهة المستدعين
+    # ------------------------------------------------------------------
+
+    def submit(self, text: str) -> Future:
+        """يضيف نصاً إلى الدفعة الحالية ويعيد Future بقائمة الفرضيات (يمكن انتظاره من asyncio بـ wrap_future)."""
+        future: Future = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise BatcherClosedError("مجمّع الاستخلاص مغلق.")
+            self._queue.put((text, future))
+        return future
+
+    def extract(self, text: str, timeout: Optional[float] = DEFAULT_EXTRACT_TIMEOUT) -> List[Dict]:
+        return self.submit(text).result(timeout)
+
+    # ------------------------------------------------------------------
+    # التجميع والإرسال
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._executor.submit(self._dispatch, batch)
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _extract_single(self, text: str) -> List[Dict]:
+        from .bridge import extract_causal_claims_from_llm
+        self._count(llm_requests=1)
+        return extract_causal_claims_from_llm(text, self.client, use_batcher=False)
+
+    def _dispatch(self, batch: List):
+        from .bridge import _chat_completion
+
+        texts = [text for text, _ in batch]
+        self._count(texts=len(batch), batches=1)
+
+        if len(batch) == 1:
+            results = {"0": self._extract_single(texts[0])}
+        else:
+            try:
+                self._count(llm_requests=1)
+                results = _chat_completion(
+                    self.client, _batch_claims_messages(texts), response_format={"type": "json_object"},
+                    parse=_parse_batch_claims
+                )
+            except Exception as e:
+                print(f"فشل طلب الاستخلاص المجمّع ({len(batch)} نص): {e}")
+                self._count(failed_batches=1)
+                for _, future in batch:
+                    future.set_result([])
+                return
+
+        fallbacks = 0
+        for i, (text, future) in enumerate(batch):
+            try:
+                claims = results.get(str(i))
+                if claims is None and fallbacks < self.max_fallbacks:
+                    fallbacks += 1
+                    self._count(fallbacks=1)
+                    claims = self._extract_single(text)
+                future.set_result(claims if claims is not None else [])
+            except Exception as e:
+                future.set_exception(e)
+
+    def close(self):
+        """يرسل ما تبقى في الطابور وينتظر انتهاء كل الدفعات (submit بعدها يرفع BatcherClosedError)."""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+
+# ----------------------------------------------------------------------
+# المجمّع النشط (اختياري، معطل افتراضياً)
+# ----------------------------------------------------------------------
+
+_active_batcher: Optional[ClaimExtractionBatcher] = None
+
+
+def enable_llm_batching(
+    client: OpenAI,
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    max_wait: float = DEFAULT_MAX_WAIT,
+    max_concurrent_batches: int = DEFAULT_MAX_CONCURRENT_BATCHES,
+    max_fallbacks: int = DEFAULT_MAX_FALLBACKS
+) -> ClaimExtractionBatcher:
+    """يجعل extract_causal_claims_from_llm (مع نفس العميل) يمر عبر التجميع المصغّر."""
+    global _active_batcher
+    disable_llm_batching()
+    _active_batcher = ClaimExtractionBatcher(client, max_batch_size, max_wait, max_concurrent_batches, max_fallbacks)
+    return _active_batcher
+
+
+def disable_llm_batching():
+    global _active_batcher
+    if _active_batcher is not None:
+        _active_batcher.close()
+        _active_batcher = None
+
+
+def get_llm_batcher() -> Optional[ClaimExtractionBatcher]:
+    return _active_batcher
+
+# مثال للاستخدام (خادم متعدد الخيوط):
+# enable_llm_batching(llm_client, max_batch_size=16, max_wait=0.05)
+# process_and_learn(text, handler, llm_client)   # الطلبات المتزامنة تُجمع تلقائياً
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, List, Dict
+
+# إعدادات ذاكرة ردود LLM المؤقتة
+DEFAULT_LLM_CACHE_PATH = "llm_cache.sqlite3"
+DEFAULT_LLM_CACHE_ENTRIES = 50000   # أقصى عدد من الردود المخزنة
+EVICTION_CHECK_INTERVAL = 100       # فحص الحجم والإخراج كل N عملية كتابة
+
+
+def make_llm_cache_key(model: str, messages: List[Dict], response_format: Optional[Dict] = None) -> str:
+    """مفتاح الذاكرة: بصمة SHA-256 للنموذج والتعليمات (prompt) وصيغة الخرج."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "response_format": response_format},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class InMemoryLLMCache:
+    """ذاكرة ردود LLM داخل العملية (LRU)، مناسبة للاختبارات والعمليات قصيرة العمر."""
+
+    def __init__(self, max_entries: int = DEFAULT_LLM_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            response = self._entries.get(key)
+            if response is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def set(self, key: str, model: str, response: str):
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+class SQLiteLLMCache:
+    """
+    ذاكرة ردود LLM دائمة في ملف SQLite (تبقى بين عمليات التشغيل وتُشارك بين العمليات).
+
+    الإخراج (eviction) حسب آخر استخدام (LRU) عند تجاوز max_entries. القراءة لا تكتب في الملف:
+    أوقات آخر استخدام تُجمع في الذاكرة وتُكتب دفعة واحدة مع الكتابة التالية أو عند الإغلاق.
+    """
+
+    def __init__(self, path: str = DEFAULT_LLM_CACHE_PATH, max_entries: int = DEFAULT_LLM_CACHE_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._pending_access: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, model TEXT, response TEXT, created_at REAL, last_access REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._pending_access[key] = time.time()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, model: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._flush_access()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now)
+            )
+            self._writes += 1
+            if self._writes % EVICTION_CHECK_INTERVAL == 0:
+                self._evict()
+            self._conn.commit()
+
+    def _flush_access(self):
+        """يكتب أوقات آخر استخدام المتراكمة منذ آخر كتابة (داخل نفس المعاملة)."""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE llm_cache SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+
+    def _evict(self):
+        self._flush_access()
+        (size,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        overflow = size - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def stats(self) -> Dict:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+            self._conn.close()
+
+
+# ----------------------------------------------------------------------
+# الذاكرة النشطة (اختيارية، معطلة افتراضياً)
+# ----------------------------------------------------------------------
+
+_active_cache = None
+
+
+def enable_llm_cache(cache=None):
+    """يفعّل تخزين ردود LLM (افتراضياً SQLiteLLMCache في DEFAULT_LLM_CACHE_PATH)."""
+    global _active_cache
+    _active_cache = cache if cache is not None else SQLiteLLMCache()
+    return _active_cache
+
+
+def disable_llm_cache():
+    global _active_cache
+    _active_cache = None
+
+
+def get_llm_cache():
+    return _active_cache
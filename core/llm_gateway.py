@@ -0,0 +1,380 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from typing import Optional, Callable, Dict
+
+import openai
+
+# ----------------------------------------------------------------------
+# بوابة مشتركة لاستدعاءات LLM: حد التزامن، حد المعدل (token bucket)، إعادة المحاولة
+# بتراجع أسي مع عشوائية (jitter)، مهلة لكل محاولة وحد زمني كلي (deadline)، وقاطع دائرة
+# ----------------------------------------------------------------------
+
+DEFAULT_MAX_CONCURRENT = 8        # أقصى عدد من طلبات LLM الجارية في نفس الوقت (لكل عملية)
+DEFAULT_RATE_PER_SECOND = 10.0    # متوسط الطلبات المسموح بها في الثانية
+DEFAULT_BURST = 10                # سعة الدلو: عدد الطلبات المسموح بها دفعة واحدة
+DEFAULT_MAX_RETRIES = 3           # عدد إعادات المحاولة بعد المحاولة الأولى
+DEFAULT_BACKOFF_BASE = 0.5        # ثوانٍ: التأخير الأقصى للمحاولة الأولى، ويتضاعف بعدها
+DEFAULT_BACKOFF_MAX = 8.0
+DEFAULT_CALL_TIMEOUT = 30.0       # مهلة المحاولة الواحدة (تُمرر إلى العميل كـ timeout)
+DEFAULT_DEADLINE = 60.0           # الحد الزمني الكلي للاستدعاء (انتظار + محاولات + تراجع)
+DEFAULT_FAILURE_THRESHOLD = 5     # عدد الاستدعاءات المنطقية الفاشلة المتتالية الذي يفتح الدائرة
+DEFAULT_RESET_TIMEOUT = 30.0      # مدة بقاء الدائرة مفتوحة قبل السماح بمحاولة تجريبية
+
+# أخطاء مؤقتة من المزوّد تستحق إعادة المحاولة (وتُحسب على قاطع الدائرة)
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_EXCEPTIONS = (
+    openai.APIConnectionError,   # يشمل APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+    TimeoutError,
+    asyncio.TimeoutError,        # ما يرفعه asyncio.wait_for؛ فئة مختلفة عن TimeoutError قبل Python 3.11
+    ConnectionError,
+)
+
+
+class LLMGatewayError(Exception):
+    """خطأ من البوابة نفسها (وليس من المزوّد)."""
+
+
+class CircuitOpenError(LLMGatewayError):
+    """الدائرة مفتوحة: المزوّد متعطل، والطلب رُفض فوراً دون انتظار."""
+
+
+class DeadlineExceededError(LLMGatewayError, TimeoutError):
+    """انتهى الحد الزمني الكلي للاستدعاء قبل الحصول على رد."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, RETRYABLE_EXCEPTIONS):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES
+
+
+class TokenBucket:
+    """دلو رموز: يمتلئ بمعدل rate رمز/ثانية حتى capacity، وكل طلب يستهلك رمزاً."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """يحجز رمزاً ويعيد مدة الانتظار اللازمة حتى يتوفر (0 إذا كان متوفراً)."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def _refund(self):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1.0)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        wait = self._reserve()
+        if timeout is not None and wait > timeout:
+            self._refund()
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> bool:
+        wait = self._reserve()
+        if timeout is not None and wait > timeout:
+            self._refund()
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+
+class CircuitBreaker:
+    """
+    قاطع دائرة بثلاث حالات:
+        closed:    الطلبات تمر، وتُعد الاستدعاءات الفاشلة المتتالية (بعد استنفاد محاولاتها)
+        open:      بعد failure_threshold إخفاقاً، تُرفض الطلبات فوراً لمدة reset_timeout
+        half_open: بعد انتهاء المدة يُسمح بطلب تجريبي واحد؛ نجاحه يغلق الدائرة وفشله يعيد فتحها
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """يرفع CircuitOpenError إذا كانت الدائرة مفتوحة، ويعيد True إذا كان هذا الطلب هو الطلب التجريبي."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError("دائرة LLM مفتوحة: المزوّد متعطل مؤقتاً.")
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitOpenError("دائرة LLM نصف مفتوحة: يوجد طلب تجريبي قيد التنفيذ.")
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """
+        يحرر الطلب التجريبي إذا انتهى دون نجاح أو فشل مسجّل: خطأ لا يدل على حالة المزوّد (طلب غير صالح)،
+        أو انتهاء الحد الزمني، أو إلغاء (CancelledError / KeyboardInterrupt). بعد record_failure لا يفعل شيئاً.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+
+class LLMGateway:
+    """
+    بوابة مشتركة لكل استدعاءات LLM (تُفعّل عبر enable_llm_gateway):
+    - حد تزامن (semaphore): الطلبات الزائدة تنتظر حتى الحد الزمني بدلاً من تكديس خيوط عالقة؛
+    - حد معدل (token bucket) يمنع تجاوز حصة المزوّد؛
+    - إعادة المحاولة للأخطاء المؤقتة فقط، بتراجع أسي مع full jitter، ضمن الحد الزمني الكلي
+      (الجسر يمرر عميلاً بـ max_retries=0 عبر client_without_retries حتى لا تتراكم المحاولات)؛
+    - قاطع دائرة يرفض الطلبات فوراً عندما يكون المزوّد متعطلاً؛ يُفتح بعد failure_threshold
+      استدعاءً منطقياً فاشلاً متتالياً (بعد استنفاد محاولات كل استدعاء).
+    كل أخطاء البوابة ترث من Exception، فتعود دوال الجسر إلى قيمها الافتراضية كما في السابق.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        rate_per_second: float = DEFAULT_RATE_PER_SECOND,
+        burst: int = DEFAULT_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        call_timeout: Optional[float] = DEFAULT_CALL_TIMEOUT,
+        deadline: float = DEFAULT_DEADLINE,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.call_timeout = call_timeout
+        self.deadline = deadline
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "rejected": 0, "deadline_exceeded": 0}
+
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        # asyncio.Semaphore مرتبط بحلقة الأحداث، لذا واحد لكل حلقة
+        self._async_slots: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._stats_lock = threading.Lock()
+        self._configured_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._clients_lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def backoff_delay(self, attempt: int) -> float:
+        """تراجع أسي مع full jitter: رقم عشوائي بين 0 و min(backoff_max, base * 2^attempt)."""
+        return random.uniform(0.0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _timeout_kwargs(self, kwargs: Dict, remaining: float) -> Dict:
+        if self.call_timeout is None:
+            return kwargs
+        return {**kwargs, "timeout": max(0.001, min(self.call_timeout, remaining))}
+
+    def client_without_retries(self, client):
+        """
+        عميل OpenAI بدون إعادة المحاولة الداخلية (max_retries=0): البوابة وحدها تعيد المحاولة،
+        وإلا تتضاعف المحاولات (محاولات العميل الافتراضية × max_retries للبوابة) لكل استدعاء.
+        """
+        with_options = getattr(client, "with_options", None)
+        if with_options is None:
+            return client
+        with self._clients_lock:
+            configured = self._configured_clients.get(client)
+            if configured is None:
+                configured = with_options(max_retries=0)
+                self._configured_clients[client] = configured
+            return configured
+
+    def _before_call(self) -> bool:
+        """فحص قاطع الدائرة مرة واحدة لكل استدعاء منطقي (وليس لكل محاولة)؛ يعيد True للطلب التجريبي."""
+        try:
+            return self.breaker.before_call()
+        except CircuitOpenError:
+            self._count("rejected")
+            raise
+
+    def _check_deadline(self, deadline_at: float) -> float:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            self._count("deadline_exceeded")
+            raise DeadlineExceededError("انتهى الحد الزمني لاستدعاء LLM.")
+        return remaining
+
+    def _after_failure(self, error: Exception, attempt: int, deadline_at: float) -> Optional[float]:
+        """
+        يعيد مدة الانتظار قبل المحاولة التالية، أو None إذا يجب رفع الخطأ. قاطع الدائرة يحسب
+        الاستدعاءات المنطقية الفاشلة (بعد استنفاد المحاولات) وليس كل محاولة.
+        """
+        if not is_retryable(error):
+            return None
+        delay = self.backoff_delay(attempt)
+        if attempt >= self.max_retries or time.monotonic() + delay >= deadline_at:
+            self.breaker.record_failure()
+            self._count("failures")
+            return None
+        self._count("retries")
+        return delay
+
+    # ------------------------------------------------------------------
+    # الاستدعاء المتزامن
+    # ------------------------------------------------------------------
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """ينفذ fn(*args, **kwargs, timeout=...) عبر البوابة (مثل client.chat.completions.create)."""
+        self._count("calls")
+        deadline_at = time.monotonic() + self.deadline
+        probe = self._before_call()
+        try:
+            return self._call_attempts(deadline_at, fn, args, kwargs)
+        except BaseException:
+            # أي خروج بدون نجاح أو فشل مسجّل (خطأ دائم، حد زمني، KeyboardInterrupt) يحرر الطلب التجريبي
+            if probe:
+                self.breaker.release_probe()
+            raise
+
+    def _call_attempts(self, deadline_at: float, fn: Callable, args, kwargs):
+        attempt = 0
+        while True:
+            remaining = self._check_deadline(deadline_at)
+            if not self._slots.acquire(timeout=remaining):
+                self._count("deadline_exceeded")
+                raise DeadlineExceededError("لا يوجد مكان متاح لطلب LLM خلال الحد الزمني.")
+            try:
+                if not self.bucket.acquire(timeout=deadline_at - time.monotonic()):
+                    self._count("deadline_exceeded")
+                    raise DeadlineExceededError("حد معدل طلبات LLM لا يسمح بطلب خلال الحد الزمني.")
+                result = fn(*args, **self._timeout_kwargs(kwargs, deadline_at - time.monotonic()))
+            except LLMGatewayError:
+                raise
+            except Exception as error:
+                delay = self._after_failure(error, attempt, deadline_at)
+                if delay is None:
+                    raise
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                self._slots.release()
+
+            time.sleep(delay)
+            attempt += 1
+
+    # ------------------------------------------------------------------
+    # الاستدعاء غير المتزامن
+    # ------------------------------------------------------------------
+
+    def _loop_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slots = self._async_slots.get(loop)
+        if slots is None:
+            slots = asyncio.Semaphore(self.max_concurrent)
+            self._async_slots[loop] = slots
+        return slots
+
+    async def acall(self, fn: Callable, *args, **kwargs):
+        """النسخة غير المتزامنة: fn دالة coroutine (مثل AsyncOpenAI.chat.completions.create)."""
+        self._count("calls")
+        deadline_at = time.monotonic() + self.deadline
+        slots = self._loop_slots()
+        probe = self._before_call()
+        try:
+            return await self._acall_attempts(deadline_at, slots, fn, args, kwargs)
+        except BaseException:
+            # يشمل asyncio.CancelledError (ليست Exception): بدونه يبقى الطلب التجريبي معلقاً والدائرة مغلقة أمام الكل
+            if probe:
+                self.breaker.release_probe()
+            raise
+
+    async def _acall_attempts(self, deadline_at: float, slots: asyncio.Semaphore, fn: Callable, args, kwargs):
+        attempt = 0
+        while True:
+            remaining = self._check_deadline(deadline_at)
+            try:
+                await asyncio.wait_for(slots.acquire(), remaining)
+            except asyncio.TimeoutError:
+                self._count("deadline_exceeded")
+                raise DeadlineExceededError("لا يوجد مكان متاح لطلب LLM خلال الحد الزمني.")
+            try:
+                if not await self.bucket.acquire_async(timeout=deadline_at - time.monotonic()):
+                    self._count("deadline_exceeded")
+                    raise DeadlineExceededError("حد معدل طلبات LLM لا يسمح بطلب خلال الحد الزمني.")
+                remaining = deadline_at - time.monotonic()
+                result = await asyncio.wait_for(fn(*args, **self._timeout_kwargs(kwargs, remaining)), remaining)
+            except LLMGatewayError:
+                raise
+            except Exception as error:
+                delay = self._after_failure(error, attempt, deadline_at)
+                if delay is None:
+                    raise
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                slots.release()
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+# ----------------------------------------------------------------------
+# البوابة النشطة (اختيارية، معطلة افتراضياً)
+# ----------------------------------------------------------------------
+
+_active_gateway: Optional[LLMGateway] = None
+
+
+def enable_llm_gateway(**settings) -> LLMGateway:
+    """يجعل _chat_completion و _achat_completion يمران عبر بوابة مشتركة (الإعدادات كما في LLMGateway)."""
+    global _active_gateway
+    _active_gateway = LLMGateway(**settings)
+    return _active_gateway
+
+
+def disable_llm_gateway():
+    global _active_gateway
+    _active_gateway = None
+
+
+def get_llm_gateway() -> Optional[LLMGateway]:
+    return _active_gateway
+
+# مثال للاستخدام:
+# enable_llm_gateway(max_concurrent=16, rate_per_second=20, deadline=45)
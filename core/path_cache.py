@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, List, Dict, Tuple, Hashable
+
+from . import graph_events
+
+# إعدادات ذاكرة التخزين المؤقت للمسارات الموثقة
+DEFAULT_CACHE_SIZE = 10000   # أقصى عدد من أزواج (سبب، نتيجة) المخزنة
+DEFAULT_CACHE_TTL = 300.0    # مدة صلاحية النتيجة بالثواني
+
+# قيمة تمييزية لغياب النتيجة (تختلف عن None التي تعني نتيجة سلبية مخزنة)
+CACHE_MISS = object()
+
+
+class VerifiedPathCache:
+    """
+    ذاكرة تخزين مؤقت (LRU + TTL) لنتائج verify_causal_path.
+
+    المفتاح: (السبب، النتيجة، العتبة، أقصى طول). الإبطال يتم عبر أحداث graph_events:
+    - تحديث وزن رابط: تُحذف النتائج التي يمر مسارها بهذا الرابط (فهرس رابط -> مفاتيح)،
+      بالإضافة إلى النتائج السلبية (None) لأن تقوية رابط قد تُنشئ مساراً جديداً.
+    - رابط جديد أو إعادة تحميل الذاكرة: تُفرّغ الذاكرة بالكامل.
+
+    ملاحظة: تقوية رابط خارج المسار المخزن قد تجعل مساراً بديلاً أقوى منه؛ هذه الحالة
+    لا تُبطل النتيجة فوراً ويحدّها TTL.
+
+    كل إبطال يرفع عداد الإصدار (version)، ولا تُخزن نتيجة تم حسابها قبل آخر إبطال.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[Hashable, Tuple[float, Optional[Dict]]]" = OrderedDict()
+        self._edge_index: Dict[Tuple[str, str], set] = {}
+        self._negative_keys: set = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(cause_name: str, effect_name: str, threshold: float, max_length: int) -> Tuple:
+        return (cause_name, effect_name, float(threshold), int(max_length))
+
+    # ------------------------------------------------------------------
+    # القراءة والكتابة
+    # ------------------------------------------------------------------
+
+    def get(self, key: Hashable):
+        """يعيد النتيجة المخزنة (قد تكون None لنتيجة سلبية)، أو CACHE_MISS إذا لم توجد أو انتهت صلاحيتها."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return CACHE_MISS
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, result: Optional[Dict], version: int):
+        """يخزن النتيجة فقط إذا لم يحدث أي إبطال منذ بدء حسابها (version)."""
+        with self._lock:
+            if version != self.version:
+                return
+
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+
+            if result is None:
+                self._negative_keys.add(key)
+            else:
+                for edge in result['path_details']:
+                    self._edge_index.setdefault((edge['start'], edge['end']), set()).add(key)
+
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable):
+        _, result = self._entries.pop(key)
+        if result is None:
+            self._negative_keys.discard(key)
+            return
+        for edge in result['path_details']:
+            dependents = self._edge_index.get((edge['start'], edge['end']))
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._edge_index[(edge['start'], edge['end'])]
+
+    # ------------------------------------------------------------------
+    # الإبطال
+    # ------------------------------------------------------------------
+
+    def invalidate_edges(self, edges: List[Dict]):
+        with self._lock:
+            self.version += 1
+            stale = set(self._negative_keys)
+            for edge in edges:
+                stale |= self._edge_index.get((edge['start'], edge['end']), set())
+            for key in stale:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._edge_index.clear()
+            self._negative_keys.clear()
+
+    def __call__(self, event: str, edges: List[Dict]):
+        """مستمع graph_events."""
+        if event == graph_events.EDGES_UPDATED:
+            self.invalidate_edges(edges)
+        else:
+            self.clear()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "version": self.version,
+        }
+
+
+# ----------------------------------------------------------------------
+# الذاكرة المؤقتة النشطة (اختيارية، معطلة افتراضياً)
+# ----------------------------------------------------------------------
+
+_active_cache: Optional[VerifiedPathCache] = None
+
+
+def enable_path_cache(maxsize: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_CACHE_TTL) -> VerifiedPathCache:
+    """يفعّل التخزين المؤقت لنتائج verify_causal_path ويربطه بأحداث تغيير الرسم."""
+    global _active_cache
+    disable_path_cache()
+    _active_cache = VerifiedPathCache(maxsize, ttl)
+    graph_events.subscribe(_active_cache)
+    return _active_cache
+
+
+def disable_path_cache():
+    global _active_cache
+    if _active_cache is not None:
+        graph_events.unsubscribe(_active_cache)
+        _active_cache = None
+
+
+def get_path_cache() -> Optional[VerifiedPathCache]:
+    return _active_cache
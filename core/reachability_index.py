@@ -0,0 +1,231 @@
+import heapq
+import itertools
+import threading
+from typing import Optional, List, Dict, Iterable, Tuple, Set
+
+from . import graph_events
+from .graph_engine import InMemoryCausalGraph
+from .path_cache import CACHE_MISS
+
+# شجرة أقوى المسارات نحو هدف واحد: عقدة -> (أفضل حاصل ضرب، سلسلة المسار حتى الهدف)
+ReverseTree = Dict[int, Tuple[float, tuple]]
+
+
+class ReachabilityIndex:
+    """
+    فهرس مُحتسب مسبقاً (materialized) لأقوى المسارات نحو عقد "الأعراض" الأكثر سؤالاً
+    (High Latency, Server Crash ...).
+
+    لكل هدف t تُبنى شجرة Dijkstra عكسية (عبر predecessors) محدودة بـ max_length قفزة:
+    لكل عقدة u تصل إلى t نخزن أقوى حاصل ضرب وسلسلة المسار، فتصبح الإجابة عن (u, t)
+    قراءة من قاموس ثم إعادة بناء مسار لا يتجاوز max_length رابطاً.
+
+    الصيانة تدريجية عبر graph_events: عند تغير وزن رابط (a, b) يُعاد بناء شجرة الهدف t فقط إذا
+    كان الرابط ضمن أحد مسارات الشجرة (أي رابط فيها، وليس الرابط الأول فقط)، أو كان يمكن أن يحسّنها (الوزن >= العتبة و b يصل إلى t).
+    بعد إعادة تحميل الذاكرة (GRAPH_RELOADED) يصبح الفهرس قديماً حتى يُعاد تحميله من handler.
+
+    الفهرس يجيب فقط عن نفس العتبة وأقصى طول اللذين بُني بهما، وأي سؤال آخر يعيد CACHE_MISS.
+    """
+
+    def __init__(
+        self,
+        graph: InMemoryCausalGraph,
+        targets: Iterable[str],
+        threshold: float,
+        max_length: int,
+        handler=None
+    ):
+        self.graph = graph
+        self.threshold = float(threshold)
+        self.max_length = int(max_length)
+        self.target_names = list(dict.fromkeys(targets))
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+
+        self._handler = handler
+        self._trees: Dict[int, ReverseTree] = {}
+        self._tree_edges: Dict[int, Set[Tuple[int, int]]] = {}
+        self._edge_targets: Dict[Tuple[int, int], Set[int]] = {}
+        self._stale = False
+        self._lock = threading.Lock()
+
+        self._build_all()
+
+    @classmethod
+    def from_handler(cls, handler, targets: Iterable[str], threshold: float, max_length: int) -> "ReachabilityIndex":
+        """يحمّل الرسم من Neo4j ويبني الفهرس (ويعيد التحميل تلقائياً بعد GRAPH_RELOADED)."""
+        return cls(InMemoryCausalGraph.from_handler(handler), targets, threshold, max_length, handler=handler)
+
+    # ------------------------------------------------------------------
+    # البناء
+    # ------------------------------------------------------------------
+
+    def _build_all(self):
+        self._trees.clear()
+        self._tree_edges.clear()
+        self._edge_targets.clear()
+        for name in self.target_names:
+            self._rebuild_target(self.graph._intern(name))
+        self._stale = False
+
+    def _rebuild_target(self, target: int):
+        """Dijkstra عكسي محدود بالقفزات من الهدف (نفس منطق strongest_path لكن على predecessors)."""
+        for edge in self._tree_edges.pop(target, ()):
+            dependents = self._edge_targets.get(edge)
+            if dependents is not None:
+                dependents.discard(target)
+                if not dependents:
+                    del self._edge_targets[edge]
+
+        counter = itertools.count()
+        heap = [(-1.0, next(counter), target, 0, (target, None))]
+        settled_hops: Dict[int, int] = {}
+        tree: ReverseTree = {}
+
+        while heap:
+            neg_weight, _, node, hops, chain = heapq.heappop(heap)
+
+            if hops >= settled_hops.get(node, self.max_length + 1):
+                continue
+            settled_hops[node] = hops
+
+            # أول خروج لعقدة من الكومة هو أقوى مسار لها نحو الهدف
+            if node != target and node not in tree:
+                tree[node] = (-neg_weight, chain)
+
+            if hops == self.max_length:
+                continue
+
+            predecessors, weights = self.graph.predecessors(node)
+            for predecessor, weight in zip(predecessors, weights):
+                if weight < self.threshold:
+                    continue
+                heapq.heappush(heap, (neg_weight * weight, next(counter), predecessor, hops + 1, (predecessor, chain)))
+
+        # كل روابط المسار المخزن وليس أولها فقط: حد القفزات قد يجعل مسار u يمر بجزء
+        # لا يطابق أقوى مسار للعقدة التالية، وإضعاف أي رابط فيه يجب أن يعيد بناء الشجرة
+        edges = set()
+        for _, chain in tree.values():
+            while chain[1] is not None:
+                edges.add((chain[0], chain[1][0]))
+                chain = chain[1]
+        for edge in edges:
+            self._edge_targets.setdefault(edge, set()).add(target)
+
+        self._trees[target] = tree
+        self._tree_edges[target] = edges
+        self.rebuilds += 1
+
+    # ------------------------------------------------------------------
+    # الاستعلام
+    # ------------------------------------------------------------------
+
+    def lookup(self, cause_name: str, effect_name: str, threshold: float, max_length: int):
+        """
+        يعيد أقوى مسار (نفس بنية verify_causal_path) أو None إذا ثبت عدم وجوده،
+        أو CACHE_MISS إذا كان السؤال خارج نطاق الفهرس.
+        """
+        with self._lock:
+            if self._stale:
+                if self._handler is None:
+                    self.misses += 1
+                    return CACHE_MISS
+                self.graph = InMemoryCausalGraph.from_handler(self._handler)
+                self._build_all()
+
+            target = self.graph.node_ids.get(effect_name)
+            if (target not in self._trees or cause_name == effect_name
+                    or float(threshold) != self.threshold or int(max_length) != self.max_length):
+                self.misses += 1
+                return CACHE_MISS
+
+            self.hits += 1
+            entry = self._trees[target].get(self.graph.node_ids.get(cause_name))
+            if entry is None:
+                return None
+
+            weight, chain = entry
+            node_path = []
+            while chain is not None:
+                node_path.append(chain[0])
+                chain = chain[1]
+            self.graph._ensure_built()
+            return self.graph._format_path(node_path, weight)
+
+    # ------------------------------------------------------------------
+    # الصيانة التدريجية
+    # ------------------------------------------------------------------
+
+    def apply_edges(self, edges: List[Dict], created: bool = False):
+        """يطبق تغييرات الأوزان على الرسم المحلي ويعيد بناء أشجار الأهداف المتأثرة فقط."""
+        with self._lock:
+            affected: Set[int] = set()
+            for edge in edges:
+                start = self.graph._intern(edge['start'])
+                end = self.graph._intern(edge['end'])
+
+                # MERGE ... ON CREATE لا يغير وزن رابط موجود مسبقاً
+                if created and self.graph.get_weight(edge['start'], edge['end']) is not None:
+                    continue
+                self.graph.set_weight(edge['start'], edge['end'], edge['weight'])
+
+                affected |= self._edge_targets.get((start, end), set())
+                if edge['weight'] >= self.threshold:
+                    affected |= {t for t, tree in self._trees.items() if end == t or end in tree}
+
+            for target in affected:
+                self._rebuild_target(target)
+
+    def __call__(self, event: str, edges: List[Dict]):
+        """مستمع graph_events."""
+        if event == graph_events.GRAPH_RELOADED:
+            with self._lock:
+                self._stale = True
+        else:
+            self.apply_edges(edges, created=(event == graph_events.EDGES_CREATED))
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "targets": len(self._trees),
+            "indexed_pairs": sum(len(tree) for tree in self._trees.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "rebuilds": self.rebuilds,
+        }
+
+
+# ----------------------------------------------------------------------
+# الفهرس النشط (اختياري، معطل افتراضياً)
+# ----------------------------------------------------------------------
+
+_active_index: Optional[ReachabilityIndex] = None
+
+
+def enable_reachability_index(source, targets: Iterable[str], threshold: float, max_length: int) -> ReachabilityIndex:
+    """
+    يبني الفهرس ويربطه بأحداث تغيير الرسم.
+
+    source: InMemoryCausalGraph جاهز، أو handler لـ Neo4j (يتم تحميل الرسم منه).
+    """
+    global _active_index
+    disable_reachability_index()
+    if isinstance(source, InMemoryCausalGraph):
+        _active_index = ReachabilityIndex(source, targets, threshold, max_length)
+    else:
+        _active_index = ReachabilityIndex.from_handler(source, targets, threshold, max_length)
+    graph_events.subscribe(_active_index)
+    return _active_index
+
+
+def disable_reachability_index():
+    global _active_index
+    if _active_index is not None:
+        graph_events.unsubscribe(_active_index)
+        _active_index = None
+
+
+def get_reachability_index() -> Optional[ReachabilityIndex]:
+    return _active_index
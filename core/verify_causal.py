@@ -1,37 +1,26 @@
 from db.neo4j_handler import Neo4jHandler
 from typing import Optional, List, Dict
+from .graph_engine import InMemoryCausalGraph
+from .path_cache import get_path_cache, CACHE_MISS
+from .reachability_index import get_reachability_index
 
 # عتبة الثقة (Tau): أي مسار أقل من هذا الوزن لا يُعتبر سببيًا موثوقًا به
 MAX_PATH_LENGTH = 5  # أقصى طول مسموح به للمسار السببي للتحقق
 TRUST_THRESHOLD = 0.5
+DEFAULT_TOP_K = 3     # عدد التفسيرات البديلة الافتراضي
 
-def verify_causal_path(
-    handler: Neo4jHandler, 
-    cause_name: str, 
-    effect_name: str, 
-    threshold: float = TRUST_THRESHOLD # القيمة الافتراضية 0.5
-) -> Optional[Dict]:
+
+def build_verify_path_query(max_length: int = MAX_PATH_LENGTH) -> str:
     """
-    يبحث عن أقوى مسار سببي موجه وموزون بين سبب ونتيجة في الذاكرة Z.
-    
-    المدخلات:
-        handler: كائن اتصال Neo4j.
-        cause_name: اسم العقدة المسببة (e.g., "ارتفاع درجة الحرارة").
-        effect_name: اسم العقدة الناتجة (e.g., "فشل الخادم").
-        threshold: الحد الأدنى لوزن الرابط المطلوب (tau).
-        
-    المخرجات:
-        مسار سببي موثوق به (كقائمة من الروابط والأوزان)، أو None إذا لم يتم العثور عليه.
+    استعلام Cypher لأقوى مسار بين $cause و $effect (كل روابطه >= $threshold).
+    مشترك بين النسخة المتزامنة وغير المتزامنة من التحقق.
     """
-
-    # 1. صياغة استعلام Cypher للبحث عن المسار
     # نستخدم Dijkstra's algorithm (أو مسار أقصر مع تعديل) للبحث عن أقوى المسارات،
     # لكن للتبسيط الأولي نستخدم MATCH بسيط مع شرط الوزن.
-
-    query = f"""
-    MATCH (start {{name: $cause}}), (target {{name: $effect}})
+    return f"""
+    MATCH (start:Causal {{name: $cause}}), (target:Causal {{name: $effect}})
     
-    MATCH p=(start)-[r:CAUSES*1..{MAX_PATH_LENGTH}]->(target) 
+    MATCH p=(start)-[r:CAUSES*1..{max_length}]->(target) 
     
     WHERE all(r_edge IN relationships(p) WHERE r_edge.weight >= $threshold)
 
@@ -47,6 +36,51 @@ def verify_causal_path(
     LIMIT 1
     """
 
+
+def verify_causal_path(
+    handler: Neo4jHandler, 
+    cause_name: str, 
+    effect_name: str, 
+    threshold: float = TRUST_THRESHOLD, # القيمة الافتراضية 0.5
+    max_length: int = MAX_PATH_LENGTH
+) -> Optional[Dict]:
+    """
+    يبحث عن أقوى مسار سببي موجه وموزون بين سبب ونتيجة في الذاكرة Z.
+    
+    المدخلات:
+        handler: كائن اتصال Neo4j، أو InMemoryCausalGraph للإجابة محلياً دون قاعدة البيانات.
+        cause_name: اسم العقدة المسببة (e.g., "ارتفاع درجة الحرارة").
+        effect_name: اسم العقدة الناتجة (e.g., "فشل الخادم").
+        threshold: الحد الأدنى لوزن الرابط المطلوب (tau).
+        max_length: أقصى عدد من القفزات في المسار.
+        
+    المخرجات:
+        مسار سببي موثوق به (كقائمة من الروابط والأوزان)، أو None إذا لم يتم العثور عليه.
+    """
+
+    # 0. المحرك المحلي (in-process): Dijkstra لأقصى حاصل ضرب بدلاً من تعداد كل المسارات
+    if isinstance(handler, InMemoryCausalGraph):
+        return handler.strongest_path(cause_name, effect_name, threshold, max_length)
+
+    # 0.1. فهرس الوصول المُحتسب مسبقاً لعقد الأعراض (إن كان مفعّلاً عبر enable_reachability_index)
+    index = get_reachability_index()
+    if index is not None:
+        indexed = index.lookup(cause_name, effect_name, threshold, max_length)
+        if indexed is not CACHE_MISS:
+            return indexed
+
+    # 0.2. الذاكرة المؤقتة للمسارات الموثقة (إن كانت مفعّلة عبر enable_path_cache)
+    cache = get_path_cache()
+    if cache is not None:
+        cache_key = cache.make_key(cause_name, effect_name, threshold, max_length)
+        cached = cache.get(cache_key)
+        if cached is not CACHE_MISS:
+            return cached
+        cache_version = cache.version
+
+    # 1. صياغة استعلام Cypher للبحث عن المسار
+    query = build_verify_path_query(max_length)
+
     parameters = {
         "cause": cause_name,
         "effect": effect_name,
@@ -57,7 +91,160 @@ def verify_causal_path(
 
     if results:
         # وجدنا مسارًا سببيًا موثوقًا به
-        return results[0]
+        verified_path = results[0]
     else:
         # لم يتم العثور على مسار يفي بالحد الأدنى للوزن (الاستنتاج غير موثوق به)
-        return None
+        verified_path = None
+
+    if cache is not None:
+        cache.put(cache_key, verified_path, cache_version)
+
+    return verified_path
+
+
+def build_verify_paths_batch_query(max_length: int = MAX_PATH_LENGTH) -> str:
+    """
+    استعلام واحد يتحقق من عدة أزواج (سبب، نتيجة) عبر UNWIND، مع أقوى مسار لكل زوج.
+    الأزواج التي لا يوجد لها مسار لا تظهر في النتائج (يتم تعريف كل زوج بالحقل idx).
+    """
+    return f"""
+    UNWIND $pairs AS pair
+    CALL {{
+        WITH pair
+        MATCH (start:Causal {{name: pair.cause}}), (target:Causal {{name: pair.effect}})
+        MATCH p=(start)-[:CAUSES*1..{max_length}]->(target)
+        WHERE all(r_edge IN relationships(p) WHERE r_edge.weight >= $threshold)
+        WITH p, reduce(w = 1.0, r IN relationships(p) | w * r.weight) AS path_weight
+        RETURN 
+            path_weight, 
+            [r IN relationships(p) | {{start: startNode(r).name, end: endNode(r).name, weight: r.weight}}] AS path_details,
+            length(p) AS path_length
+        ORDER BY path_weight DESC 
+        LIMIT 1
+    }}
+    RETURN pair.idx AS idx, path_weight, path_details, path_length
+    """
+
+
+def verify_causal_paths_batch(
+    handler: Neo4jHandler,
+    claims: List[Dict],
+    threshold: float = TRUST_THRESHOLD,
+    max_length: int = MAX_PATH_LENGTH
+) -> List[Optional[Dict]]:
+    """
+    يتحقق من كل الفرضيات (claims) دفعة واحدة بدلاً من استدعاء verify_causal_path لكل فرضية.
+
+    المدخلات:
+        handler: كائن اتصال Neo4j، أو InMemoryCausalGraph.
+        claims: قائمة فرضيات تحتوي على المفتاحين cause و effect.
+        threshold: الحد الأدنى لوزن الرابط المطلوب (tau).
+        max_length: أقصى عدد من القفزات في المسار.
+
+    المخرجات:
+        قائمة بنفس ترتيب claims: أقوى مسار موثوق لكل فرضية، أو None.
+    """
+
+    if isinstance(handler, InMemoryCausalGraph):
+        return [handler.strongest_path(c['cause'], c['effect'], threshold, max_length) for c in claims]
+
+    verdicts: List[Optional[Dict]] = [None] * len(claims)
+
+    # الأزواج المتكررة تُرسل مرة واحدة، والأزواج المفهرسة أو الموجودة في الذاكرة المؤقتة لا تُرسل أصلاً
+    index = get_reachability_index()
+    cache = get_path_cache()
+    pending: Dict[tuple, List[int]] = {}
+    for i, claim in enumerate(claims):
+        pair = (claim['cause'], claim['effect'])
+        if index is not None:
+            indexed = index.lookup(pair[0], pair[1], threshold, max_length)
+            if indexed is not CACHE_MISS:
+                verdicts[i] = indexed
+                continue
+        if cache is not None:
+            cached = cache.get(cache.make_key(pair[0], pair[1], threshold, max_length))
+            if cached is not CACHE_MISS:
+                verdicts[i] = cached
+                continue
+        pending.setdefault(pair, []).append(i)
+
+    if not pending:
+        return verdicts
+
+    cache_version = cache.version if cache is not None else None
+    pairs = list(pending)
+    parameters = {
+        "pairs": [{"idx": j, "cause": cause, "effect": effect} for j, (cause, effect) in enumerate(pairs)],
+        "threshold": threshold
+    }
+    results = handler.execute_query(build_verify_paths_batch_query(max_length), parameters)
+
+    found: Dict[int, Dict] = {}
+    for record in results:
+        found[record['idx']] = {
+            "path_weight": record['path_weight'],
+            "path_details": record['path_details'],
+            "path_length": record['path_length'],
+        }
+
+    for j, pair in enumerate(pairs):
+        verified_path = found.get(j)
+        for i in pending[pair]:
+            verdicts[i] = verified_path
+        if cache is not None:
+            cache.put(cache.make_key(pair[0], pair[1], threshold, max_length), verified_path, cache_version)
+
+    return verdicts
+
+
+def build_top_k_paths_query(max_length: int = MAX_PATH_LENGTH) -> str:
+    """
+    استعلام Cypher لأقوى $k مسارات بسيطة (بدون تكرار عقد) بين $cause و $effect.
+    يُستخدم فقط عند عدم توفر المحرك المحلي، لأنه يعدد كل المسارات قبل الترتيب.
+    """
+    return f"""
+    MATCH (start:Causal {{name: $cause}}), (target:Causal {{name: $effect}})
+    MATCH p=(start)-[:CAUSES*1..{max_length}]->(target)
+    WHERE all(r_edge IN relationships(p) WHERE r_edge.weight >= $threshold)
+      AND all(n IN nodes(p) WHERE single(m IN nodes(p) WHERE m = n))
+    WITH p, reduce(w = 1.0, r IN relationships(p) | w * r.weight) AS path_weight
+    RETURN 
+        path_weight, 
+        [r IN relationships(p) | {{start: startNode(r).name, end: endNode(r).name, weight: r.weight}}] AS path_details,
+        length(p) AS path_length
+    ORDER BY path_weight DESC 
+    LIMIT $k
+    """
+
+
+def top_k_causal_paths(
+    handler: Neo4jHandler,
+    cause_name: str,
+    effect_name: str,
+    k: int = DEFAULT_TOP_K,
+    threshold: float = TRUST_THRESHOLD,
+    max_length: int = MAX_PATH_LENGTH
+) -> List[Dict]:
+    """
+    يعيد أقوى k مسارات سببية بين سبب ونتيجة (تفسيرات بديلة للحادثة)، مرتبة تنازلياً حسب الوزن.
+
+    المدخلات:
+        handler: كائن اتصال Neo4j، أو InMemoryCausalGraph (خوارزمية Yen مع القطع المبكر).
+        k: عدد المسارات المطلوبة.
+        threshold: الحد الأدنى لوزن الرابط المطلوب (tau).
+        max_length: أقصى عدد من القفزات في المسار.
+
+    المخرجات:
+        قائمة (قد تكون أقصر من k) بنفس بنية نتيجة verify_causal_path؛ العنصر الأول هو نفس نتيجتها.
+    """
+
+    if isinstance(handler, InMemoryCausalGraph):
+        return handler.top_k_paths(cause_name, effect_name, k, threshold, max_length)
+
+    parameters = {
+        "cause": cause_name,
+        "effect": effect_name,
+        "threshold": threshold,
+        "k": k
+    }
+    return list(handler.execute_query(build_top_k_paths_query(max_length), parameters))
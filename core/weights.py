@@ -1,24 +1,100 @@
 from db.neo4j_handler import Neo4jHandler
-from typing import Dict, List
+from typing import Dict, List, Optional
+from .graph_events import notify_edges_updated
 
 # Hyperparameters (يمكن تعديلها في مرحلة الضبط)
 LEARNING_RATE_ETA = 0.1  # معدل التعلم (η): يحدد سرعة تغير الوزن
 
+# استعلام تحديث وزن رابط واحد
+# (النوع المشترك :Causal يسمح باستخدام فهرس Causal(name) بدل مسح كل العقد، انظر db/schema.py)
+UPDATE_EDGE_WEIGHT_QUERY = """
+MATCH (cause:Causal {name: $cause_name})-[r:CAUSES]->(effect:Causal {name: $effect_name})
+SET r.weight = $new_weight
+RETURN elementId(r)
+"""
+
+# استعلامات قراءة وكتابة مستوى الثقة الذاتية
+READ_CONFIDENCE_QUERY = "MATCH (sc:SelfAwareness {name: 'System_Confidence'}) RETURN sc.current_level AS level LIMIT 1"
+
+WRITE_CONFIDENCE_QUERY = """
+MATCH (sc:SelfAwareness {name: 'System_Confidence'})
+SET sc.current_level = $new_level
+RETURN sc.current_level
+"""
+
+# استعلام التحديث المجمّع: يرسل كل فروقات المسار في رحلة واحدة (UNWIND)
+BATCH_WEIGHT_UPDATE_QUERY = """
+UNWIND $edges AS edge
+MATCH (cause:Causal {name: edge.start})-[r:CAUSES]->(effect:Causal {name: edge.end})
+SET r.weight = edge.new_weight
+RETURN collect(elementId(r)) AS edge_ids
+"""
+
+# نفس الاستعلام مع دمج تحديث الثقة الذاتية في نفس المعاملة
+BATCH_WEIGHT_AND_CONFIDENCE_UPDATE_QUERY = """
+UNWIND $edges AS edge
+MATCH (cause:Causal {name: edge.start})-[r:CAUSES]->(effect:Causal {name: edge.end})
+SET r.weight = edge.new_weight
+WITH collect(elementId(r)) AS edge_ids
+OPTIONAL MATCH (sc:SelfAwareness {name: 'System_Confidence'})
+WITH edge_ids, sc, coalesce(sc.current_level, 0.5) + $confidence_step AS raw_level
+WITH edge_ids, sc,
+     CASE WHEN raw_level > 1.0 THEN 1.0 WHEN raw_level < 0.0 THEN 0.0 ELSE raw_level END AS new_level
+SET sc.current_level = round(new_level, 4)
+RETURN edge_ids, round(new_level, 4) AS level
+"""
+
+# تحديث نسبي (فرق يُضاف إلى الوزن الحالي في قاعدة البيانات) بدلاً من كتابة وزن محسوب مسبقاً،
+# حتى لا تُمحى تحديثات كتبتها عمليات أخرى بين قراءة الوزن وكتابته (انظر core/write_behind.py)
+RELATIVE_WEIGHT_UPDATE_QUERY = """
+UNWIND $edges AS edge
+MATCH (cause:Causal {name: edge.start})-[r:CAUSES]->(effect:Causal {name: edge.end})
+WITH edge, r, r.weight + edge.delta AS raw_weight
+SET r.weight = round(CASE WHEN raw_weight > 1.0 THEN 1.0 WHEN raw_weight < 0.0 THEN 0.0 ELSE raw_weight END, 4)
+RETURN edge.start AS start, edge.end AS end, r.weight AS weight
+"""
+
+# زيادة نسبية لمستوى الثقة الذاتية في جملة واحدة (بدون قراءة ثم كتابة).
+# SET sc._lock يأخذ قفل الكتابة على العقدة قبل قراءة current_level، فلا تضيع تحديثات متزامنة.
+INCREMENT_CONFIDENCE_QUERY = """
+MERGE (sc:SelfAwareness {name: 'System_Confidence'})
+ON CREATE SET sc.current_level = 0.5
+SET sc._lock = true
+WITH sc, sc.current_level + $confidence_step AS raw_level
+SET sc.current_level = round(CASE WHEN raw_level > 1.0 THEN 1.0 WHEN raw_level < 0.0 THEN 0.0 ELSE raw_level END, 4)
+REMOVE sc._lock
+RETURN sc.current_level AS level
+"""
+
+
+def _clip_weight(value: float) -> float:
+    """دالة القص (Clip Function) لضمان بقاء الوزن ضمن [0, 1]."""
+    return max(0.0, min(1.0, value))
+
+
 def update_causal_weight(
     handler: Neo4jHandler, 
     path_details: List[Dict], 
     success_delta: float, 
-    eta: float = LEARNING_RATE_ETA
+    eta: float = LEARNING_RATE_ETA,
+    batched: bool = False
 ) -> List[str]:
     """
     يطبق قاعدة تحديث الوزن على كل رابط في المسار السببي الذي تم اختباره.
     ... (باقي التوثيق)
+
+    إذا كان batched=True يتم إرسال كل التحديثات في استعلام UNWIND واحد
+    (انظر update_causal_weights_batched) وتُعاد معرّفات elementId الفعلية للروابط.
     """
     
     updated_edges = []
+    changed_edges = []
     
     if success_delta == 0.0:
         return updated_edges
+
+    if batched:
+        return update_causal_weights_batched(handler, path_details, success_delta, eta)["updated_edges"]
     
     for edge in path_details:
         cause_name = edge['start']
@@ -29,17 +105,10 @@ def update_causal_weight(
         new_weight = current_weight + (eta * success_delta)
         
         # 2. تطبيق دالة القص (Clip Function) لضمان [0, 1]
-        if new_weight > 1.0:
-            new_weight = 1.0
-        elif new_weight < 0.0:
-            new_weight = 0.0
+        new_weight = _clip_weight(new_weight)
             
         # 3. تحديث الرابط في Neo4j باستخدام استعلام Cypher
-        query = """
-        MATCH (cause {name: $cause_name})-[r:CAUSES]->(effect {name: $effect_name})
-        SET r.weight = $new_weight
-        RETURN elementId(r)
-        """
+        query = UPDATE_EDGE_WEIGHT_QUERY
         
         parameters = {
             "cause_name": cause_name,
@@ -59,14 +128,106 @@ def update_causal_weight(
         # الكود الوهمي للعرض (لإظهار النتيجة):
         print(f"  [+] تحديث: {cause_name} -> {effect_name}. الوزن الجديد: {round(new_weight, 4)}")
         updated_edges.append(f"{cause_name}->{effect_name}")
+        changed_edges.append({"start": cause_name, "end": effect_name, "weight": round(new_weight, 4)})
         
         # *إذا كنت تريد أن يكون الكود دقيقاً للإنتاج، يجب أن تكون التحديثات هكذا:*
         # if result and result[0]:
         #     updated_edges.append(result[0]['elementId(r)'])
         # -------------------------------------------------------------------
+
+    # إعلام المستمعين (مثل ذاكرة المسارات المؤقتة) بالروابط التي تغيّر وزنها
+    notify_edges_updated(changed_edges)
         
     return updated_edges
 
+
+def _batched_edge_updates(path_details: List[Dict], success_delta: float, eta: float) -> List[Dict]:
+    """يحسب الأوزان الجديدة لكل روابط المسار كمعاملات لاستعلام UNWIND."""
+    if success_delta == 0.0:
+        return []
+    return [
+        {"start": e['start'], "end": e['end'], "new_weight": round(_clip_weight(e['weight'] + (eta * success_delta)), 4)}
+        for e in path_details
+    ]
+
+
+def update_causal_weights_batched(
+    handler: Neo4jHandler,
+    path_details: List[Dict],
+    success_delta: float,
+    eta: float = LEARNING_RATE_ETA,
+    confidence_delta: Optional[float] = None
+) -> Dict:
+    """
+    نسخة مجمّعة من update_causal_weight: رحلة واحدة إلى Neo4j مهما كان طول المسار.
+
+    المدخلات:
+        handler: كائن اتصال Neo4j.
+        path_details: روابط المسار (start, end, weight).
+        success_delta: إشارة التغذية الراجعة المطبقة على كل رابط.
+        eta: معدل التعلم.
+        confidence_delta: إذا تم تمريره، يُدمج تحديث System_Confidence في نفس المعاملة
+            (بنفس معادلة update_system_confidence).
+
+    المخرجات:
+        قاموس {"updated_edges": [elementId...], "system_confidence": المستوى الجديد أو None}.
+    """
+
+    edges = _batched_edge_updates(path_details, success_delta, eta)
+
+    if not edges and confidence_delta is None:
+        return {"updated_edges": [], "system_confidence": None}
+
+    if confidence_delta is None:
+        result = handler.execute_write(BATCH_WEIGHT_UPDATE_QUERY, {"edges": edges})
+    else:
+        result = handler.execute_write(
+            BATCH_WEIGHT_AND_CONFIDENCE_UPDATE_QUERY,
+            {"edges": edges, "confidence_step": eta * confidence_delta}
+        )
+
+    record = result[0] if result else None
+    edge_ids = list(record["edge_ids"]) if record else []
+    new_level = record["level"] if (record and confidence_delta is not None) else None
+
+    print(f"  [+] تحديث مجمّع: {len(edge_ids)}/{len(edges)} رابط في رحلة واحدة.")
+
+    if edges:
+        notify_edges_updated([{"start": e['start'], "end": e['end'], "weight": e['new_weight']} for e in edges])
+
+    return {"updated_edges": edge_ids, "system_confidence": new_level}
+
+def update_causal_weights_relative(
+    handler: Neo4jHandler,
+    path_details: List[Dict],
+    success_delta: float,
+    eta: float = LEARNING_RATE_ETA
+) -> List[Dict]:
+    """
+    نسخة من update_causal_weights_batched تكتب الفرق (eta * success_delta) نسبياً إلى الوزن
+    الحالي في Neo4j (RELATIVE_WEIGHT_UPDATE_QUERY) بدلاً من وزن محسوب من path_details.
+
+    تُستخدم عندما تأتي المسارات من مصدر قراءة قد يتأخر عن Neo4j (مثل DeltaLogReplica.graph):
+    الكتابة المطلقة من قراءة قديمة تمحو التحديثات التي تمت خلال فترة التأخر.
+
+    المخرجات:
+        الروابط المحدثة بأوزانها الفعلية بعد الكتابة [{"start", "end", "weight"}].
+    """
+
+    if success_delta == 0.0 or not path_details:
+        return []
+
+    edges = [{"start": e['start'], "end": e['end'], "delta": eta * success_delta} for e in path_details]
+    result = handler.execute_write(RELATIVE_WEIGHT_UPDATE_QUERY, {"edges": edges})
+    changed_edges = [{"start": r["start"], "end": r["end"], "weight": r["weight"]} for r in (result or [])]
+
+    print(f"  [+] تحديث نسبي: {len(changed_edges)}/{len(edges)} رابط في رحلة واحدة.")
+
+    if changed_edges:
+        notify_edges_updated(changed_edges)
+
+    return changed_edges
+
 # دالة تحديث الثقة الذاتية
 def update_system_confidence(
     handler: Neo4jHandler, 
@@ -86,26 +247,39 @@ def update_system_confidence(
     """
     
     # 1. استرجاع مستوى الثقة الحالي
-    query_read = "MATCH (sc:SelfAwareness {name: 'System_Confidence'}) RETURN sc.current_level AS level LIMIT 1"
-    result = handler.execute_query(query_read)
+    result = handler.execute_query(READ_CONFIDENCE_QUERY)
+    new_level = _next_confidence_level(result, success_delta, eta)
     
-    if not result or 'level' not in result[0]:
+    # 4. تحديث العقدة في Neo4j
+    handler.execute_query(WRITE_CONFIDENCE_QUERY, {"new_level": new_level})
+    
+    return new_level
+
+
+def update_system_confidence_atomic(
+    handler: Neo4jHandler,
+    success_delta: float,
+    eta: float = LEARNING_RATE_ETA
+) -> float:
+    """
+    نفس update_system_confidence لكن في جملة Cypher واحدة (MERGE ثم SET نسبي تحت قفل الكتابة)،
+    فلا يوجد سباق بين القراءة والكتابة ولا تضيع تحديثات العمليات المتزامنة.
+    """
+    result = handler.execute_write(INCREMENT_CONFIDENCE_QUERY, {"confidence_step": eta * success_delta})
+    return result[0]["level"] if result else None
+
+
+def _next_confidence_level(read_result: List, success_delta: float, eta: float) -> float:
+    """يحسب مستوى الثقة الجديد من نتيجة استعلام القراءة (مشترك مع النسخة غير المتزامنة)."""
+    if not read_result or 'level' not in read_result[0]:
         current_level = 0.5 # قيمة افتراضية إذا لم يتم العثور عليها
     else:
-        current_level = result[0]['level']
+        current_level = read_result[0]['level']
         
     # 2. تطبيق معادلة التحديث (مثل تحديث الأوزان)
     new_level = current_level + (eta * success_delta)
     
     # 3. دالة القص (Clip)
-    new_level = max(0.0, min(1.0, new_level))
-    
-    # 4. تحديث العقدة في Neo4j
-    query_write = """
-    MATCH (sc:SelfAwareness {name: 'System_Confidence'})
-    SET sc.current_level = $new_level
-    RETURN sc.current_level
-    """
-    handler.execute_query(query_write, {"new_level": round(new_level, 4)})
-    
+    new_level = _clip_weight(new_level)
+
     return round(new_level, 4)
\ No newline at end of file
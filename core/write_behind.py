@@ -0,0 +1,226 @@
+import atexit
+import threading
+import time
+from typing import Optional, List, Dict, Tuple
+
+from db.neo4j_handler import Neo4jHandler
+from .confidence_store import get_confidence_store, STRIPE_INCREMENT_QUERY
+from .graph_events import notify_edges_updated
+from .weights import (
+    LEARNING_RATE_ETA,
+    READ_CONFIDENCE_QUERY,
+    RELATIVE_WEIGHT_UPDATE_QUERY,
+    INCREMENT_CONFIDENCE_QUERY,
+    _clip_weight,
+    _next_confidence_level,
+)
+
+# إعدادات التخزين المؤجل للكتابة (write-behind)
+DEFAULT_FLUSH_INTERVAL = 1.0       # أقصى عمر (بالثواني) لأي فرق غير مكتوب = حد التقادم
+DEFAULT_MAX_PENDING_EDGES = 500    # عدد الروابط المعلقة الذي يفرض الكتابة فوراً
+
+
+class LearningBuffer:
+    """
+    ذاكرة وسيطة لتحديثات التعلم: تجمع فروقات الأوزان لكل رابط وفروقات الثقة الذاتية في الذاكرة،
+    وتدمجها (مجموع الفروقات لكل رابط)، ثم تكتبها في معاملة واحدة:
+    - دورياً كل flush_interval ثانية (خيط خلفي)، وهو أيضاً الحد الأقصى لتقادم أي تحديث؛
+    - أو فوراً عند تجاوز max_pending_edges رابطاً معلقاً؛
+    - وعند إغلاق العملية (atexit).
+
+    الكتابة نسبية (r.weight + delta) فلا تعتمد على الوزن الذي قرأته العملية، والقص إلى [0, 1]
+    يُطبق مرة واحدة على مجموع الفروقات. بذلك تتحول N عملية كتابة متنافسة على عقدة
+    System_Confidence إلى عملية واحدة.
+    """
+
+    def __init__(
+        self,
+        handler: Neo4jHandler,
+        eta: float = LEARNING_RATE_ETA,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_pending_edges: int = DEFAULT_MAX_PENDING_EDGES,
+        background: bool = True
+    ):
+        self.handler = handler
+        self.eta = eta
+        self.flush_interval = flush_interval
+        self.max_pending_edges = max_pending_edges
+        self.flushes = 0
+        self.coalesced_updates = 0
+
+        self._edge_deltas: Dict[Tuple[str, str], float] = {}
+        self._confidence_step = 0.0
+        self._confidence_updates = 0
+        self._known_confidence: Optional[float] = None
+        self._oldest_pending: Optional[float] = None
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        if background:
+            self._thread = threading.Thread(target=self._run, name="learning-buffer-flush", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # التجميع
+    # ------------------------------------------------------------------
+
+    def _mark_pending(self):
+        if self._oldest_pending is None:
+            self._oldest_pending = time.monotonic()
+
+    def add_edge_feedback(self, path_details: List[Dict], success_delta: float, eta: Optional[float] = None):
+        """يضيف فرق التعلم (eta * success_delta) لكل رابط في المسار (eta الافتراضي هو eta الذاكرة الوسيطة)."""
+        if success_delta == 0.0 or not path_details:
+            return
+        step = (self.eta if eta is None else eta) * success_delta
+
+        with self._lock:
+            for edge in path_details:
+                key = (edge['start'], edge['end'])
+                self._edge_deltas[key] = self._edge_deltas.get(key, 0.0) + step
+                self.coalesced_updates += 1
+            self._mark_pending()
+            should_flush = len(self._edge_deltas) >= self.max_pending_edges
+
+        if should_flush:
+            self.flush()
+
+    def add_confidence(self, success_delta: float) -> float:
+        """
+        يضيف فرق الثقة الذاتية ويعيد المستوى المتوقع بعد الكتابة (آخر مستوى معروف + الفروقات المعلقة).
+        """
+        with self._lock:
+            # التهيئة تحت القفل: خيط الكتابة يحدّث _known_confidence بعد كل flush
+            if self._known_confidence is None:
+                store = get_confidence_store()
+                if store is not None:
+                    self._known_confidence = store.read(self.handler)
+                else:
+                    self._known_confidence = _next_confidence_level(
+                        self.handler.execute_read(READ_CONFIDENCE_QUERY), 0.0, self.eta
+                    )
+
+            self._confidence_step += self.eta * success_delta
+            self._confidence_updates += 1
+            self._mark_pending()
+            return round(_clip_weight(self._known_confidence + self._confidence_step), 4)
+
+    # ------------------------------------------------------------------
+    # الكتابة
+    # ------------------------------------------------------------------
+
+    def flush(self) -> Dict:
+        """يكتب كل الفروقات المعلقة في معاملة واحدة، ويعيد ملخص ما تمت كتابته."""
+        with self._flush_lock:
+            with self._lock:
+                edge_deltas, self._edge_deltas = self._edge_deltas, {}
+                confidence_step, self._confidence_step = self._confidence_step, 0.0
+                confidence_updates, self._confidence_updates = self._confidence_updates, 0
+                self._oldest_pending = None
+
+            if not edge_deltas and not confidence_updates:
+                return {"edges": 0, "system_confidence": None}
+
+            edges = [{"start": s, "end": e, "delta": d} for (s, e), d in edge_deltas.items()]
+            changed_edges: List[Dict] = []
+            new_level = None
+
+            try:
+                with self.handler.transaction() as tx:
+                    if edges:
+                        changed_edges = [
+                            {"start": r["start"], "end": r["end"], "weight": r["weight"]}
+                            for r in tx.run(RELATIVE_WEIGHT_UPDATE_QUERY, {"edges": edges})
+                        ]
+                    if confidence_updates:
+                        # مع العدادات الفرعية (enable_striped_confidence) يُكتب الفرق في عداد فرعي
+                        # حتى يتفق المستوى هنا مع process_and_learn بدون الكتابة المؤجلة
+                        store = get_confidence_store()
+                        if store is not None:
+                            record = tx.run(STRIPE_INCREMENT_QUERY, store.increment_parameters(confidence_step)).single()
+                            new_level = store._level([record]) if record else None
+                        else:
+                            record = tx.run(INCREMENT_CONFIDENCE_QUERY, {"confidence_step": confidence_step}).single()
+                            new_level = record["level"] if record else None
+            except Exception:
+                # لا نفقد الفروقات: تُعاد إلى الذاكرة الوسيطة لتُكتب في المحاولة التالية
+                with self._lock:
+                    for (s, e), d in edge_deltas.items():
+                        self._edge_deltas[(s, e)] = self._edge_deltas.get((s, e), 0.0) + d
+                    self._confidence_step += confidence_step
+                    self._confidence_updates += confidence_updates
+                    self._mark_pending()
+                raise
+
+            with self._lock:
+                if new_level is not None:
+                    self._known_confidence = new_level
+            self.flushes += 1
+
+            if changed_edges:
+                notify_edges_updated(changed_edges)
+
+            print(f"  [+] كتابة مؤجلة: {len(edges)} رابط و {confidence_updates} تحديث ثقة في معاملة واحدة.")
+            return {"edges": len(changed_edges), "system_confidence": new_level}
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval / 2):
+            oldest = self._oldest_pending
+            if oldest is not None and time.monotonic() - oldest >= self.flush_interval / 2:
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"فشلت الكتابة المؤجلة لتحديثات التعلم (ستُعاد المحاولة): {e}")
+
+    def pending(self) -> Dict:
+        with self._lock:
+            return {
+                "edges": len(self._edge_deltas),
+                "confidence_updates": self._confidence_updates,
+                "oldest_age": (time.monotonic() - self._oldest_pending) if self._oldest_pending else 0.0,
+            }
+
+    def close(self):
+        """يوقف الخيط الخلفي ويكتب ما تبقى (يُستدعى تلقائياً عند إغلاق العملية)."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+            self._thread = None
+        atexit.unregister(self.close)
+        self.flush()
+
+
+# ----------------------------------------------------------------------
+# الذاكرة الوسيطة النشطة (اختيارية، معطلة افتراضياً)
+# ----------------------------------------------------------------------
+
+_active_buffer: Optional[LearningBuffer] = None
+
+
+def enable_write_behind(
+    handler: Neo4jHandler,
+    eta: float = LEARNING_RATE_ETA,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    max_pending_edges: int = DEFAULT_MAX_PENDING_EDGES
+) -> LearningBuffer:
+    """يفعّل الكتابة المؤجلة لتحديثات التعلم في process_and_learn."""
+    global _active_buffer
+    disable_write_behind()
+    _active_buffer = LearningBuffer(handler, eta, flush_interval, max_pending_edges)
+    return _active_buffer
+
+
+def disable_write_behind():
+    """يكتب ما تبقى ويوقف الكتابة المؤجلة."""
+    global _active_buffer
+    if _active_buffer is not None:
+        _active_buffer.close()
+        _active_buffer = None
+
+
+def get_learning_buffer() -> Optional[LearningBuffer]:
+    return _active_buffer
@@ -3,7 +3,7 @@
 
 // ----------------------------------------------------------------------
 // 1. إنشاء العقد الأساسية (Entities, States, Interventions)
-// MERGE هنا لضمان وجود العقد وتعيين المتغيرات الرمزية (s1, e1, etc.)
+// MERGE هنا لضمان وجود العقد (كل جملة مستقلة، والمتغيرات الرمزية لا تنتقل بين الجمل)
 // ----------------------------------------------------------------------
 
 // الحالات (States)
@@ -33,26 +33,34 @@ MERGE (e2:Entity {name: 'Web Server Process'});
 
 // ----------------------------------------------------------------------
 // 2. إنشاء الروابط السببية الموزونة (CAUSES Edges)
-// (نستخدم MERGE مباشرة على المتغيرات الرمزية المعرفة في القسم 1)
+// (كل جملة تطابق طرفيها بالاسم أولاً عبر MATCH ثم تنشئ الرابط بـ MERGE)
 // ----------------------------------------------------------------------
 
 // أ. روابط قوية (لضمان نجاح السيناريو 1 - تم رفع الوزن)
 // الذاكرة المتسربة تسبب استهلاك وحدة المعالجة المركزية
+MATCH (s4:State {name: 'Memory Leak'}), (s1:State {name: 'High CPU Utilization'})
 MERGE (s4)-[:CAUSES {weight: 0.9}]->(s1);
 // استهلاك وحدة المعالجة المركزية يسبب انهيار الخادم
+MATCH (s1:State {name: 'High CPU Utilization'}), (s3:State {name: 'Server Crash'})
 MERGE (s1)-[:CAUSES {weight: 0.95}]->(s3);
 // تباطؤ الاستعلامات يسبب زمن استجابة عالٍ (الهدف للسيناريو 1)
+MATCH (s5:State {name: 'Database Query Slowdown'}), (s2:State {name: 'High Latency'})
 MERGE (s5)-[:CAUSES {weight: 0.98}]->(s2);
 
 // ب. روابط متوسطة (للسيناريو 2 وللتحقق)
 // عملية الخادم تتسبب في استهلاك وحدة المعالجة المركزية
+MATCH (e2:Entity {name: 'Web Server Process'}), (s1:State {name: 'High CPU Utilization'})
 MERGE (e2)-[:CAUSES {weight: 0.75}]->(s1);
 // وحدة التسجيل تسبب تسرب الذاكرة
+MATCH (e1:Entity {name: 'Logging Module'}), (s4:State {name: 'Memory Leak'})
 MERGE (e1)-[:CAUSES {weight: 0.7}]->(s4);
 
 // ج. روابط التدخل (نتائج الإجراءات)
+MATCH (i1:Intervention {name: 'Restart Application Service'}), (e2_end:State {name: 'Server Process Ended'})
 MERGE (i1)-[:CAUSES {weight: 0.85}]->(e2_end);
+MATCH (i3:Intervention {name: 'Optimize Database Index'}), (s5_end:State {name: 'Query Latency Fixed'})
 MERGE (i3)-[:CAUSES {weight: 0.8}]->(s5_end);
+MATCH (i2:Intervention {name: 'Increase RAM Allocation'}), (s4_end:State {name: 'Memory Leak Contained'})
 MERGE (i2)-[:CAUSES {weight: 0.8}]->(s4_end);
 
 // ----------------------------------------------------------------------
@@ -60,6 +68,7 @@ MERGE (i2)-[:CAUSES {weight: 0.8}]->(s4_end);
 // ----------------------------------------------------------------------
 
 // هذا رابط زائفة: بطء الشبكة يسبب انهيار الخادم (عادة غير صحيح مباشرة)
+MATCH (s_net:State {name: 'Network Slowdown'}), (s3:State {name: 'Server Crash'})
 MERGE (s_net)-[:CAUSES {weight: 0.2}]->(s3);
 
 // ----------------------------------------------------------------------
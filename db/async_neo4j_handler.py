@@ -0,0 +1,70 @@
+from typing import Optional, Dict, List, AsyncIterator
+
+from neo4j import AsyncGraphDatabase, READ_ACCESS, WRITE_ACCESS
+
+from core.instrumentation import span, NEO4J
+from .neo4j_handler import DEFAULT_FETCH_SIZE, project_record, _validate_projection
+
+
+class AsyncNeo4jHandler:
+    """
+    النسخة غير المتزامنة (asyncio) من Neo4jHandler.
+
+    المشغّل غير المتزامن يدير مجمع الاتصالات بنفسه، والجلسات خفيفة لكنها غير آمنة
+    للاستخدام المتزامن، لذا نفتح جلسة قصيرة لكل استدعاء.
+    """
+
+    def __init__(self, uri, user, password, database: Optional[str] = None, max_connection_pool_size: int = 100):
+        self.driver = AsyncGraphDatabase.driver(
+            uri, auth=(user, password), max_connection_pool_size=max_connection_pool_size
+        )
+        self.database = database
+
+    async def close(self):
+        await self.driver.close()
+
+    @staticmethod
+    async def _run_and_collect(tx, query: str, parameters: Optional[Dict]) -> List:
+        result = await tx.run(query, parameters)
+        return [record async for record in result]
+
+    async def execute_query(self, query: str, parameters: Optional[Dict] = None) -> List:
+        with span("neo4j.query", NEO4J):
+            async with self.driver.session(database=self.database) as session:
+                result = await session.run(query, parameters)
+                return [record async for record in result]
+
+    async def execute_read(self, query: str, parameters: Optional[Dict] = None) -> List:
+        with span("neo4j.read", NEO4J):
+            async with self.driver.session(database=self.database, default_access_mode=READ_ACCESS) as session:
+                return await session.execute_read(self._run_and_collect, query, parameters)
+
+    async def execute_write(self, query: str, parameters: Optional[Dict] = None) -> List:
+        with span("neo4j.write", NEO4J):
+            async with self.driver.session(database=self.database, default_access_mode=WRITE_ACCESS) as session:
+                return await session.execute_write(self._run_and_collect, query, parameters)
+
+    def stream_query(
+        self,
+        query: str,
+        parameters: Optional[Dict] = None,
+        fetch_size: int = DEFAULT_FETCH_SIZE,
+        projection: str = "record",
+        read_only: bool = True
+    ) -> AsyncIterator:
+        """
+        النسخة غير المتزامنة من Neo4jHandler.stream_query (تُستهلك بـ async for).
+        دالة عادية تتحقق من projection فور الاستدعاء ثم تعيد المولّد غير المتزامن.
+        """
+        _validate_projection(projection)
+        access_mode = READ_ACCESS if read_only else WRITE_ACCESS
+        return self._stream(query, parameters, fetch_size, projection, access_mode)
+
+    async def _stream(self, query: str, parameters: Optional[Dict], fetch_size: int, projection: str, access_mode: str) -> AsyncIterator:
+        async with self.driver.session(
+            database=self.database, default_access_mode=access_mode, fetch_size=fetch_size
+        ) as session:
+            with span("neo4j.stream_open", NEO4J):
+                result = await session.run(query, parameters)
+            async for record in result:
+                yield project_record(record, projection)
@@ -1,29 +1,132 @@
-# استخدام دالة execute_query من الـ Handler
+# استخدام دالة execute_write من الـ Handler
+import time
+from typing import Iterable, Dict, List, Tuple, Union
 
-def create_causal_link(cause_name, cause_type, effect_name, effect_type, initial_weight=0.5):
+from core.graph_events import notify_edges_created
+
+# أنواع العقد المسموح بها (تُدرج مباشرة في نص Cypher، لذا يجب حصرها لتجنب الحقن)
+ALLOWED_NODE_LABELS = {"State", "Intervention", "Entity"}
+
+# حجم دفعة الإدخال المجمّع (عدد الروابط في كل معاملة)
+DEFAULT_INGEST_BATCH_SIZE = 1000
+
+# إدخال مجمّع: MERGE على الرابط بدون الوزن حتى يكون الإدخال المتكرر بلا أثر (idempotent)،
+# والوزن يُعيّن فقط عند الإنشاء حتى لا تُمحى الأوزان التي تعلمها النظام.
+# النوع المشترك Causal يُضاف بـ SET وليس داخل MERGE، حتى لا تتكرر العقد القديمة التي لا تحمله.
+BULK_CAUSAL_LINKS_QUERY = """
+UNWIND $links AS link
+MERGE (cause:{cause_type} {{name: link.cause}})
+MERGE (effect:{effect_type} {{name: link.effect}})
+SET cause:Causal, effect:Causal
+MERGE (cause)-[r:CAUSES]->(effect)
+ON CREATE SET r.weight = link.weight
+"""
+
+CausalLinkRecord = Union[Tuple[str, str, str, str, float], Dict]
+
+
+def _validate_label(label: str) -> str:
+    if label not in ALLOWED_NODE_LABELS:
+        raise ValueError(f"نوع عقدة غير مسموح به: {label!r} (المسموح: {sorted(ALLOWED_NODE_LABELS)})")
+    return label
+
+
+def create_causal_link(handler, cause_name, cause_type, effect_name, effect_type, initial_weight=0.5):
     """
     ينشئ عقدتين ورابطاً سببيًا موجهًا وموزونًا بينهما.
+
+    handler هو المعامل الأول (كائن اتصال Neo4j). الوزن يُعيّن عند إنشاء الرابط فقط (مثل
+    BULK_CAUSAL_LINKS_QUERY)، فالاستدعاء المتكرر لنفس الزوج لا ينشئ رابطاً موازياً ولا يمحو وزناً متعلماً.
     """
     query = """
     MERGE (cause:{cause_type} {{name: $cause_name}})
     MERGE (effect:{effect_type} {{name: $effect_name}})
-    MERGE (cause)-[r:CAUSES {{weight: $weight}}]->(effect)
+    SET cause:Causal, effect:Causal
+    MERGE (cause)-[r:CAUSES]->(effect)
+    ON CREATE SET r.weight = $weight
     RETURN r
     """
-    
+
     # يجب التأكد من تمرير المعلمات بشكل آمن لتجنب حقن Cypher
     parameters = {
         "cause_name": cause_name,
         "effect_name": effect_name,
         "weight": initial_weight
     }
-    
+
     # يجب استبدال {cause_type} و {effect_type} مباشرة في النص لتجنب قيود Cypher على أنواع العقد
-    formatted_query = query.format(cause_type=cause_type, effect_type=effect_type)
-    
+    # (بعد التحقق من أنها ضمن القائمة المسموح بها)
+    formatted_query = query.format(cause_type=_validate_label(cause_type), effect_type=_validate_label(effect_type))
+
     # تنفيذ الاستعلام
-    # handler.execute_query(formatted_query, parameters)
+    handler.execute_write(formatted_query, parameters)
     print(f"تم إنشاء الرابط: {cause_name} ({initial_weight}) -> {effect_name}")
-    
-# مثال للاستخدام (كود وهمي):
-# create_causal_link("ارتفاع درجة الحرارة", "State", "انهيار الخادم", "State", 0.9)
\ No newline at end of file
+
+    # إعلام المستمعين (مثل ذاكرة المسارات المؤقتة) بوجود رابط جديد
+    notify_edges_created([{"start": cause_name, "end": effect_name, "weight": initial_weight}])
+
+
+def bulk_create_causal_links(
+    handler,
+    records: Iterable[CausalLinkRecord],
+    batch_size: int = DEFAULT_INGEST_BATCH_SIZE
+) -> Dict:
+    """
+    إدخال مجمّع لعدد كبير من الروابط السببية (مثلاً من تقارير ما بعد الحوادث).
+
+    المدخلات:
+        handler: كائن اتصال Neo4j.
+        records: أي تسلسل أو مولّد (stream) من السجلات بالشكل
+            (cause, cause_type, effect, effect_type, weight) أو قاموس بنفس المفاتيح.
+        batch_size: عدد الروابط في كل دفعة (كل دفعة = استعلام UNWIND واحد داخل معاملة).
+
+    يتم تجميع السجلات حسب زوج الأنواع (cause_type, effect_type) لأن الأنواع جزء من نص
+    الاستعلام، ويتم إرسال كل دفعة فور امتلائها حتى يبقى استهلاك الذاكرة محدوداً.
+
+    المخرجات:
+        قاموس الإحصاءات: links, batches, seconds, links_per_second.
+    """
+
+    started = time.perf_counter()
+    buffers: Dict[Tuple[str, str], List[Dict]] = {}
+    stats = {"links": 0, "batches": 0}
+
+    def flush(label_pair: Tuple[str, str]):
+        batch = buffers.pop(label_pair, None)
+        if not batch:
+            return
+        query = BULK_CAUSAL_LINKS_QUERY.format(cause_type=label_pair[0], effect_type=label_pair[1])
+        handler.execute_write(query, {"links": batch})
+        notify_edges_created([{"start": l['cause'], "end": l['effect'], "weight": l['weight']} for l in batch])
+        stats["links"] += len(batch)
+        stats["batches"] += 1
+
+    for record in records:
+        if isinstance(record, dict):
+            cause, cause_type = record['cause'], record['cause_type']
+            effect, effect_type = record['effect'], record['effect_type']
+            weight = record.get('weight', 0.5)
+        else:
+            cause, cause_type, effect, effect_type, weight = record
+
+        label_pair = (_validate_label(cause_type), _validate_label(effect_type))
+        batch = buffers.setdefault(label_pair, [])
+        batch.append({"cause": cause, "effect": effect, "weight": float(weight)})
+
+        if len(batch) >= batch_size:
+            flush(label_pair)
+
+    for label_pair in list(buffers):
+        flush(label_pair)
+
+    seconds = time.perf_counter() - started
+    stats["seconds"] = round(seconds, 3)
+    stats["links_per_second"] = round(stats["links"] / seconds, 1) if seconds > 0 else 0.0
+
+    print(f"تم إدخال {stats['links']} رابط في {stats['batches']} دفعة "
+          f"({stats['links_per_second']} رابط/ثانية).")
+    return stats
+
+# مثال للاستخدام:
+# create_causal_link(handler, "ارتفاع درجة الحرارة", "State", "انهيار الخادم", "State", 0.9)
+# bulk_create_causal_links(handler, [("Memory Leak", "State", "Server Crash", "State", 0.8), ...])
@@ -1,14 +1,202 @@
-from neo4j import GraphDatabase
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Iterator
+
+from neo4j import GraphDatabase, READ_ACCESS, WRITE_ACCESS
+
+from core.instrumentation import span, NEO4J
+
+# إعدادات مجمع الجلسات (Session Pool)
+DEFAULT_POOL_SIZE = 10         # أقصى عدد من الجلسات المفتوحة في نفس الوقت
+DEFAULT_ACQUIRE_TIMEOUT = 30.0  # أقصى مدة انتظار (بالثواني) للحصول على جلسة حرة
+
+# قراءة النتائج كتدفق (stream_query)
+DEFAULT_FETCH_SIZE = 1000       # عدد السجلات التي يجلبها المشغّل من الخادم في كل دفعة
+STREAM_PROJECTIONS = ("record", "dict", "tuple")
+
+
+def project_record(record, projection: str = "record"):
+    """
+    يحوّل سجل Neo4j إلى الشكل المطلوب:
+        record: كائن Record كما هو
+        dict:   قاموس بايثون عادي (record.data())
+        tuple:  القيم فقط بترتيب أعمدة RETURN
+    """
+    if projection == "dict":
+        return record.data()
+    if projection == "tuple":
+        return tuple(record.values())
+    return record
+
+
+def _validate_projection(projection: str) -> str:
+    if projection not in STREAM_PROJECTIONS:
+        raise ValueError(f"شكل إسقاط غير معروف: {projection!r} (المتاح: {STREAM_PROJECTIONS})")
+    return projection
+
 
 class Neo4jHandler:
-    def __init__(self, uri, user, password):
+    """
+    معالج الاتصال بالذاكرة Z (Neo4j).
+
+    يعيد استخدام الجلسات من مجمع محدود الحجم بدلاً من فتح جلسة جديدة لكل استعلام،
+    ويفصل بين مسارات القراءة (execute_read) والكتابة (execute_write) حتى يتمكن
+    المشغّل (driver) من توجيه القراءات إلى الخوادم التابعة (followers) في العنقود.
+    """
+
+    def __init__(
+        self,
+        uri,
+        user,
+        password,
+        database: Optional[str] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT
+    ):
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.database = database
+        self.acquire_timeout = acquire_timeout
+
+        # مجمع مستقل لكل نمط وصول، مع حد مشترك لعدد الجلسات المستخدمة
+        self._idle_sessions = {
+            READ_ACCESS: queue.LifoQueue(maxsize=pool_size),
+            WRITE_ACCESS: queue.LifoQueue(maxsize=pool_size),
+        }
+        self._slots = threading.BoundedSemaphore(pool_size)
 
     def close(self):
+        for idle in self._idle_sessions.values():
+            while True:
+                try:
+                    idle.get_nowait().close()
+                except queue.Empty:
+                    break
         self.driver.close()
 
+    # ------------------------------------------------------------------
+    # إدارة الجلسات
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _session(self, access_mode: str = WRITE_ACCESS):
+        """يستعير جلسة من المجمع ويعيدها إليه بعد الاستخدام."""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError("لا توجد جلسة Neo4j متاحة في المجمع خلال المهلة المحددة.")
+
+        try:
+            idle = self._idle_sessions[access_mode]
+            try:
+                session = idle.get_nowait()
+            except queue.Empty:
+                session = self.driver.session(database=self.database, default_access_mode=access_mode)
+
+            healthy = True
+            try:
+                yield session
+            except Exception:
+                # لا نعيد جلسة قد تكون في حالة غير سليمة إلى المجمع
+                healthy = False
+                raise
+            finally:
+                if healthy:
+                    try:
+                        idle.put_nowait(session)
+                    except queue.Full:
+                        session.close()
+                else:
+                    session.close()
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _run_and_collect(tx, query: str, parameters: Optional[Dict]) -> List:
+        # يجب استهلاك النتائج داخل المعاملة قبل إغلاقها
+        result = tx.run(query, parameters)
+        return [record for record in result]
+
+    # ------------------------------------------------------------------
+    # تنفيذ الاستعلامات
+    # ------------------------------------------------------------------
+
     def execute_query(self, query, parameters=None):
-        with self.driver.session() as session:
-            # دالة لتنفيذ الاستعلامات الأساسية
+        with span("neo4j.query", NEO4J), self._session() as session:
+            # دالة لتنفيذ الاستعلامات الأساسية (معاملة تلقائية auto-commit)
             result = session.run(query, parameters)
-            return [record for record in result]
\ No newline at end of file
+            return [record for record in result]
+
+    def execute_read(self, query: str, parameters: Optional[Dict] = None) -> List:
+        """ينفذ استعلام قراءة في معاملة مُدارة قابلة للتوجيه إلى الخوادم التابعة."""
+        with span("neo4j.read", NEO4J), self._session(READ_ACCESS) as session:
+            return session.execute_read(self._run_and_collect, query, parameters)
+
+    def execute_write(self, query: str, parameters: Optional[Dict] = None) -> List:
+        """ينفذ استعلام كتابة في معاملة مُدارة على الخادم الرئيسي (مع إعادة المحاولة التلقائية)."""
+        with span("neo4j.write", NEO4J), self._session(WRITE_ACCESS) as session:
+            return session.execute_write(self._run_and_collect, query, parameters)
+
+    def stream_query(
+        self,
+        query: str,
+        parameters: Optional[Dict] = None,
+        fetch_size: int = DEFAULT_FETCH_SIZE,
+        projection: str = "record",
+        read_only: bool = True
+    ) -> Iterator:
+        """
+        ينفذ استعلاماً ويعيد مولّداً للسجلات بدلاً من قائمة كاملة: المشغّل يجلب fetch_size سجلاً
+        في كل دفعة، فيبقى استهلاك الذاكرة ثابتاً مهما كان عدد الصفوف (تصدير، تحليلات، مسح كبير).
+
+        projection: "record" أو "dict" أو "tuple" (انظر project_record)، ويُتحقق منه فور الاستدعاء.
+        يتم استخدام جلسة مستقلة (خارج المجمع لأن fetch_size إعداد على مستوى الجلسة) مع حجز
+        مكان في حد الجلسات المشترك من أول next() حتى انتهاء المولّد أو إغلاقه (حجزه قبل ذلك
+        يسرّب المكان إذا لم يُستهلك المولّد أبداً).
+
+        المقطع الزمني neo4j.stream_open يقيس بدء الاستعلام وأول دفعة فقط وليس قراءة كل السجلات،
+        لأن زمن الاستهلاك يشمل عمل المستدعي بين السجلات.
+        """
+        _validate_projection(projection)
+        access_mode = READ_ACCESS if read_only else WRITE_ACCESS
+        return self._stream(query, parameters, fetch_size, projection, access_mode)
+
+    def _stream(self, query: str, parameters: Optional[Dict], fetch_size: int, projection: str, access_mode: str) -> Iterator:
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError("لا توجد جلسة Neo4j متاحة في المجمع خلال المهلة المحددة.")
+        try:
+            session = self.driver.session(
+                database=self.database, default_access_mode=access_mode, fetch_size=fetch_size
+            )
+            try:
+                with span("neo4j.stream_open", NEO4J):
+                    result = session.run(query, parameters)
+                for record in result:
+                    yield project_record(record, projection)
+            finally:
+                session.close()
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def transaction(self, read_only: bool = False):
+        """
+        يفتح معاملة صريحة لتنفيذ عدة استعلامات دفعة واحدة.
+
+        مثال:
+            with handler.transaction() as tx:
+                tx.run(query_1, params_1)
+                tx.run(query_2, params_2)
+
+        يتم تأكيد المعاملة (commit) عند الخروج الطبيعي، والتراجع عنها (rollback) عند حدوث خطأ.
+        """
+        access_mode = READ_ACCESS if read_only else WRITE_ACCESS
+        with span("neo4j.transaction", NEO4J), self._session(access_mode) as session:
+            tx = session.begin_transaction()
+            try:
+                yield tx
+                tx.commit()
+            except Exception:
+                if not tx.closed():
+                    tx.rollback()
+                raise
+            finally:
+                tx.close()
@@ -0,0 +1,92 @@
+from typing import List
+
+# ----------------------------------------------------------------------
+# مخطط الذاكرة Z (Neo4j): القيود والفهارس على الخاصية name
+# ----------------------------------------------------------------------
+
+# أنواع العقد التي يتم البحث عنها بالاسم
+NODE_LABELS = ("State", "Intervention", "Entity", "SelfAwareness")
+
+# نوع مشترك يُضاف لكل عقدة تشارك في روابط CAUSES (State / Intervention / Entity).
+# الاستعلامات الساخنة لا تعرف نوع العقدة مسبقاً، فتبحث بـ (n:Causal {name: ...})
+# ليستخدم المخطِّط فهرس Causal(name) بدلاً من مسح جميع العقد.
+CAUSAL_LABEL = "Causal"
+CAUSAL_NODE_LABELS = ("State", "Intervention", "Entity")
+
+# حجم الدفعة عند إضافة النوع المشترك للعقد الموجودة مسبقاً
+BACKFILL_BATCH_SIZE = 10000
+
+# قيد التفرد ينشئ فهرساً ضمنياً، ويمنع تكرار العقد عند تنفيذ MERGE بالتوازي
+LABEL_CONSTRAINT_STATEMENTS = [
+    f"CREATE CONSTRAINT {label.lower()}_name_unique IF NOT EXISTS "
+    f"FOR (n:{label}) REQUIRE n.name IS UNIQUE"
+    for label in NODE_LABELS
+]
+
+# الاسم قد يتكرر بين أنواع مختلفة (State و Entity مثلاً)، لذا فهرس عادي وليس قيد تفرد
+CAUSAL_INDEX_STATEMENT = f"CREATE INDEX causal_name IF NOT EXISTS FOR (n:{CAUSAL_LABEL}) ON (n.name)"
+
+# العدادات الفرعية للثقة الذاتية (core/confidence_store.py): عداد واحد لكل (name, stripe)
+CONFIDENCE_STRIPE_CONSTRAINT_STATEMENT = (
+    "CREATE CONSTRAINT confidence_stripe_unique IF NOT EXISTS "
+    "FOR (s:ConfidenceStripe) REQUIRE (s.name, s.stripe) IS UNIQUE"
+)
+
+SCHEMA_STATEMENTS = LABEL_CONSTRAINT_STATEMENTS + [CAUSAL_INDEX_STATEMENT, CONFIDENCE_STRIPE_CONSTRAINT_STATEMENT]
+
+# إضافة النوع المشترك للعقد القديمة على دفعات (يتطلب معاملة تلقائية auto-commit)
+BACKFILL_CAUSAL_LABEL_QUERY = f"""
+MATCH (n)
+WHERE ({' OR '.join(f'n:{label}' for label in CAUSAL_NODE_LABELS)}) AND NOT n:{CAUSAL_LABEL}
+CALL {{
+    WITH n
+    SET n:{CAUSAL_LABEL}
+}} IN TRANSACTIONS OF {BACKFILL_BATCH_SIZE} ROWS
+"""
+
+# العقد السببية التي لا تحمل النوع المشترك: لا تراها الاستعلامات الساخنة (MATCH (n:Causal {name: ...}))
+COUNT_UNLABELED_CAUSAL_NODES_QUERY = f"""
+MATCH (n)
+WHERE ({' OR '.join(f'n:{label}' for label in CAUSAL_NODE_LABELS)}) AND NOT n:{CAUSAL_LABEL}
+RETURN count(n) AS unlabeled
+"""
+
+
+def apply_schema(handler) -> List[str]:
+    """ينشئ القيود والفهارس (IF NOT EXISTS، لذا يمكن استدعاؤها عند كل تشغيل)."""
+    for statement in SCHEMA_STATEMENTS:
+        handler.execute_query(statement)
+    return SCHEMA_STATEMENTS
+
+
+def backfill_causal_label(handler):
+    """يضيف النوع المشترك Causal للعقد السببية التي أُنشئت قبل اعتماده."""
+    handler.execute_query(BACKFILL_CAUSAL_LABEL_QUERY)
+
+
+def count_unlabeled_causal_nodes(handler) -> int:
+    result = handler.execute_query(COUNT_UNLABELED_CAUSAL_NODES_QUERY)
+    return int(result[0]['unlabeled']) if result else 0
+
+
+def ensure_schema(handler, backfill: bool = True, strict: bool = True) -> List[str]:
+    """
+    نقطة الدخول لإعداد المخطط (تُستدعى عند بدء التشغيل): القيود والفهارس، ثم إضافة النوع المشترك
+    للعقد القديمة. مع strict يُرفع خطأ إذا بقيت عقد سببية بدون Causal، لأن التحقق وتحديث الأوزان
+    لن يجداها (نتيجة None وتحديث صفر روابط بدون أي خطأ).
+    """
+    applied = apply_schema(handler)
+    if backfill:
+        backfill_causal_label(handler)
+    if strict:
+        unlabeled = count_unlabeled_causal_nodes(handler)
+        if unlabeled:
+            raise RuntimeError(
+                f"توجد {unlabeled} عقدة سببية بدون النوع {CAUSAL_LABEL}؛ "
+                f"شغّل ensure_schema(handler, backfill=True) قبل استخدام الذاكرة Z."
+            )
+    print(f"تم تطبيق {len(applied)} قيد/فهرس على الذاكرة Z.")
+    return applied
+
+# مثال للاستخدام:
+# ensure_schema(handler)
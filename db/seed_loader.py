@@ -0,0 +1,155 @@
+import re
+import time
+from typing import List, Dict
+
+from core.graph_events import notify_graph_reloaded
+from db.schema import apply_schema, backfill_causal_label
+
+# ملف الذاكرة الأولية الافتراضي
+DEFAULT_SEED_PATH = "data/seed_knowledge.cypher"
+
+# عدد الجمل في كل معاملة (الجمل داخل المعاملة الواحدة ترى ما كتبته الجمل السابقة)
+DEFAULT_STATEMENTS_PER_TRANSACTION = 500
+
+# أوامر المخطط (schema) لا يمكن خلطها مع أوامر الكتابة في نفس المعاملة
+_SCHEMA_STATEMENT = re.compile(r"^\s*(CREATE|DROP)\s+(\w+\s+)?(INDEX|CONSTRAINT)\b", re.IGNORECASE)
+
+
+def split_cypher_statements(script: str) -> List[str]:
+    """
+    يقسم سكريبت Cypher إلى جمل منفصلة حسب الفاصلة المنقوطة.
+
+    يتجاهل التعليقات (// و /* */) والفواصل المنقوطة الواقعة داخل النصوص ('...' و "...")
+    أو داخل المعرفات المحاطة بـ `...`.
+    """
+
+    statements = []
+    current = []
+    i = 0
+    length = len(script)
+
+    while i < length:
+        char = script[i]
+
+        # النصوص والمعرفات المقتبسة تُنسخ كما هي حتى علامة الإغلاق
+        if char in ("'", '"', "`"):
+            end = i + 1
+            while end < length and script[end] != char:
+                end += 2 if script[end] == "\\" and char != "`" else 1
+            current.append(script[i:end + 1])
+            i = end + 1
+            continue
+
+        if script.startswith("//", i):
+            newline = script.find("\n", i)
+            i = length if newline == -1 else newline
+            continue
+
+        if script.startswith("/*", i):
+            close = script.find("*/", i + 2)
+            i = length if close == -1 else close + 2
+            continue
+
+        if char == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(char)
+        i += 1
+
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+
+    return statements
+
+
+def load_seed_statements(
+    handler,
+    statements: List[str],
+    statements_per_transaction: int = DEFAULT_STATEMENTS_PER_TRANSACTION,
+    create_indexes: bool = True
+) -> Dict:
+    """
+    ينفذ جمل الذاكرة الأولية على Neo4j بأقل عدد من الرحلات.
+
+    - ينشئ قيود وفهارس name أولاً (db/schema.py)، ويضيف النوع المشترك Causal في النهاية (دائماً).
+    - يجمع الجمل المتتالية في معاملات صريحة بحجم statements_per_transaction مع الحفاظ على ترتيبها.
+    - أوامر المخطط الموجودة داخل السكريبت تُنفذ وحدها خارج المعاملات.
+
+    المخرجات:
+        قاموس الإحصاءات: statements, transactions, seconds, statements_per_second.
+    """
+
+    started = time.perf_counter()
+    stats = {"statements": 0, "transactions": 0}
+
+    # قيود وفهارس name أولاً: كل جملة MATCH/MERGE في ملف الذاكرة تبحث بالاسم،
+    # وبدون فهرس يصبح كل بحث مسحاً كاملاً لجميع العقد من نفس النوع.
+    if create_indexes:
+        apply_schema(handler)
+
+    pending: List[str] = []
+
+    def flush():
+        if not pending:
+            return
+        with handler.transaction() as tx:
+            for statement in pending:
+                tx.run(statement).consume()
+        stats["statements"] += len(pending)
+        stats["transactions"] += 1
+        pending.clear()
+
+    for statement in statements:
+        if _SCHEMA_STATEMENT.match(statement):
+            flush()
+            handler.execute_query(statement)
+            stats["statements"] += 1
+            continue
+
+        pending.append(statement)
+        if len(pending) >= statements_per_transaction:
+            flush()
+
+    flush()
+
+    # جمل الملف تنشئ العقد بأنواعها فقط، فنضيف النوع المشترك Causal بعد التحميل دائماً
+    # (حتى بدون create_indexes، وإلا لا تجد الاستعلامات الساخنة أي عقدة من الملف)
+    backfill_causal_label(handler)
+
+    seconds = time.perf_counter() - started
+    stats["seconds"] = round(seconds, 3)
+    stats["statements_per_second"] = round(stats["statements"] / seconds, 1) if seconds > 0 else 0.0
+
+    print(f"تم تحميل {stats['statements']} جملة في {stats['transactions']} معاملة "
+          f"خلال {stats['seconds']} ثانية ({stats['statements_per_second']} جملة/ثانية).")
+
+    # تغير الرسم البياني بالكامل: يجب إسقاط أي ذاكرة مؤقتة مبنية عليه
+    notify_graph_reloaded()
+
+    return stats
+
+
+def load_seed_file(
+    handler,
+    path: str = DEFAULT_SEED_PATH,
+    statements_per_transaction: int = DEFAULT_STATEMENTS_PER_TRANSACTION,
+    create_indexes: bool = True
+) -> Dict:
+    """نقطة الدخول لتحميل ملف الذاكرة الأولية (Seed Knowledge) إلى Neo4j."""
+
+    with open(path, 'r', encoding='utf-8') as f:
+        script = f.read()
+
+    return load_seed_statements(
+        handler,
+        split_cypher_statements(script),
+        statements_per_transaction=statements_per_transaction,
+        create_indexes=create_indexes
+    )
+
+# مثال للاستخدام:
+# load_seed_file(handler, "data/seed_knowledge.cypher")
@@ -4,6 +4,7 @@ from openai import OpenAI
 from db.neo4j_handler import Neo4jHandler
 from core.bridge import process_and_learn, attempt_innovative_solution
 from core.verify_causal import verify_causal_path
+from db.schema import ensure_schema
 import httpx 
 from dotenv import load_dotenv
 
@@ -137,6 +138,9 @@ if __name__ == "__main__":
     
     # ⚠️ هام: تأكد من تشغيل ملف 'data/seed_knowledge.cypher' في Neo4j قبل التنفيذ
     print("--- بدء تشغيل OpenCausal (مع الوعي الذاتي) ---")
+
+    # الفهارس والنوع المشترك Causal: بدونه لا تجد الاستعلامات الساخنة العقد (يفشل هنا بوضوح)
+    ensure_schema(neo4j_handler)
     
     try:
         run_scenario_1_success_and_learn()
@@ -0,0 +1,95 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from core.async_bridge import process_and_learn_async, attempt_innovative_solution_async
+from core.weights import INCREMENT_CONFIDENCE_QUERY
+
+# ----------------------------------------------------------------------
+# 1. بيانات وهمية
+# ----------------------------------------------------------------------
+
+SUCCESS_PATH_RESPONSE = [
+    {
+        "path_weight": 0.855,
+        "path_details": [
+            {"start": "Memory Leak", "end": "High CPU Utilization", "weight": 0.9},
+            {"start": "High CPU Utilization", "end": "Server Crash", "weight": 0.95}
+        ]
+    }
+]
+
+
+def llm_response(content: str):
+    """يبني استجابة وهمية بنفس بنية استجابة AsyncOpenAI."""
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestAsyncBridge(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.mock_handler = MagicMock()
+        self.mock_handler.execute_read = AsyncMock()
+        self.mock_handler.execute_write = AsyncMock(side_effect=self.write)
+        self.mock_llm_client = MagicMock()
+        self.mock_llm_client.chat.completions.create = AsyncMock()
+
+    @staticmethod
+    async def write(query, parameters=None):
+        """الثقة الذاتية تبدأ من 0.8 وتُحدّث بجملة واحدة نسبية؛ كتابة الأوزان تعيد elementId."""
+        if query == INCREMENT_CONFIDENCE_QUERY:
+            return [{"level": round(0.8 + parameters['confidence_step'], 4)}]
+        return [{"edge_ids": ["4:x:1", "4:x:2"]}]
+
+    async def test_01_success_learns_in_one_round_trip(self):
+        """عند النجاح يجب تحديث الأوزان (رحلة واحدة) والثقة الذاتية."""
+
+        self.mock_llm_client.chat.completions.create.return_value = llm_response(
+            json.dumps({"causal_claims": [{"cause": "Memory Leak", "effect": "Server Crash"}]})
+        )
+        self.mock_handler.execute_read.side_effect = [SUCCESS_PATH_RESPONSE]
+
+        result = await process_and_learn_async("نص", self.mock_handler, self.mock_llm_client, feedback_delta=1.0)
+
+        self.assertEqual(result['status'], "Success - Logically Verified and Learned")
+        self.assertAlmostEqual(result['system_confidence'], 0.81)
+        # كتابة واحدة للأوزان (UNWIND) + كتابة واحدة للثقة (بدون قراءة مسبقة)
+        self.assertEqual(self.mock_handler.execute_write.await_count, 2)
+        self.assertEqual(self.mock_handler.execute_read.await_count, 1)
+
+    async def test_02_gap_generates_question(self):
+        """عند فشل التحقق يجب توليد سؤال استكشافي وتقليل الثقة."""
+
+        self.mock_llm_client.chat.completions.create.side_effect = [
+            llm_response(json.dumps([{"cause": "A", "effect": "B"}])),
+            llm_response("ما هي الخطوة المفقودة؟"),
+        ]
+        self.mock_handler.execute_read.side_effect = [[]]
+
+        result = await process_and_learn_async("نص", self.mock_handler, self.mock_llm_client)
+
+        self.assertEqual(result['status'], "Failure - Causal Gap Found (Active Learning)")
+        self.assertIn("المفقودة", result['question'])
+        self.assertAlmostEqual(result['system_confidence'], 0.78)
+
+    async def test_03_innovation_rejects_high_risk(self):
+        """يجب رفض الحل الابتكاري عالي المخاطر."""
+
+        self.mock_handler.execute_read.return_value = [dict(SUCCESS_PATH_RESPONSE[0], path_length=2)]
+        self.mock_llm_client.chat.completions.create.return_value = llm_response(
+            json.dumps({"risk_score": 0.9, "side_effects": "خطر"})
+        )
+
+        result = await attempt_innovative_solution_async(
+            self.mock_handler, self.mock_llm_client, "Memory Leak", "Server Crash"
+        )
+
+        self.assertEqual(result['status'], "Innovative Solution REJECTED")
+
+
+if __name__ == '__main__':
+    unittest.main()
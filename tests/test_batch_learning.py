@@ -0,0 +1,100 @@
+import random
+import unittest
+from unittest.mock import MagicMock
+from core.batch_learning import BatchLearner, retrain_from_feedback, WRITE_EDGE_WEIGHTS_QUERY
+from core.weights import _clip_weight
+
+# ----------------------------------------------------------------------
+# 1. بيانات وهمية
+# ----------------------------------------------------------------------
+
+EDGE_RECORDS = [
+    {"edge_id": "5:x:1", "start": "Memory Leak", "end": "High CPU Utilization", "weight": 0.9},
+    {"edge_id": "5:x:2", "start": "High CPU Utilization", "end": "Server Crash", "weight": 0.95},
+    {"edge_id": "5:x:3", "start": "Network Slowdown", "end": "Server Crash", "weight": 0.2},
+]
+
+
+def learner_from(records):
+    return BatchLearner(
+        [r['edge_id'] for r in records], [r['start'] for r in records],
+        [r['end'] for r in records], [r['weight'] for r in records]
+    )
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestBatchLearner(unittest.TestCase):
+
+    def test_01_matches_sequential_updates_with_chunk_of_one(self):
+        """يجب أن يطابق التشغيل الدفعي (chunk_size=1) التحديث الحدث تلو الآخر حتى مع التشبع."""
+
+        rng = random.Random(1)
+        events = [
+            {"start": r['start'], "end": r['end'], "success_delta": rng.choice([1.0, -0.5, 2.0])}
+            for r in (rng.choice(EDGE_RECORDS) for _ in range(200))
+        ]
+
+        expected = {(r['start'], r['end']): r['weight'] for r in EDGE_RECORDS}
+        for event in events:
+            key = (event['start'], event['end'])
+            expected[key] = _clip_weight(expected[key] + 0.1 * event['success_delta'])
+
+        learner = learner_from(EDGE_RECORDS)
+        learner.replay(events, eta=0.1, chunk_size=1)
+
+        for start, end, weight in zip(learner.starts, learner.ends, learner.weights):
+            self.assertAlmostEqual(weight, expected[(start, end)])
+
+    def test_02_repeated_edges_accumulate_and_unknown_edges_are_skipped(self):
+        """يجب جمع الفروقات المتكررة لنفس الرابط (np.add.at) وتجاهل الروابط غير الموجودة."""
+
+        learner = learner_from(EDGE_RECORDS)
+        path = [{"start": "Network Slowdown", "end": "Server Crash"}, {"start": "Unknown", "end": "Server Crash"}]
+
+        stats = learner.replay([{"path_details": path, "success_delta": 1.0}] * 3, eta=0.1)
+
+        self.assertAlmostEqual(learner.weights[2], 0.5)
+        self.assertEqual(stats['edge_updates'], 3)
+        self.assertEqual(stats['skipped_edges'], 3)
+        self.assertEqual(stats['changed_edges'], 1)
+
+    def test_03_write_back_sends_only_changed_edges_by_element_id(self):
+        """يجب كتابة الأوزان المتغيرة فقط، على دفعات، باستخدام elementId."""
+
+        handler = MagicMock()
+        handler.execute_read.return_value = EDGE_RECORDS
+        events = [
+            {"start": "Memory Leak", "end": "High CPU Utilization", "success_delta": 1.0},
+            {"start": "Network Slowdown", "end": "Server Crash", "success_delta": -1.0},
+        ]
+
+        stats = retrain_from_feedback(handler, events, eta=0.1, batch_size=1)
+
+        self.assertEqual(stats['written_edges'], 2)
+        self.assertEqual(handler.execute_write.call_count, 2)
+        rows = [c.args[1]['rows'][0] for c in handler.execute_write.call_args_list]
+        self.assertEqual(rows, [{"edge_id": "5:x:1", "weight": 1.0}, {"edge_id": "5:x:3", "weight": 0.1}])
+        self.assertEqual(handler.execute_write.call_args.args[0], WRITE_EDGE_WEIGHTS_QUERY)
+
+    def test_04_empty_paths_and_invalid_chunk_size(self):
+        """الحدث بمسار فارغ لا يحدّث أي رابط (ولا يوقف إعادة التشغيل)، و chunk_size < 1 مرفوض."""
+
+        learner = learner_from(EDGE_RECORDS)
+        events = [
+            {"path_details": [], "success_delta": 1.0},
+            {"start": "Network Slowdown", "end": "Server Crash", "success_delta": 1.0},
+        ]
+
+        stats = learner.replay(events, eta=0.1)
+
+        self.assertEqual(stats['events'], 2)
+        self.assertEqual(stats['edge_updates'], 1)
+        self.assertAlmostEqual(learner.weights[2], 0.3)
+        with self.assertRaises(ValueError):
+            learner.replay(events, chunk_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from batch_verify import verify_chunk, run_batch_verification
+from core.graph_engine import InMemoryCausalGraph
+from core.graph_snapshot import export_snapshot
+
+# ----------------------------------------------------------------------
+# 1. بيانات وهمية
+# ----------------------------------------------------------------------
+
+SEED_EDGES = [
+    ("Memory Leak", "High CPU Utilization", 0.9),
+    ("High CPU Utilization", "Server Crash", 0.95),
+    ("Network Slowdown", "Server Crash", 0.3),
+]
+
+CLAIM_LINES = [
+    {"id": "c-1", "cause": "Memory Leak", "effect": "Server Crash"},
+    {"id": "c-2", "cause": "Network Slowdown", "effect": "Server Crash"},
+    {"id": "c-3", "cause": "Network Slowdown", "effect": "Server Crash", "threshold": 0.2},
+]
+
+
+def llm_client_returning(claims):
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices[0].message.content = json.dumps({"causal_claims": claims})
+    return client
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestBatchVerify(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_01_chunk_handles_claims_texts_and_invalid_lines(self):
+        """يجب التحقق من الفرضيات بعتبة كل سطر، واستخلاص فرضيات الأسطر النصية، وتعليم الأسطر غير الصالحة."""
+        graph = InMemoryCausalGraph(SEED_EDGES)
+        lines = [(i + 1, json.dumps(item)) for i, item in enumerate(CLAIM_LINES)]
+        lines += [(4, json.dumps({"text": "memory leak crashed the server"})), (5, "{broken"), (6, '{"cause": "x"}')]
+        client = llm_client_returning([{"cause": "Memory Leak", "effect": "Server Crash"}])
+
+        results = verify_chunk(graph, lines, {"include_paths": True}, llm_client_factory=lambda: client)
+
+        self.assertEqual([r["line"] for r in results], [1, 2, 3, 4, 5, 6])
+        self.assertEqual([r.get("verified") for r in results[:3]], [True, False, True])
+        self.assertEqual(len(results[0]["path_details"]), 2)
+        self.assertTrue(results[3]["claims"][0]["verified"])
+        self.assertIn("error", results[4])
+        self.assertIn("error", results[5])
+
+    def test_02_process_pool_streams_ordered_results_from_snapshot(self):
+        """يجب أن تكتب العمليات المتوازية النتائج بترتيب الإدخال، مع إحصاءات الإنتاجية."""
+        snapshot = self.path("memory_z.snapshot")
+        export_snapshot(InMemoryCausalGraph(SEED_EDGES), snapshot)
+        with open(self.path("claims.jsonl"), "w", encoding="utf-8") as f:
+            for i in range(50):
+                f.write(json.dumps(dict(CLAIM_LINES[i % 3], id=i)) + "\n")
+
+        stats = run_batch_verification(
+            self.path("claims.jsonl"), self.path("results.jsonl"), workers=2, snapshot=snapshot, chunk_size=7
+        )
+
+        with open(self.path("results.jsonl"), encoding="utf-8") as f:
+            results = [json.loads(line) for line in f]
+        self.assertEqual([r["id"] for r in results], list(range(50)))
+        self.assertEqual(stats["claims"], 50)
+        self.assertEqual(stats["verified"], sum(1 for i in range(50) if i % 3 != 1))
+        self.assertEqual(stats["errors"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from benchmarks.generators import scale_free_graph, layered_dag, sample_query_pairs, sample_weights
+from benchmarks.run_benchmarks import run_benchmarks, compare_results, DEFAULT_OPERATIONS
+from core.graph_engine import InMemoryCausalGraph
+import numpy as np
+
+# ----------------------------------------------------------------------
+# فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_01_generators_are_deterministic_acyclic_and_weighted(self):
+        """يجب أن تكون الرسوم المولّدة قابلة للتكرار (نفس seed)، غير دورية، وأوزانها ضمن [0, 1]."""
+        edges = scale_free_graph(300, fan_out=3, weight_distribution="bimodal", seed=7)
+        self.assertEqual(edges, scale_free_graph(300, fan_out=3, weight_distribution="bimodal", seed=7))
+        # الروابط دائماً من عقدة أقدم إلى أحدث
+        self.assertTrue(all(int(s[1:]) < int(e[1:]) for s, e, _ in edges))
+        self.assertTrue(all(0.0 <= w <= 1.0 for _, _, w in edges))
+
+        layered = layered_dag(4, 10, fan_out=2, seed=1)
+        self.assertEqual(len(layered), 3 * 10 * 2)
+        # كل رابط ينتقل من طبقة إلى الطبقة التالية مباشرة
+        self.assertTrue(all(int(e[1:]) // 10 == int(s[1:]) // 10 + 1 for s, e, _ in layered))
+
+        with self.assertRaises(ValueError):
+            sample_weights(np.random.default_rng(0), 5, "gaussian")
+
+    def test_02_query_pairs_are_connected(self):
+        """يجب أن يوجد مسار (دون شرط العتبة) بين كل زوج استعلام مولّد."""
+        edges = layered_dag(5, 20, fan_out=3, seed=3)
+        graph = InMemoryCausalGraph(edges)
+        pairs = sample_query_pairs(edges, 30, max_hops=4, seed=3)
+
+        self.assertEqual(len(pairs), 30)
+        for cause, effect in pairs:
+            self.assertIsNotNone(graph.strongest_path(cause, effect, 0.0, 4))
+
+    def test_03_memory_backend_run_and_regression_compare(self):
+        """يجب أن يقيس كل العمليات على الخلفية المحلية، وأن تكشف المقارنة الصفوف التي تباطأت."""
+        rows = run_benchmarks(sizes=[200], topologies=["scale_free", "layered"], queries=10)
+
+        self.assertEqual(len(rows), 2 * len(DEFAULT_OPERATIONS))
+        self.assertEqual({r["operation"] for r in rows}, set(DEFAULT_OPERATIONS))
+        self.assertTrue(all(r["backend"] == "memory" and r["runs"] > 0 for r in rows))
+
+        previous = {"results": [dict(r) for r in rows]}
+        current = {"results": [dict(r, p50_ms=r["p50_ms"] * (2.0 if i == 0 else 1.0)) for i, r in enumerate(rows)]}
+        regressions = compare_results(previous, current, tolerance=0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0]["operation"], rows[0]["operation"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,9 @@
 import unittest
 from unittest.mock import MagicMock, patch
-from core.verify_causal import verify_causal_path, TRUST_THRESHOLD
+from core.verify_causal import verify_causal_path, verify_causal_paths_batch, TRUST_THRESHOLD
 from core.weights import update_causal_weight
 from core.bridge import process_and_learn, attempt_innovative_solution
+from core.write_behind import enable_write_behind, disable_write_behind
 
 # ----------------------------------------------------------------------
 # 1. إعداد البيانات الوهمية (Mock Data)
@@ -157,5 +158,66 @@ class TestCausalBridge(unittest.TestCase):
         mock_assess_risk.assert_called_once()
         mock_find_path.assert_called_once()
 
+    # =========================================================
+    # 6. التحقق من كل الفرضيات دفعة واحدة (Batch Verification)
+    # =========================================================
+
+    def test_07_batch_verification_single_query(self):
+        """يجب التحقق من كل الأزواج في استعلام واحد وإعادة حكم لكل فرضية بنفس الترتيب."""
+
+        claims = [
+            {"cause": "Memory Leak", "effect": "Server Crash"},
+            {"cause": "Network Slowdown", "effect": "Server Crash"},
+            {"cause": "Memory Leak", "effect": "Server Crash"},
+        ]
+        self.mock_handler.execute_query.return_value = [dict(SUCCESS_PATH_RESPONSE[0], idx=0, path_length=2)]
+
+        verdicts = verify_causal_paths_batch(self.mock_handler, claims)
+
+        self.mock_handler.execute_query.assert_called_once()
+        sent_pairs = self.mock_handler.execute_query.call_args.args[1]['pairs']
+        self.assertEqual(len(sent_pairs), 2) # الأزواج المكررة تُرسل مرة واحدة
+        self.assertIsNotNone(verdicts[0])
+        self.assertIsNone(verdicts[1])
+        self.assertEqual(verdicts[0], verdicts[2])
+
+    @patch('core.bridge.update_system_confidence', return_value=0.91)
+    @patch('core.bridge.verify_causal_paths_batch', return_value=[None, SUCCESS_PATH_RESPONSE[0]])
+    @patch('core.bridge.extract_causal_claims_from_llm', return_value=[
+        {"cause": "A", "effect": "B"}, {"cause": "Memory Leak", "effect": "Server Crash"}
+    ])
+    def test_08_process_and_learn_verifies_all_claims(self, mock_extract, mock_batch, mock_confidence):
+        """يجب أن تنجح العملية إذا تم التحقق من أي فرضية، مع حكم مستقل لكل فرضية."""
+
+        result = process_and_learn("نص", self.mock_handler, self.mock_llm_client, verify_all_claims=True)
+
+        self.assertEqual(result['status'], "Success - Logically Verified and Learned")
+        self.assertEqual([v['verified'] for v in result['claim_verdicts']], [False, True])
+        mock_batch.assert_called_once()
+
+    @patch('core.bridge.verify_causal_paths_batch', return_value=[
+        SUCCESS_PATH_RESPONSE[0],
+        {"path_weight": 0.9, "path_details": [{"start": "Memory Leak", "end": "High CPU Utilization", "weight": 0.9}]},
+    ])
+    @patch('core.bridge.extract_causal_claims_from_llm', return_value=[
+        {"cause": "Memory Leak", "effect": "Server Crash"}, {"cause": "Memory Leak", "effect": "High CPU Utilization"}
+    ])
+    def test_09_shared_edge_of_verified_claims_is_learned_once(self, mock_extract, mock_batch):
+        """يجب أن يُطبق فرق التعلم مرة واحدة على الرابط المشترك بين مسارات عدة فرضيات، في كل أنماط الكتابة."""
+
+        self.mock_handler.execute_write.return_value = [{"edge_ids": [], "level": 0.6}]
+        process_and_learn("نص", self.mock_handler, self.mock_llm_client,
+                          feedback_delta=1.0, batched_learning=True, verify_all_claims=True)
+        sent_edges = self.mock_handler.execute_write.call_args.args[1]['edges']
+        self.assertEqual([(e['start'], e['end']) for e in sent_edges],
+                         [("Memory Leak", "High CPU Utilization"), ("High CPU Utilization", "Server Crash")])
+
+        buffer = enable_write_behind(self.mock_handler, eta=0.1, flush_interval=3600)
+        self.addCleanup(disable_write_behind)
+        self.mock_handler.execute_read.return_value = [{'level': 0.5}]
+        process_and_learn("نص", self.mock_handler, self.mock_llm_client,
+                          feedback_delta=1.0, verify_all_claims=True)
+        self.assertAlmostEqual(buffer._edge_deltas[("Memory Leak", "High CPU Utilization")], 0.1)
+
 if __name__ == '__main__':
     unittest.main()
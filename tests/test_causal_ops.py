@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import MagicMock
+from db.causal_ops import bulk_create_causal_links, create_causal_link
+
+# ----------------------------------------------------------------------
+# فئة الاختبار (الإدخال المجمّع للروابط السببية)
+# ----------------------------------------------------------------------
+
+class TestBulkCausalLinks(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_handler = MagicMock()
+
+    def test_01_records_are_grouped_by_label_pair_and_batched(self):
+        """يجب تجميع السجلات حسب زوج الأنواع وإرسالها في دفعات بالحجم المحدد."""
+
+        records = (
+            (f"Cause {i}", "State", f"Effect {i}", "State" if i % 2 else "Intervention", 0.7)
+            for i in range(10)
+        )
+
+        stats = bulk_create_causal_links(self.mock_handler, records, batch_size=2)
+
+        self.assertEqual(stats['links'], 10)
+        # 5 سجلات لكل زوج أنواع -> 3 دفعات لكل زوج
+        self.assertEqual(stats['batches'], 6)
+        self.assertEqual(self.mock_handler.execute_write.call_count, 6)
+
+        queries = {c.args[0] for c in self.mock_handler.execute_write.call_args_list}
+        self.assertEqual(len(queries), 2)
+        self.assertTrue(all("UNWIND $links" in q for q in queries))
+
+    def test_02_dict_records_are_accepted(self):
+        """يجب قبول السجلات بصيغة القاموس."""
+
+        stats = bulk_create_causal_links(self.mock_handler, [
+            {"cause": "Memory Leak", "cause_type": "State", "effect": "Server Crash", "effect_type": "State"}
+        ])
+
+        self.assertEqual(stats['links'], 1)
+        sent = self.mock_handler.execute_write.call_args.args[1]['links']
+        self.assertEqual(sent, [{"cause": "Memory Leak", "effect": "Server Crash", "weight": 0.5}])
+
+    def test_03_labels_are_whitelisted(self):
+        """يجب رفض أنواع العقد غير المسموح بها (منع حقن Cypher)."""
+
+        with self.assertRaises(ValueError):
+            bulk_create_causal_links(self.mock_handler, [("A", "State) DETACH DELETE (x", "B", "State", 0.5)])
+        with self.assertRaises(ValueError):
+            create_causal_link(self.mock_handler, "A", "Admin", "B", "State", 0.5)
+
+        self.mock_handler.execute_write.assert_not_called()
+
+    def test_04_single_link_merges_without_weight(self):
+        """يجب ألا يكون الوزن جزءاً من MERGE حتى لا ينشئ الاستدعاء المتكرر رابطاً موازياً."""
+
+        create_causal_link(self.mock_handler, "Memory Leak", "State", "Server Crash", "State", 0.9)
+
+        query, parameters = self.mock_handler.execute_write.call_args.args
+        self.assertIn("MERGE (cause)-[r:CAUSES]->(effect)", query)
+        self.assertIn("ON CREATE SET r.weight = $weight", query)
+        self.assertNotIn("{weight:", query)
+        self.assertEqual(parameters["weight"], 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()
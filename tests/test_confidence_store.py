@@ -0,0 +1,173 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+from core.async_bridge import process_and_learn_async
+from core.bridge import process_and_learn
+from core.confidence_store import (
+    StripedConfidenceStore,
+    STRIPE_INCREMENT_QUERY,
+    READ_STRIPED_CONFIDENCE_QUERY,
+    COMPACT_CONFIDENCE_QUERY,
+    enable_striped_confidence,
+    disable_striped_confidence,
+)
+from core.write_behind import LearningBuffer
+
+# ----------------------------------------------------------------------
+# 1. ذاكرة وهمية تطبق دلالة استعلامات العدادات الفرعية
+# ----------------------------------------------------------------------
+
+def clip(value, low=0.0, high=1.0):
+    return max(low, min(high, value))
+
+
+class FakeConfidenceGraph:
+    """يحاكي STRIPE_INCREMENT / READ / COMPACT كما تنفذها Neo4j (بما فيها قص مساهمة كل عداد)."""
+
+    def __init__(self, base=0.5):
+        self.base = base
+        self.stripes = {}
+        self.queries = []
+
+    def execute_write(self, query, parameters):
+        self.queries.append(query)
+        if query == STRIPE_INCREMENT_QUERY:
+            raw = self.stripes.get(parameters['stripe'], 0.0) + parameters['step']
+            self.stripes[parameters['stripe']] = clip(raw, -self.base, 1.0 - self.base)
+            return [{"base": self.base, "delta": sum(self.stripes.values())}]
+        if query == COMPACT_CONFIDENCE_QUERY:
+            self.base = round(clip(self.base + sum(self.stripes.values())), 4)
+            self.stripes = {stripe: 0.0 for stripe in self.stripes}
+            return [{"level": self.base}]
+        raise AssertionError(query)
+
+    def execute_read(self, query, parameters):
+        assert query == READ_STRIPED_CONFIDENCE_QUERY
+        return [{"base": self.base, "delta": sum(self.stripes.values())}]
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار (العدادات الفرعية للثقة الذاتية)
+# ----------------------------------------------------------------------
+
+class TestStripedConfidenceStore(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(disable_striped_confidence)
+        self.mock_handler = MagicMock()
+
+    def test_01_update_writes_one_stripe_and_returns_aggregate(self):
+        """يجب أن يكتب التحديث فرقه في عداد فرعي ويعيد المستوى المُجمّع (مع القص)."""
+
+        store = StripedConfidenceStore(stripes=8)
+        self.mock_handler.execute_write.return_value = [{"base": 0.9, "delta": 0.25}]
+
+        level = store.update(self.mock_handler, success_delta=0.1, eta=0.1)
+
+        self.assertEqual(level, 1.0)
+        query, parameters = self.mock_handler.execute_write.call_args.args
+        self.assertEqual(query, STRIPE_INCREMENT_QUERY)
+        self.assertIn(parameters['stripe'], range(8))
+        self.assertAlmostEqual(parameters['step'], 0.01)
+
+    def test_02_threads_spread_over_stripes(self):
+        """يجب أن تكتب الخيوط المختلفة في عدادات مختلفة (تقليل المنافسة على الأقفال)."""
+
+        store = StripedConfidenceStore(stripes=64)
+        stripes = set()
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            stripes.add(store._stripe())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertGreater(len(stripes), 1)
+
+    def test_03_compact_folds_stripes_into_base(self):
+        """يجب أن يدمج الضغط العدادات في المستوى الأساسي في جملة واحدة."""
+
+        store = StripedConfidenceStore()
+        self.mock_handler.execute_write.return_value = [{"level": 0.83}]
+
+        self.assertEqual(store.compact(self.mock_handler), 0.83)
+        self.assertEqual(self.mock_handler.execute_write.call_args.args[0], COMPACT_CONFIDENCE_QUERY)
+
+    def test_04_process_and_learn_uses_active_store(self):
+        """يجب أن يحدّث process_and_learn الثقة عبر العدادات الفرعية عند تفعيلها."""
+
+        enable_striped_confidence()
+        llm_client = MagicMock()
+        llm_client.chat.completions.create.return_value.choices[0].message.content = '{"causal_claims": []}'
+        self.mock_handler.execute_write.return_value = [{"base": 0.8, "delta": -0.02}]
+
+        result = process_and_learn("نص", self.mock_handler, llm_client)
+
+        self.assertEqual(result['system_confidence'], 0.78)
+        self.mock_handler.execute_query.assert_not_called()
+        self.assertEqual(self.mock_handler.execute_write.call_args.args[0], STRIPE_INCREMENT_QUERY)
+
+    def test_05_failures_after_saturation_are_visible(self):
+        """بعد التشبع عند 1.0 يجب ألا يخفي فائض النجاحات الإخفاقات التالية."""
+
+        graph = FakeConfidenceGraph(base=0.95)
+        store = StripedConfidenceStore(stripes=4, compact_every=0)
+
+        for _ in range(100):
+            level = store.update(graph, success_delta=0.1)
+        self.assertEqual(level, 1.0)
+
+        self.assertEqual(store.update(graph, success_delta=-0.2), 0.98)
+        self.assertEqual(store.update(graph, success_delta=-0.2), 0.96)
+
+    def test_06_compaction_runs_every_n_updates(self):
+        """يجب دمج العدادات في المستوى الأساسي تلقائياً كل compact_every تحديث."""
+
+        graph = FakeConfidenceGraph(base=0.5)
+        store = StripedConfidenceStore(stripes=4, compact_every=4)
+
+        levels = [store.update(graph, success_delta=0.1) for _ in range(8)]
+
+        self.assertEqual(graph.queries.count(COMPACT_CONFIDENCE_QUERY), 2)
+        self.assertEqual(levels[-1], 0.58)
+        self.assertEqual(graph.base, 0.58)
+        self.assertEqual(sum(graph.stripes.values()), 0.0)
+
+    def test_07_async_bridge_and_write_behind_use_active_store(self):
+        """يجب أن يمر process_and_learn_async والكتابة المؤجلة عبر العدادات الفرعية عند تفعيلها."""
+
+        enable_striped_confidence()
+        graph = FakeConfidenceGraph(base=0.8)
+
+        handler = MagicMock()
+        handler.execute_read = AsyncMock(side_effect=graph.execute_read)
+        handler.execute_write = AsyncMock(side_effect=graph.execute_write)
+        llm_client = MagicMock()
+        llm_client.chat.completions.create = AsyncMock()
+        llm_client.chat.completions.create.return_value.choices[0].message.content = '{"causal_claims": []}'
+
+        result = asyncio.run(process_and_learn_async("نص", handler, llm_client))
+        self.assertEqual(result['system_confidence'], 0.78)
+        self.assertEqual(graph.queries, [STRIPE_INCREMENT_QUERY])
+
+        sync_handler = MagicMock()
+        sync_handler.execute_read.side_effect = graph.execute_read
+        tx = sync_handler.transaction.return_value.__enter__.return_value
+        tx.run.side_effect = lambda query, parameters: MagicMock(
+            single=MagicMock(return_value=graph.execute_write(query, parameters)[0])
+        )
+        buffer = LearningBuffer(sync_handler, background=False)
+        self.addCleanup(buffer.close)
+
+        self.assertEqual(buffer.add_confidence(-0.2), 0.76)
+        self.assertEqual(buffer.flush()["system_confidence"], 0.76)
+        self.assertEqual(graph.queries, [STRIPE_INCREMENT_QUERY, STRIPE_INCREMENT_QUERY])
+
+
+if __name__ == '__main__':
+    unittest.main()
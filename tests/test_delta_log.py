@@ -0,0 +1,177 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from core.bridge import process_and_learn
+from core.delta_log import DeltaLogReplica, enable_delta_log, disable_delta_log
+from core.graph_engine import InMemoryCausalGraph
+from core.weights import update_causal_weight, RELATIVE_WEIGHT_UPDATE_QUERY
+from db.causal_ops import bulk_create_causal_links
+
+# ----------------------------------------------------------------------
+# فئة الاختبار (سجل التغييرات والنسخ المحلية)
+# ----------------------------------------------------------------------
+
+class TestDeltaLog(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(disable_delta_log)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.log_path = os.path.join(self.tmp_dir.name, "causal_delta.log")
+        self.mock_handler = MagicMock()
+
+    def test_01_replica_follows_writes_from_weights_and_causal_ops(self):
+        """يجب أن تطبق النسخة المحلية الروابط الجديدة وتحديثات الأوزان من السجل."""
+
+        writer = enable_delta_log(self.log_path)
+        replica = DeltaLogReplica(self.log_path, max_lag=0.0)
+
+        bulk_create_causal_links(self.mock_handler, [
+            ("Memory Leak", "State", "High CPU Utilization", "State", 0.9),
+            ("High CPU Utilization", "State", "Server Crash", "State", 0.95),
+        ])
+        update_causal_weight(self.mock_handler, [
+            {"start": "Memory Leak", "end": "High CPU Utilization", "weight": 0.9}
+        ], success_delta=1.0)
+
+        graph = replica.graph
+        self.assertEqual(writer.entries_written, 2)
+        self.assertEqual(graph.edge_count, 2)
+        self.assertAlmostEqual(graph.get_weight("Memory Leak", "High CPU Utilization"), 1.0)
+
+    def test_02_partial_lines_and_created_edges_are_handled_safely(self):
+        """يجب تجاهل السطر غير المكتمل، وألا يغير حدث الإنشاء وزن رابط موجود."""
+
+        writer = enable_delta_log(self.log_path)
+        replica = DeltaLogReplica(self.log_path, max_lag=0.0)
+
+        writer.append("edges_updated", [{"start": "A", "end": "B", "weight": 0.8}])
+        writer.append("edges_created", [{"start": "A", "end": "B", "weight": 0.5}])
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write('{"event": "edges_updated", "edges": [{"start": "A"')
+
+        self.assertEqual(replica.poll(), 2)
+        self.assertEqual(replica.graph.get_weight("A", "B"), 0.8)
+
+    def test_03_bounded_lag_and_bootstrap_from_handler(self):
+        """يجب ألا تُقرأ الأسطر الجديدة قبل انقضاء max_lag، وأن يبدأ التتبع من نهاية السجل."""
+
+        writer = enable_delta_log(self.log_path)
+        writer.append("edges_updated", [{"start": "Old", "end": "Edge", "weight": 0.9}])
+        self.mock_handler.execute_read.return_value = [{"start": "A", "end": "B", "weight": 0.6}]
+
+        replica = DeltaLogReplica(self.log_path, handler=self.mock_handler, max_lag=3600)
+        writer.append("edges_updated", [{"start": "A", "end": "B", "weight": 0.7}])
+
+        self.assertEqual(replica.graph.get_weight("A", "B"), 0.6)
+        replica.poll()
+        self.assertEqual(replica.graph.get_weight("A", "B"), 0.7)
+        self.assertIsNone(replica.graph.get_weight("Old", "Edge"))
+
+    def test_04_process_and_learn_reads_from_replica(self):
+        """يجب أن يتم التحقق من النسخة المحلية وتبقى الكتابة فقط على Neo4j."""
+
+        replica = DeltaLogReplica(self.log_path, max_lag=0.0)
+        replica.graph.set_weight("Memory Leak", "Server Crash", 0.9)
+        llm_client = MagicMock()
+        llm_client.chat.completions.create.return_value.choices[0].message.content = \
+            '{"causal_claims": [{"cause": "Memory Leak", "effect": "Server Crash"}]}'
+        self.mock_handler.execute_query.return_value = [{'level': 0.5}]
+
+        result = process_and_learn("نص", self.mock_handler, llm_client, read_handler=replica.graph)
+
+        self.assertTrue(result['status'].startswith("Success"))
+        queries = [c.args[0] for c in self.mock_handler.execute_query.call_args_list]
+        self.assertFalse(any("CAUSES*" in q for q in queries))
+
+    def test_05_malformed_lines_are_skipped_once(self):
+        """يجب تجاوز السطر التالف وعدّه، مع تقدم الموضع فلا يُعاد قراءته في كل مرة."""
+
+        writer = enable_delta_log(self.log_path)
+        replica = DeltaLogReplica(self.log_path, max_lag=0.0)
+
+        writer.append("edges_updated", [{"start": "A", "end": "B", "weight": 0.8}])
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write('{"event": broken}\n{"event": "edges_updated"}\n')
+        writer.append("edges_updated", [{"start": "B", "end": "C", "weight": 0.7}])
+
+        self.assertEqual(replica.poll(), 2)
+        self.assertEqual(replica.entries_skipped, 2)
+        self.assertEqual(replica.poll(), 0)
+        self.assertEqual(replica.graph.get_weight("B", "C"), 0.7)
+
+    def test_06_updates_are_published_as_a_new_graph(self):
+        """يجب ألا يتغير الرسم الذي يقرأه خيط آخر أثناء تطبيق السطور؛ النسخة الجديدة تستبدل المرجع."""
+
+        writer = enable_delta_log(self.log_path)
+        replica = DeltaLogReplica(self.log_path, max_lag=3600)
+        writer.append("edges_updated", [{"start": "A", "end": "B", "weight": 0.8}])
+        replica.poll()
+        reader_graph = replica.graph
+
+        writer.append("edges_updated", [{"start": "A", "end": "B", "weight": 0.3}, {"start": "B", "end": "C", "weight": 0.9}])
+        replica.poll()
+
+        self.assertIsNot(replica.graph, reader_graph)
+        self.assertEqual(reader_graph.get_weight("A", "B"), 0.8)
+        self.assertEqual(reader_graph.edge_count, 1)
+        self.assertEqual(replica.graph.get_weight("A", "B"), 0.3)
+        self.assertEqual(replica.graph.strongest_path("A", "C", 0.1, 3)['path_length'], 2)
+
+    def test_07_rotation_keeps_replicas_complete(self):
+        """يجب تدوير السجل عند تجاوز الحجم، وأن تكمل النسخة المحلية الملف السابق ثم الجديد."""
+
+        writer = enable_delta_log(self.log_path, max_bytes=300)
+        replica = DeltaLogReplica(self.log_path, max_lag=3600)
+
+        def append(i):
+            writer.append("edges_updated", [{"start": f"N{i}", "end": f"N{i + 1}", "weight": 0.9}])
+
+        append(0)
+        append(1)
+        self.assertEqual(replica.poll(), 2)
+
+        # السطر الثالث يتجاوز الحد (~120 بايت للسطر) فيُدوّر السجل، والرابع يُكتب في الملف الجديد
+        append(2)
+        append(3)
+        self.assertEqual(writer.rotations, 1)
+        self.assertTrue(os.path.exists(self.log_path + ".1"))
+
+        self.assertEqual(replica.poll(), 2)
+        self.assertEqual(replica.graph.edge_count, 4)
+        self.assertEqual(replica.graph.strongest_path("N0", "N4", 0.5, 4)['path_length'], 4)
+
+    def test_08_learning_from_lagging_replica_writes_relative_deltas(self):
+        """يجب ألا تمحو الأوزان القديمة في النسخة المحلية التحديثات التي تمت خلال فترة التأخر."""
+
+        enable_delta_log(self.log_path)
+        replica = DeltaLogReplica(self.log_path, graph=InMemoryCausalGraph([("A", "B", 0.6)]), max_lag=3600)
+        stored = {("A", "B"): 0.6}
+
+        def execute_write(query, parameters=None):
+            self.assertEqual(query, RELATIVE_WEIGHT_UPDATE_QUERY)
+            rows = []
+            for edge in parameters["edges"]:
+                key = (edge["start"], edge["end"])
+                stored[key] = round(min(1.0, max(0.0, stored[key] + edge["delta"])), 4)
+                rows.append({"start": key[0], "end": key[1], "weight": stored[key]})
+            return rows
+
+        self.mock_handler.execute_write.side_effect = execute_write
+        self.mock_handler.execute_query.return_value = [{'level': 0.5}]
+        llm_client = MagicMock()
+        llm_client.chat.completions.create.return_value.choices[0].message.content = \
+            '{"causal_claims": [{"cause": "A", "effect": "B"}]}'
+
+        for _ in range(3):
+            process_and_learn("نص", self.mock_handler, llm_client, feedback_delta=1.0, read_handler=replica.graph)
+
+        self.assertEqual(replica.graph.get_weight("A", "B"), 0.6)   # النسخة المحلية ما زالت متأخرة
+        self.assertAlmostEqual(stored[("A", "B")], 0.9)
+        self.assertEqual(replica.poll(), 3)
+        self.assertAlmostEqual(replica.graph.get_weight("A", "B"), 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()
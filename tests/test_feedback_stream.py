@@ -0,0 +1,130 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+from core.feedback_stream import FeedbackConsumer, read_feedback_jsonl, apply_feedback_file
+from core.graph_engine import InMemoryCausalGraph
+from core.weights import RELATIVE_WEIGHT_UPDATE_QUERY
+from core.write_behind import enable_write_behind, disable_write_behind
+
+# ----------------------------------------------------------------------
+# 1. بيانات وهمية
+# ----------------------------------------------------------------------
+
+SEED_EDGES = [
+    ("Memory Leak", "High CPU Utilization", 0.9),
+    ("High CPU Utilization", "Server Crash", 0.95),
+]
+
+FEEDBACK = [
+    {"cause": "Memory Leak", "effect": "Server Crash", "success_delta": 1.0},
+    {"cause": "Unknown", "effect": "Server Crash", "success_delta": 1.0},
+    {"path_details": [{"start": "Memory Leak", "end": "High CPU Utilization", "weight": 0.9}], "success_delta": -1.0},
+]
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestFeedbackStream(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "feedback.jsonl")
+        self.mock_handler = MagicMock()
+
+    def test_01_jsonl_reader_skips_invalid_lines(self):
+        """يجب أن يقرأ المولّد الأحداث سطراً سطراً ويتجاهل الأسطر غير الصالحة."""
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(FEEDBACK[0]) + "\n{not json}\n\n" + json.dumps(FEEDBACK[1]))
+
+        events = list(read_feedback_jsonl(self.path))
+
+        self.assertEqual(events, FEEDBACK[:2])
+
+    def test_02_events_are_resolved_to_paths_and_applied(self):
+        """يجب تحويل كل حدث إلى مسار عبر verify_causal_path ثم تحديث أوزانه نسبياً دفعة واحدة."""
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(e) + "\n" for e in FEEDBACK)
+
+        stats = apply_feedback_file(self.mock_handler, self.path, read_handler=InMemoryCausalGraph(SEED_EDGES))
+
+        self.assertEqual(stats, {"received": 3, "applied": 2, "unresolved": 1, "errors": 0})
+        self.assertEqual(self.mock_handler.execute_write.call_count, 2)
+        first_update = self.mock_handler.execute_write.call_args_list[0].args
+        self.assertEqual(first_update[0], RELATIVE_WEIGHT_UPDATE_QUERY)
+        self.assertEqual(len(first_update[1]['edges']), 2)
+        self.assertAlmostEqual(first_update[1]['edges'][0]['delta'], 0.1)
+
+    def test_03_full_queue_applies_backpressure(self):
+        """يجب أن يرفض الطابور الممتلئ أحداثاً جديدة بدلاً من النمو بلا حد."""
+
+        release = threading.Event()
+        self.mock_handler.execute_write.side_effect = lambda *args: release.wait() and []
+        consumer = FeedbackConsumer(self.mock_handler, read_handler=InMemoryCausalGraph(SEED_EDGES), maxsize=1)
+
+        event = FEEDBACK[0]
+        self.assertTrue(consumer.submit(event))      # يُسحب فوراً ويعلق في الكتابة
+        self.assertTrue(consumer.submit(event, timeout=1.0))   # يملأ الطابور
+        self.assertFalse(consumer.submit(event, block=False))
+
+        release.set()
+        consumer.close()
+        self.assertEqual(consumer.stats['applied'], 2)
+
+    def test_05_repeated_feedback_on_stale_paths_is_not_lost(self):
+        """يجب ألا تمحو أحداث متتالية على نفس الرابط بعضها حتى لو كان مصدر القراءة متأخراً."""
+
+        stored = {("Memory Leak", "High CPU Utilization"): 0.6}
+
+        def execute_write(query, parameters=None):
+            rows = []
+            for edge in parameters["edges"]:
+                key = (edge["start"], edge["end"])
+                stored[key] = round(stored[key] + edge["delta"], 4)
+                rows.append({"start": key[0], "end": key[1], "weight": stored[key]})
+            return rows
+
+        self.mock_handler.execute_write.side_effect = execute_write
+        stale_path = [{"start": "Memory Leak", "end": "High CPU Utilization", "weight": 0.6}]
+        consumer = FeedbackConsumer(self.mock_handler, eta=0.05)
+        consumer.consume({"path_details": stale_path, "success_delta": 1.0} for _ in range(3))
+        consumer.close()
+
+        self.assertAlmostEqual(stored[("Memory Leak", "High CPU Utilization")], 0.75)
+
+        # مع الكتابة المؤجلة يُستخدم eta الخاص بالمستهلك وليس eta الذاكرة الوسيطة
+        buffer = enable_write_behind(self.mock_handler, eta=0.1, flush_interval=3600)
+        self.addCleanup(disable_write_behind)
+        consumer = FeedbackConsumer(self.mock_handler, eta=0.05)
+        consumer.submit({"path_details": stale_path, "success_delta": 1.0})
+        consumer.close()
+        self.assertAlmostEqual(buffer._edge_deltas[("Memory Leak", "High CPU Utilization")], 0.05)
+
+
+class TestFeedbackStreamAsync(unittest.IsolatedAsyncioTestCase):
+
+    async def test_04_async_iterator_is_consumed(self):
+        """يجب قبول مصدر أحداث غير متزامن (async iterator)."""
+
+        handler = MagicMock()
+        consumer = FeedbackConsumer(handler, read_handler=InMemoryCausalGraph(SEED_EDGES))
+
+        async def events():
+            for event in FEEDBACK:
+                yield event
+
+        count = await consumer.consume_async(events())
+        consumer.close()
+
+        self.assertEqual(count, 3)
+        self.assertEqual(consumer.stats['applied'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,245 @@
+import itertools
+import random
+import unittest
+from unittest.mock import MagicMock
+from core.graph_engine import InMemoryCausalGraph
+from core.verify_causal import verify_causal_path, top_k_causal_paths, TRUST_THRESHOLD, MAX_PATH_LENGTH
+from core.innovation_engine import find_innovative_path
+
+# ----------------------------------------------------------------------
+# 1. بيانات الذاكرة الأولية (مطابقة لـ data/seed_knowledge.cypher)
+# ----------------------------------------------------------------------
+
+SEED_EDGES = [
+    ("Memory Leak", "High CPU Utilization", 0.9),
+    ("High CPU Utilization", "Server Crash", 0.95),
+    ("Database Query Slowdown", "High Latency", 0.98),
+    ("Web Server Process", "High CPU Utilization", 0.75),
+    ("Logging Module", "Memory Leak", 0.7),
+    ("Network Slowdown", "Server Crash", 0.2),
+    ("High Latency", "User Frustration", 0.6),
+]
+
+
+def brute_force_strongest(edges, cause, effect, threshold, max_length):
+    """تعداد كل المسارات (نفس منطق استعلام Cypher) للمقارنة."""
+    adjacency = {}
+    for s, t, w in edges:
+        adjacency.setdefault(s, []).append((t, w))
+
+    best = None
+    stack = [(cause, 1.0, 0, frozenset())]
+    while stack:
+        node, weight, hops, used = stack.pop()
+        if hops > 0 and node == effect and (best is None or weight > best):
+            best = weight
+        if hops == max_length:
+            continue
+        for t, w in adjacency.get(node, []):
+            if w >= threshold and (node, t) not in used:
+                stack.append((t, weight * w, hops + 1, used | {(node, t)}))
+    return best
+
+
+def brute_force_innovative(edges, start, target, min_weight, max_length, excluded):
+    """تعداد كل المسارات: الأقصر أولاً ثم الأقوى وزناً (نفس ترتيب الاستعلام الأصلي)."""
+    adjacency = {}
+    for s, t, w in edges:
+        adjacency.setdefault(s, []).append((t, w))
+
+    best = None
+    stack = [(start, 1.0, 0, (start,))]
+    while stack:
+        node, weight, hops, visited = stack.pop()
+        if hops > 0 and node == target:
+            if best is None or (hops, -weight) < (best[0], -best[1]):
+                best = (hops, weight)
+            continue
+        if hops == max_length:
+            continue
+        for t, w in adjacency.get(node, []):
+            if w >= min_weight and t not in excluded and t not in visited:
+                stack.append((t, weight * w, hops + 1, visited + (t,)))
+    return best
+
+
+def brute_force_top_k(edges, cause, effect, threshold, max_length, k):
+    """تعداد كل المسارات البسيطة وترتيبها تنازلياً حسب الوزن."""
+    adjacency = {}
+    for s, t, w in edges:
+        adjacency.setdefault(s, []).append((t, w))
+
+    weights = []
+    stack = [(cause, 1.0, 0, (cause,))]
+    while stack:
+        node, weight, hops, visited = stack.pop()
+        if hops > 0 and node == effect:
+            weights.append(weight)
+            continue
+        if hops == max_length:
+            continue
+        for t, w in adjacency.get(node, []):
+            if w >= threshold and t not in visited:
+                stack.append((t, weight * w, hops + 1, visited + (t,)))
+    return sorted(weights, reverse=True)[:k]
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestInMemoryCausalGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = InMemoryCausalGraph(SEED_EDGES)
+
+    def test_01_strongest_path_matches_cypher_result_shape(self):
+        """يجب أن يعيد المحرك المحلي نفس بنية نتيجة Cypher."""
+
+        result = verify_causal_path(self.graph, "Logging Module", "Server Crash", TRUST_THRESHOLD)
+
+        self.assertAlmostEqual(result['path_weight'], 0.7 * 0.9 * 0.95)
+        self.assertEqual(result['path_length'], 3)
+        self.assertEqual(
+            [(e['start'], e['end']) for e in result['path_details']],
+            [("Logging Module", "Memory Leak"), ("Memory Leak", "High CPU Utilization"),
+             ("High CPU Utilization", "Server Crash")]
+        )
+
+    def test_02_threshold_rejects_weak_links(self):
+        """يجب رفض المسارات التي تحتوي رابطاً أضعف من العتبة (منع الهلوسة)."""
+
+        self.assertIsNone(verify_causal_path(self.graph, "Network Slowdown", "Server Crash", TRUST_THRESHOLD))
+        self.assertIsNone(verify_causal_path(self.graph, "Unknown", "Server Crash", TRUST_THRESHOLD))
+
+    def test_03_weight_updates_and_new_edges(self):
+        """يجب أن تنعكس تحديثات الأوزان والروابط الجديدة على نتائج البحث."""
+
+        self.graph.set_weight("Network Slowdown", "Server Crash", 0.8)
+        self.graph.set_weight("Network Slowdown", "High Latency", 0.99)
+        self.graph.set_weight("High Latency", "Server Crash", 0.99)
+
+        result = self.graph.strongest_path("Network Slowdown", "Server Crash", TRUST_THRESHOLD, MAX_PATH_LENGTH)
+
+        self.assertAlmostEqual(result['path_weight'], 0.99 * 0.99)
+        self.assertEqual(self.graph.get_weight("Network Slowdown", "Server Crash"), 0.8)
+
+    def test_04_matches_exhaustive_enumeration_on_random_graphs(self):
+        """يجب أن يطابق Dijkstra نتيجة التعداد الشامل على رسوم عشوائية."""
+
+        rng = random.Random(7)
+        for _ in range(20):
+            nodes = [f"N{i}" for i in range(12)]
+            edges = [(a, b, round(rng.uniform(0.3, 1.0), 3))
+                     for a, b in itertools.permutations(nodes, 2) if rng.random() < 0.2]
+            graph = InMemoryCausalGraph(edges)
+
+            for cause, effect in itertools.product(nodes[:4], nodes[-4:]):
+                expected = brute_force_strongest(edges, cause, effect, 0.5, 4)
+                result = graph.strongest_path(cause, effect, 0.5, 4)
+                if expected is None:
+                    self.assertIsNone(result)
+                else:
+                    self.assertAlmostEqual(result['path_weight'], expected)
+                    self.assertLessEqual(result['path_length'], 4)
+
+    def test_05_load_from_handler(self):
+        """يجب تحميل الرسم من Neo4j في استعلام قراءة واحد."""
+
+        handler = MagicMock()
+        handler.execute_read.return_value = [{"start": s, "end": t, "weight": w} for s, t, w in SEED_EDGES]
+
+        graph = InMemoryCausalGraph.from_handler(handler)
+
+        handler.execute_read.assert_called_once()
+        self.assertEqual(graph.edge_count, len(SEED_EDGES))
+
+    # =========================================================
+    # البحث الابتكاري ثنائي الاتجاه
+    # =========================================================
+
+    def test_06_innovative_path_respects_constraints(self):
+        """يجب أن يتجنب البحث الابتكاري العقد المُتجاهلة ويعيد أقصر مسار."""
+
+        graph = InMemoryCausalGraph(SEED_EDGES + [
+            ("High Latency", "Slow_Protocol_K", 0.9),
+            ("Slow_Protocol_K", "User Frustration", 0.9),
+        ])
+
+        result = find_innovative_path(graph, "Database Query Slowdown", "User Frustration", ["Slow_Protocol_K"])
+
+        self.assertEqual(result['path_length'], 2)
+        self.assertAlmostEqual(result['path_weight'], 0.98 * 0.6)
+        self.assertIsNone(find_innovative_path(graph, "High Latency", "User Frustration", ["User Frustration"]))
+
+    def test_07_bidirectional_matches_exhaustive_enumeration(self):
+        """يجب أن يطابق البحث ثنائي الاتجاه (الطول ثم الوزن) نتيجة التعداد الشامل."""
+
+        rng = random.Random(11)
+        for _ in range(20):
+            nodes = [f"N{i}" for i in range(14)]
+            edges = [(a, b, round(rng.uniform(0.05, 1.0), 3))
+                     for a, b in itertools.permutations(nodes, 2) if rng.random() < 0.15]
+            graph = InMemoryCausalGraph(edges)
+            excluded = {"N5", "N6"}
+
+            for start, target in itertools.product(nodes[:4], nodes[-4:]):
+                expected = brute_force_innovative(edges, start, target, 0.1, 7, excluded)
+                result = graph.shortest_innovative_path(start, target, 0.1, 7, excluded_nodes=excluded)
+                if expected is None:
+                    self.assertIsNone(result)
+                else:
+                    self.assertEqual(result['path_length'], expected[0])
+                    self.assertAlmostEqual(result['path_weight'], expected[1])
+                    self.assertTrue(all(e['end'] not in excluded for e in result['path_details']))
+
+    # =========================================================
+    # أقوى k مسارات (Yen)
+    # =========================================================
+
+    def test_08_top_k_returns_alternate_explanations(self):
+        """يجب أن تكون النتيجة الأولى هي أقوى مسار، تليها التفسيرات البديلة تنازلياً."""
+
+        graph = InMemoryCausalGraph(SEED_EDGES + [("Memory Leak", "Server Crash", 0.6)])
+
+        paths = top_k_causal_paths(graph, "Logging Module", "Server Crash", k=5, threshold=TRUST_THRESHOLD)
+
+        self.assertEqual(len(paths), 2)
+        self.assertEqual(paths[0], verify_causal_path(graph, "Logging Module", "Server Crash", TRUST_THRESHOLD))
+        self.assertAlmostEqual(paths[1]['path_weight'], 0.7 * 0.6)
+        self.assertEqual(top_k_causal_paths(graph, "Unknown", "Server Crash"), [])
+
+    def test_09_top_k_matches_exhaustive_enumeration(self):
+        """يجب أن تطابق أوزان أقوى k مسارات نتيجة التعداد الشامل للمسارات البسيطة."""
+
+        rng = random.Random(5)
+        for _ in range(15):
+            nodes = [f"N{i}" for i in range(10)]
+            edges = [(a, b, round(rng.uniform(0.3, 1.0), 3))
+                     for a, b in itertools.permutations(nodes, 2) if rng.random() < 0.3]
+            graph = InMemoryCausalGraph(edges)
+
+            for cause, effect in itertools.product(nodes[:3], nodes[-3:]):
+                expected = brute_force_top_k(edges, cause, effect, 0.4, 4, 6)
+                paths = graph.top_k_paths(cause, effect, 6, 0.4, 4)
+
+                self.assertEqual(len(paths), len(expected))
+                for path, weight in zip(paths, expected):
+                    self.assertAlmostEqual(path['path_weight'], weight)
+                    nodes_on_path = [path['path_details'][0]['start']] + [e['end'] for e in path['path_details']]
+                    self.assertEqual(len(nodes_on_path), len(set(nodes_on_path)))
+
+    def test_10_top_k_neo4j_fallback_uses_limit(self):
+        """يجب أن يمرر الاستعلام البديل (Neo4j) قيمة k كمعامل LIMIT."""
+
+        handler = MagicMock()
+        handler.execute_query.return_value = []
+
+        top_k_causal_paths(handler, "A", "B", k=4)
+
+        query, parameters = handler.execute_query.call_args.args
+        self.assertIn("LIMIT $k", query)
+        self.assertEqual(parameters['k'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+from core.graph_engine import InMemoryCausalGraph
+from core.graph_snapshot import export_snapshot, load_snapshot, read_snapshot_header
+from core.reachability_index import ReachabilityIndex
+from core.verify_causal import verify_causal_path
+
+# ----------------------------------------------------------------------
+# 1. بيانات وهمية
+# ----------------------------------------------------------------------
+
+SEED_EDGES = [
+    ("Memory Leak", "High CPU Utilization", 0.9),
+    ("High CPU Utilization", "Server Crash", 0.95),
+    ("Network Slowdown", "Server Crash", 0.2),
+    ("Memory Leak", "Swap Thrashing", 0.7),
+    ("Swap Thrashing", "Server Crash", 0.8),
+    ("Memory Leak", "High_Cost", 0.9),
+    ("High_Cost", "Server Crash", 0.99),
+]
+
+
+def random_edges(n_nodes=60, n_edges=300, seed=4):
+    rng = random.Random(seed)
+    return [(f"N{rng.randrange(n_nodes)}", f"N{rng.randrange(n_nodes)}", round(rng.uniform(0.05, 1.0), 4))
+            for _ in range(n_edges)]
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestGraphSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "memory_z.snapshot")
+
+    def test_01_round_trip_answers_match_original_graph(self):
+        """يجب أن تعطي اللقطة المحمّلة نفس نتائج البحث (أقوى مسار، أقوى k، الابتكار) كالرسم الأصلي."""
+        edges = random_edges()
+        original = InMemoryCausalGraph(edges)
+        export_snapshot(original, self.path)
+        loaded = load_snapshot(self.path)
+
+        self.assertEqual((loaded.node_count, loaded.edge_count), (original.node_count, original.edge_count))
+        self.assertIsInstance(loaded.weights, np.memmap)
+        for cause in ("N1", "N7", "N20"):
+            for effect in ("N3", "N42", "N59"):
+                self.assertEqual(loaded.strongest_path(cause, effect, 0.3, 5), original.strongest_path(cause, effect, 0.3, 5))
+                self.assertEqual(loaded.top_k_paths(cause, effect, 3, 0.2, 4), original.top_k_paths(cause, effect, 3, 0.2, 4))
+                self.assertEqual(loaded.shortest_innovative_path(cause, effect, 0.1, 7),
+                                 original.shortest_innovative_path(cause, effect, 0.1, 7))
+
+    def test_02_local_updates_do_not_touch_the_file(self):
+        """التعديلات على اللقطة المحمّلة (copy-on-write) تبقى محلية، ويمكن إضافة روابط وعقد جديدة."""
+        export_snapshot(InMemoryCausalGraph(SEED_EDGES), self.path)
+        graph = load_snapshot(self.path)
+
+        graph.set_weight("Memory Leak", "High CPU Utilization", 0.1)
+        graph.set_weight("Fast Patch", "Server Crash", 0.95)
+        graph.set_weight("Memory Leak", "Fast Patch", 0.95)
+
+        self.assertEqual(graph.get_weight("Memory Leak", "High CPU Utilization"), 0.1)
+        self.assertEqual(
+            [e['end'] for e in verify_causal_path(graph, "Memory Leak", "Server Crash")['path_details']],
+            ["Fast Patch", "Server Crash"]
+        )
+        self.assertEqual(load_snapshot(self.path).get_weight("Memory Leak", "High CPU Utilization"), 0.9)
+
+    def test_03_export_from_handler_and_reject_invalid_files(self):
+        """يجب التصدير مباشرة من Neo4j، ورفض الملفات التي ليست لقطة."""
+        handler = MagicMock()
+        handler.execute_read.return_value = [{"start": s, "end": e, "weight": w} for s, e, w in SEED_EDGES]
+
+        stats = export_snapshot(handler, self.path)
+        header, _ = read_snapshot_header(self.path)
+        self.assertEqual((stats['nodes'], stats['edges']), (6, len(SEED_EDGES)))
+        self.assertEqual(header['arrays']['indices']['dtype'], "<i4")
+        self.assertEqual(header['arrays']['indices']['offset'] % 64, 0)
+
+        with open(self.path, "r+b") as f:
+            f.write(b"NOTASNAP")
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path)
+
+    def test_04_reachability_index_over_snapshot_with_unseen_nodes(self):
+        """يجب أن يُبنى فهرس الوصول فوق لقطة محمّلة، مع أهداف وروابط لعقد غير موجودة في اللقطة."""
+        export_snapshot(InMemoryCausalGraph(SEED_EDGES), self.path)
+        index = ReachabilityIndex(load_snapshot(self.path), ["Server Crash", "Data Loss"], 0.5, 4)
+
+        self.assertEqual(index.lookup("Memory Leak", "Server Crash", 0.5, 4)['path_length'], 2)
+        self.assertIsNone(index.lookup("Memory Leak", "Data Loss", 0.5, 4))
+
+        index.apply_edges([{"start": "Server Crash", "end": "Data Loss", "weight": 0.9}])
+        index.apply_edges([{"start": "Server Crash", "end": "Brand New Node", "weight": 0.9}])
+
+        path = index.lookup("Memory Leak", "Data Loss", 0.5, 4)
+        self.assertEqual(path['path_details'][-1], {"start": "Server Crash", "end": "Data Loss", "weight": 0.9})
+        self.assertEqual(index.graph.get_weight("Memory Leak", "High CPU Utilization"), 0.9)
+        self.assertEqual(index.graph.edge_count, len(SEED_EDGES) + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from core.instrumentation import (
+    span, start_trace, current_trace, add_metrics_sink, remove_metrics_sink,
+    LatencyHistograms, enable_metrics, disable_metrics, NEO4J, LLM,
+)
+from core.bridge import process_and_learn
+from core.async_bridge import process_and_learn_async
+from core.graph_engine import InMemoryCausalGraph
+from db.neo4j_handler import Neo4jHandler
+
+# ----------------------------------------------------------------------
+# 1. بيانات وهمية
+# ----------------------------------------------------------------------
+
+SEED_EDGES = [
+    ("Memory Leak", "High CPU Utilization", 0.9),
+    ("High CPU Utilization", "Server Crash", 0.95),
+]
+
+CLAIMS_JSON = json.dumps({"causal_claims": [{"cause": "Memory Leak", "effect": "Server Crash"}]})
+
+
+def llm_response(content: str):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestInstrumentation(unittest.TestCase):
+
+    def tearDown(self):
+        disable_metrics()
+
+    def test_01_spans_are_nested_and_summarized(self):
+        """يجب تسجيل المقاطع مع المقطع الأب، وتجميع زمن المراحل واستدعاءات Neo4j و LLM."""
+
+        with span("outside"):
+            pass  # بدون سجل نشط لا يُسجل شيء
+
+        with start_trace() as trace:
+            with span("verify"):
+                with span("neo4j.read", NEO4J):
+                    pass
+                with span("neo4j.read", NEO4J):
+                    pass
+            with span("gap_question"):
+                with span("llm.chat_completion", LLM):
+                    pass
+        self.assertIsNone(current_trace())
+
+        timings = trace.as_dict()
+        self.assertEqual(set(timings["stages"]), {"verify", "gap_question"})
+        self.assertEqual(timings["neo4j"]["calls"], 2)
+        self.assertEqual(timings["llm"]["calls"], 1)
+        self.assertEqual([s["parent"] for s in timings["spans"]], ["verify", "verify", None, "gap_question", None])
+
+    def test_02_histograms_export_prometheus_text(self):
+        """يجب أن تكون فئات المدرج تراكمية وأن يطابق +Inf العدد الكلي."""
+
+        histograms = LatencyHistograms(buckets=(0.01, 0.1))
+        for seconds in (0.005, 0.05, 0.5):
+            histograms.observe("verify", "stage", seconds)
+
+        text = histograms.to_prometheus()
+        self.assertIn('opencausal_span_duration_seconds_bucket{span="verify",kind="stage",le="0.01"} 1', text)
+        self.assertIn('opencausal_span_duration_seconds_bucket{span="verify",kind="stage",le="0.1"} 2', text)
+        self.assertIn('opencausal_span_duration_seconds_bucket{span="verify",kind="stage",le="+Inf"} 3', text)
+        self.assertIn('opencausal_span_duration_seconds_count{span="verify",kind="stage"} 3', text)
+
+    def test_03_process_and_learn_reports_stage_timings(self):
+        """يجب أن تحتوي النتيجة على الحقل timings، وأن تصل المراحل إلى المدرجات والمستقبِلات."""
+
+        histograms = enable_metrics()
+        received = []
+        sink = lambda name, kind, seconds: received.append((name, kind))
+        add_metrics_sink(sink)
+        self.addCleanup(remove_metrics_sink, sink)
+
+        llm_client = MagicMock()
+        llm_client.chat.completions.create.return_value = llm_response(CLAIMS_JSON)
+        write_handler = MagicMock()
+        write_handler.execute_query.return_value = [{"level": 0.8}]
+
+        result = process_and_learn(
+            "نص", write_handler, llm_client, feedback_delta=1.0, read_handler=InMemoryCausalGraph(SEED_EDGES)
+        )
+
+        self.assertEqual(result['status'], "Success - Logically Verified and Learned")
+        timings = result['timings']
+        self.assertEqual(set(timings['stages']), {"extract_claims", "verify", "update_weights", "update_confidence"})
+        self.assertEqual(timings['llm']['calls'], 1)
+        self.assertGreaterEqual(timings['total_ms'], sum(timings['stages'].values()))
+        self.assertIn(("verify", "stage"), received)
+        self.assertIn(("llm.chat_completion", LLM), received)
+        self.assertIn('span="update_weights"', histograms.to_prometheus())
+
+    @patch('db.neo4j_handler.GraphDatabase')
+    def test_04_neo4j_handler_queries_are_spans(self, mock_graph_db):
+        """يجب أن يُسجل كل استعلام عبر Neo4jHandler كمقطع من النوع neo4j."""
+
+        handler = Neo4jHandler("bolt://localhost:7687", "neo4j", "password")
+        with start_trace() as trace:
+            handler.execute_read("MATCH (n) RETURN n")
+            handler.execute_write("CREATE (n)")
+
+        self.assertEqual([(s["name"], s["kind"]) for s in trace.spans],
+                         [("neo4j.read", NEO4J), ("neo4j.write", NEO4J)])
+
+
+class TestAsyncInstrumentation(unittest.IsolatedAsyncioTestCase):
+
+    async def test_05_async_process_and_learn_reports_stage_timings(self):
+        """يجب أن تُسجل المراحل المتوازية (asyncio.gather) في نفس السجل."""
+
+        handler = MagicMock()
+        handler.execute_read = AsyncMock(side_effect=[[], [{"level": 0.8}]])
+        handler.execute_write = AsyncMock(return_value=[])
+        llm_client = MagicMock()
+        llm_client.chat.completions.create = AsyncMock(return_value=llm_response(CLAIMS_JSON))
+
+        result = await process_and_learn_async("نص", handler, llm_client)
+
+        self.assertEqual(result['status'], "Failure - Causal Gap Found (Active Learning)")
+        self.assertEqual(
+            set(result['timings']['stages']), {"extract_claims", "verify", "update_confidence", "gap_question"}
+        )
+        self.assertEqual(result['timings']['llm']['calls'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import json
+import threading
+import unittest
+from unittest.mock import MagicMock
+from core.bridge import extract_causal_claims_from_llm
+from core.llm_batcher import (
+    ClaimExtractionBatcher, BatcherClosedError, enable_llm_batching, disable_llm_batching, get_llm_batcher
+)
+
+# ----------------------------------------------------------------------
+# 1. عميل LLM وهمي يجيب عن الطلبات المجمّعة
+# ----------------------------------------------------------------------
+
+def llm_response(content: str):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+
+def packed_llm_client(drop_ids=()):
+    """يعيد لكل نص فرضية (النص -> Server Crash)؛ الطلب الفردي يُعرف من غياب قائمة المعرّفات."""
+    client = MagicMock()
+
+    def create(**request):
+        user_content = request["messages"][1]["content"]
+        if "النصوص لتحليلها" in user_content:
+            items = json.loads(user_content.split(": ", 1)[1])
+            return llm_response(json.dumps({"results": [
+                {"id": item["id"], "causal_claims": [{"cause": item["text"], "effect": "Server Crash"}]}
+                for item in items if item["id"] not in drop_ids
+            ]}))
+        text = user_content.split("'")[1]
+        return llm_response(json.dumps({"causal_claims": [{"cause": text, "effect": "Server Crash"}]}))
+
+    client.chat.completions.create.side_effect = create
+    return client
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestLLMBatcher(unittest.TestCase):
+
+    def extract_concurrently(self, batcher, texts):
+        results = {}
+
+        def worker(text):
+            results[text] = batcher.extract(text, timeout=5)
+
+        threads = [threading.Thread(target=worker, args=(text,)) for text in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_01_concurrent_texts_share_one_request(self):
+        """يجب أن تُجمع النصوص المتزامنة في طلب واحد وتعود لكل مستدعٍ فرضياته فقط."""
+        client = packed_llm_client()
+        batcher = ClaimExtractionBatcher(client, max_batch_size=8, max_wait=0.5)
+        self.addCleanup(batcher.close)
+
+        texts = [f"Cause {i}" for i in range(8)]
+        results = self.extract_concurrently(batcher, texts)
+
+        for text in texts:
+            self.assertEqual(results[text], [{"cause": text, "effect": "Server Crash"}])
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+        self.assertEqual(batcher.stats["batches"], 1)
+
+    def test_02_missing_ids_fall_back_to_single_requests(self):
+        """النص المفقود من الرد المجمّع يجب أن يُعاد بطلب فردي."""
+        client = packed_llm_client(drop_ids={"1"})
+        batcher = ClaimExtractionBatcher(client, max_batch_size=3, max_wait=0.5)
+        self.addCleanup(batcher.close)
+
+        results = self.extract_concurrently(batcher, ["A", "B", "C"])
+
+        self.assertEqual({text: claims[0]["cause"] for text, claims in results.items()}, {"A": "A", "B": "B", "C": "C"})
+        self.assertEqual(batcher.stats["fallbacks"], 1)
+        self.assertEqual(client.chat.completions.create.call_count, 2)
+
+    def test_03_bridge_uses_active_batcher_for_same_client(self):
+        """يجب أن يمر extract_causal_claims_from_llm عبر المجمّع النشط عندما يكون العميل نفسه."""
+        client = packed_llm_client()
+        batcher = enable_llm_batching(client, max_batch_size=4, max_wait=0.01)
+        self.addCleanup(disable_llm_batching)
+
+        claims = extract_causal_claims_from_llm("Memory Leak", client)
+
+        self.assertEqual(claims, [{"cause": "Memory Leak", "effect": "Server Crash"}])
+        self.assertEqual(batcher.stats["texts"], 1)
+
+        # عميل آخر لا يمر عبر المجمّع
+        other_client = packed_llm_client()
+        extract_causal_claims_from_llm("Disk Full", other_client)
+        self.assertEqual(batcher.stats["texts"], 1)
+
+        disable_llm_batching()
+        self.assertIsNone(get_llm_batcher())
+
+    def test_04_failed_batch_is_not_resent_text_by_text(self):
+        """فشل الطلب المجمّع (مثل 429) يجب أن يعيد قائمة فارغة لكل نص دون طلبات فردية."""
+        client = MagicMock()
+        client.chat.completions.create.side_effect = RuntimeError("429 Too Many Requests")
+        batcher = ClaimExtractionBatcher(client, max_batch_size=6, max_wait=0.5)
+        self.addCleanup(batcher.close)
+
+        results = self.extract_concurrently(batcher, [f"Cause {i}" for i in range(6)])
+
+        self.assertEqual(list(results.values()), [[]] * 6)
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+        self.assertEqual(batcher.stats["failed_batches"], 1)
+
+    def test_05_fallbacks_are_capped_per_batch(self):
+        """النصوص المفقودة من رد ناجح تُعاد فردياً حتى max_fallbacks فقط."""
+        client = packed_llm_client(drop_ids={"0", "1", "2", "3"})
+        batcher = ClaimExtractionBatcher(client, max_batch_size=5, max_wait=0.5, max_fallbacks=2)
+        self.addCleanup(batcher.close)
+
+        results = self.extract_concurrently(batcher, ["A", "B", "C", "D", "E"])
+
+        self.assertEqual(sum(1 for claims in results.values() if not claims), 2)
+        self.assertEqual(batcher.stats["fallbacks"], 2)
+        self.assertEqual(client.chat.completions.create.call_count, 3)
+
+    def test_06_submit_after_close_does_not_hang(self):
+        """بعد الإغلاق يجب رفض النصوص الجديدة، ويعود الجسر إلى الطلب المباشر."""
+        client = packed_llm_client()
+        batcher = enable_llm_batching(client, max_wait=0.01)
+        self.addCleanup(disable_llm_batching)
+        batcher.close()
+
+        with self.assertRaises(BatcherClosedError):
+            batcher.submit("Memory Leak")
+        self.assertEqual(extract_causal_claims_from_llm("Memory Leak", client)[0]["cause"], "Memory Leak")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from core.bridge import extract_causal_claims_from_llm, generate_exploratory_question
+from core.llm_cache import SQLiteLLMCache, InMemoryLLMCache, enable_llm_cache, disable_llm_cache
+
+# ----------------------------------------------------------------------
+# 1. بيانات وهمية
+# ----------------------------------------------------------------------
+
+CLAIMS_JSON = json.dumps({"causal_claims": [{"cause": "Memory Leak", "effect": "Server Crash"}]})
+
+
+def llm_client_returning(content: str) -> MagicMock:
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices[0].message.content = content
+    return client
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestLLMCache(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(disable_llm_cache)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_path = os.path.join(self.tmp_dir.name, "llm_cache.sqlite3")
+
+    def test_01_identical_prompt_is_served_from_cache(self):
+        """يجب ألا يُعاد استدعاء LLM لنفس النص."""
+
+        cache = enable_llm_cache(InMemoryLLMCache())
+        client = llm_client_returning(CLAIMS_JSON)
+
+        first = extract_causal_claims_from_llm("نص", client)
+        second = extract_causal_claims_from_llm("نص", client)
+
+        self.assertEqual(first, second)
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_02_errors_are_not_cached(self):
+        """يجب ألا تُخزن الأخطاء، فيُعاد الاستدعاء في المرة التالية."""
+
+        enable_llm_cache(InMemoryLLMCache())
+        client = MagicMock()
+        client.chat.completions.create.side_effect = RuntimeError("timeout")
+
+        generate_exploratory_question(client, "A", "B", 0.5)
+        generate_exploratory_question(client, "A", "B", 0.5)
+
+        self.assertEqual(client.chat.completions.create.call_count, 2)
+
+    def test_03_sqlite_cache_persists_across_instances(self):
+        """يجب أن تبقى الردود المخزنة في SQLite بعد إعادة فتح الملف."""
+
+        enable_llm_cache(SQLiteLLMCache(self.db_path))
+        extract_causal_claims_from_llm("نص", llm_client_returning(CLAIMS_JSON))
+        disable_llm_cache()
+
+        cache = enable_llm_cache(SQLiteLLMCache(self.db_path))
+        client = llm_client_returning("[]")
+        claims = extract_causal_claims_from_llm("نص", client)
+
+        self.assertEqual(claims[0]['cause'], "Memory Leak")
+        client.chat.completions.create.assert_not_called()
+        cache.close()
+
+    def test_04_size_bounded_eviction(self):
+        """يجب إخراج أقدم الردود عند تجاوز الحد الأقصى."""
+
+        cache = SQLiteLLMCache(self.db_path, max_entries=3)
+        for i in range(10):
+            cache.set(f"key-{i}", "model", f"response-{i}")
+        cache.close()
+
+        cache = SQLiteLLMCache(self.db_path, max_entries=3)
+        self.assertEqual(cache.stats()['size'], 3)
+        self.assertEqual(cache.get("key-9"), "response-9")
+        self.assertIsNone(cache.get("key-0"))
+        cache.close()
+
+    def test_05_unparseable_replies_are_not_cached(self):
+        """الرد المقطوع أو غير الصالح (JSON) يجب ألا يُخزن، فيُعاد الطلب في المرة التالية."""
+
+        cache = enable_llm_cache(InMemoryLLMCache())
+        client = llm_client_returning('{"causal_claims": [{"cause": "Memory')
+
+        self.assertEqual(extract_causal_claims_from_llm("نص", client), [])
+        self.assertEqual(cache.stats()['size'], 0)
+
+        client.chat.completions.create.return_value.choices[0].message.content = CLAIMS_JSON
+        self.assertEqual(extract_causal_claims_from_llm("نص", client)[0]['effect'], "Server Crash")
+        self.assertEqual(client.chat.completions.create.call_count, 2)
+        self.assertEqual(cache.stats()['size'], 1)
+
+    def test_06_sqlite_reads_record_access_lazily(self):
+        """القراءة من SQLite لا تكتب في الملف؛ وقت آخر استخدام يُكتب مع الكتابة التالية أو عند الإغلاق."""
+
+        cache = SQLiteLLMCache(self.db_path)
+        for key in ("old", "recent"):
+            cache.set(key, "model", key)
+
+        self.assertEqual(cache.get("old"), "old")
+        self.assertFalse(cache._conn.in_transaction)
+        cache.close()
+
+        conn = sqlite3.connect(self.db_path)
+        accessed = dict(conn.execute("SELECT key, last_access FROM llm_cache").fetchall())
+        conn.close()
+        self.assertGreater(accessed["old"], accessed["recent"])
+
+
+if __name__ == '__main__':
+    unittest.main()
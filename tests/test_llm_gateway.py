@@ -0,0 +1,183 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+from core.bridge import extract_causal_claims_from_llm
+from core.llm_gateway import (
+    LLMGateway, TokenBucket, CircuitBreaker, CircuitOpenError, DeadlineExceededError, is_retryable,
+    enable_llm_gateway, disable_llm_gateway, get_llm_gateway
+)
+
+# ----------------------------------------------------------------------
+# 1. أخطاء وهمية من المزوّد
+# ----------------------------------------------------------------------
+
+class ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def fast_gateway(**settings):
+    defaults = {"backoff_base": 0.001, "backoff_max": 0.005, "rate_per_second": 1000, "burst": 1000, "deadline": 5}
+    return LLMGateway(**{**defaults, **settings})
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestLLMGateway(unittest.TestCase):
+
+    def test_01_retries_transient_errors_and_passes_timeout(self):
+        """يجب إعادة المحاولة للأخطاء المؤقتة (429/503) فقط، مع تمرير مهلة لكل محاولة."""
+        gateway = fast_gateway(call_timeout=2.0)
+        fn = MagicMock(side_effect=[ProviderError(429), ProviderError(503), "ok"])
+
+        self.assertEqual(gateway.call(fn, model="m"), "ok")
+        self.assertEqual(fn.call_count, 3)
+        self.assertLessEqual(fn.call_args.kwargs["timeout"], 2.0)
+        self.assertEqual(gateway.stats["retries"], 2)
+
+        # خطأ دائم (400) يُرفع فوراً دون إعادة محاولة
+        bad_request = MagicMock(side_effect=ProviderError(400))
+        with self.assertRaises(ProviderError):
+            gateway.call(bad_request)
+        self.assertEqual(bad_request.call_count, 1)
+
+    def test_02_circuit_opens_then_half_open_probe_closes_it(self):
+        """بعد عدد من الإخفاقات تُرفض الطلبات فوراً، ثم يغلق طلب تجريبي ناجح الدائرة."""
+        gateway = fast_gateway(max_retries=0, failure_threshold=2, reset_timeout=0.05)
+        failing = MagicMock(side_effect=ProviderError(503))
+
+        for _ in range(2):
+            with self.assertRaises(ProviderError):
+                gateway.call(failing)
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.OPEN)
+
+        with self.assertRaises(CircuitOpenError):
+            gateway.call(failing)
+        self.assertEqual(failing.call_count, 2)
+        self.assertEqual(gateway.stats["rejected"], 1)
+
+        time.sleep(0.06)
+        self.assertEqual(gateway.call(MagicMock(return_value="ok")), "ok")
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.CLOSED)
+
+        # الدائرة تعدّ الاستدعاءات المنطقية وليس المحاولات: استدعاء واحد بـ 4 محاولات لا يفتحها
+        retrying = fast_gateway(max_retries=3, failure_threshold=2)
+        with self.assertRaises(ProviderError):
+            retrying.call(MagicMock(side_effect=ProviderError(503)))
+        self.assertEqual(retrying.stats["retries"], 3)
+        self.assertEqual(retrying.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_03_concurrency_limit_and_rate_limit(self):
+        """يجب ألا يتجاوز عدد الطلبات الجارية max_concurrent، وأن يحدّ الدلو عدد الطلبات في الثانية."""
+        gateway = fast_gateway(max_concurrent=2)
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def slow_call(**kwargs):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.02)
+            with lock:
+                state["running"] -= 1
+
+        threads = [threading.Thread(target=gateway.call, args=(slow_call,)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(state["peak"], 2)
+
+        bucket = TokenBucket(rate=20, capacity=1)
+        self.assertTrue(bucket.acquire(timeout=0))
+        self.assertFalse(bucket.acquire(timeout=0))
+        started = time.monotonic()
+        self.assertTrue(bucket.acquire(timeout=1))
+        self.assertGreaterEqual(time.monotonic() - started, 0.03)
+
+        # الحد الزمني الكلي يوقف الانتظار خلف الدلو
+        limited = fast_gateway(rate_per_second=1, burst=1, deadline=0.1)
+        limited.call(MagicMock())
+        with self.assertRaises(DeadlineExceededError):
+            limited.call(MagicMock())
+
+    def test_04_async_path_and_bridge_integration(self):
+        """يجب أن يعمل acall مع الدوال غير المتزامنة، وأن يمر _chat_completion عبر البوابة النشطة."""
+        gateway = fast_gateway()
+        attempts = []
+
+        async def create(**kwargs):
+            attempts.append(kwargs)
+            if len(attempts) == 1:
+                raise ProviderError(502)
+            return "ok"
+
+        self.assertEqual(asyncio.run(gateway.acall(create, model="m")), "ok")
+        self.assertEqual(len(attempts), 2)
+
+        async def hanging(**kwargs):
+            await asyncio.sleep(1)
+
+        with self.assertRaises(TimeoutError):
+            asyncio.run(fast_gateway(deadline=0.05, max_retries=0).acall(hanging))
+
+        client = MagicMock()
+        client.with_options.return_value = client
+        client.chat.completions.create.return_value.choices[0].message.content = json.dumps(
+            {"causal_claims": [{"cause": "Memory Leak", "effect": "Server Crash"}]}
+        )
+        active = enable_llm_gateway(backoff_base=0.001)
+        self.addCleanup(disable_llm_gateway)
+
+        claims = extract_causal_claims_from_llm("Memory Leak", client)
+
+        self.assertEqual(claims, [{"cause": "Memory Leak", "effect": "Server Crash"}])
+        self.assertEqual(active.stats["calls"], 1)
+        self.assertIn("timeout", client.chat.completions.create.call_args.kwargs)
+        # إعادة المحاولة في البوابة فقط: العميل يُستخدم بدون محاولاته الداخلية
+        client.with_options.assert_called_once_with(max_retries=0)
+
+        disable_llm_gateway()
+        self.assertIsNone(get_llm_gateway())
+
+    def test_05_cancelled_probe_is_released(self):
+        """يجب أن يحرر إلغاء الطلب التجريبي (CancelledError / KeyboardInterrupt) الدائرة نصف المفتوحة."""
+        gateway = fast_gateway(max_retries=0, failure_threshold=1, reset_timeout=0.01)
+
+        def open_circuit():
+            with self.assertRaises(ProviderError):
+                gateway.call(MagicMock(side_effect=ProviderError(503)))
+            time.sleep(0.02)
+
+        async def hanging(**kwargs):
+            await asyncio.sleep(1)
+
+        async def cancelled_probe():
+            task = asyncio.ensure_future(gateway.acall(hanging))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        open_circuit()
+        asyncio.run(cancelled_probe())
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(gateway.call(MagicMock(return_value="ok")), "ok")
+        self.assertEqual(gateway.breaker.state, CircuitBreaker.CLOSED)
+
+        open_circuit()
+        with self.assertRaises(KeyboardInterrupt):
+            gateway.call(MagicMock(side_effect=KeyboardInterrupt))
+        self.assertEqual(gateway.call(MagicMock(return_value="ok")), "ok")
+
+        # asyncio.wait_for يرفع asyncio.TimeoutError (فئة مستقلة قبل Python 3.11)
+        self.assertTrue(is_retryable(asyncio.TimeoutError()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from neo4j import READ_ACCESS, WRITE_ACCESS
+from db.neo4j_handler import Neo4jHandler
+from db.async_neo4j_handler import AsyncNeo4jHandler
+
+# ----------------------------------------------------------------------
+# فئة الاختبار (مجمع الجلسات وإدارة المعاملات)
+# ----------------------------------------------------------------------
+
+class TestNeo4jHandler(unittest.TestCase):
+
+    def setUp(self):
+        """استبدال مشغّل Neo4j بكائن وهمي قبل كل اختبار"""
+        patcher = patch('db.neo4j_handler.GraphDatabase')
+        self.mock_graph_db = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.mock_driver = self.mock_graph_db.driver.return_value
+        self.mock_driver.session.side_effect = lambda **kwargs: MagicMock(name=f"session_{kwargs['default_access_mode']}")
+        self.handler = Neo4jHandler("bolt://localhost:7687", "neo4j", "password", pool_size=2)
+
+    def test_01_sessions_are_reused(self):
+        """يجب إعادة استخدام نفس الجلسة بين الاستدعاءات المتتالية."""
+
+        self.handler.execute_query("RETURN 1")
+        self.handler.execute_query("RETURN 2")
+
+        self.assertEqual(self.mock_driver.session.call_count, 1)
+
+    def test_02_read_and_write_routing(self):
+        """يجب أن تستخدم القراءة والكتابة جلسات بنمط الوصول المناسب."""
+
+        self.handler.execute_read("MATCH (n) RETURN n")
+        self.handler.execute_write("CREATE (n)")
+
+        access_modes = [c.kwargs['default_access_mode'] for c in self.mock_driver.session.call_args_list]
+        self.assertEqual(access_modes, [READ_ACCESS, WRITE_ACCESS])
+
+    def test_03_transaction_commits_on_success(self):
+        """يجب تأكيد المعاملة الصريحة بعد تنفيذ عدة استعلامات بنجاح."""
+
+        with self.handler.transaction() as tx:
+            tx.run("CREATE (a)")
+            tx.run("CREATE (b)")
+
+        self.assertEqual(tx.run.call_count, 2)
+        tx.commit.assert_called_once()
+        tx.rollback.assert_not_called()
+
+    def test_04_transaction_rolls_back_and_discards_session(self):
+        """عند الخطأ يجب التراجع عن المعاملة وعدم إعادة الجلسة إلى المجمع."""
+
+        with self.assertRaises(RuntimeError):
+            with self.handler.transaction() as tx:
+                tx.closed.return_value = False
+                raise RuntimeError("فشل")
+
+        tx.rollback.assert_called_once()
+        tx.commit.assert_not_called()
+
+        self.handler.execute_query("RETURN 1")
+        self.assertEqual(self.mock_driver.session.call_count, 2)
+
+    def test_05_pool_is_bounded(self):
+        """يجب أن يفشل الحصول على جلسة عند استنفاد المجمع."""
+
+        self.handler.acquire_timeout = 0.01
+        with self.handler._session(), self.handler._session():
+            with self.assertRaises(TimeoutError):
+                with self.handler._session():
+                    pass
+
+    def test_06_stream_query_projects_lazily_with_fetch_size(self):
+        """يجب أن يعيد stream_query مولّداً بالشكل المطلوب، وأن يغلق الجلسة ويحرر المكان عند إغلاقه."""
+
+        session = MagicMock()
+        session.run.side_effect = lambda *args: iter([FakeRecord(start="A", end="B", weight=0.9),
+                                                      FakeRecord(start="B", end="C", weight=0.8)])
+        self.mock_driver.session.side_effect = None
+        self.mock_driver.session.return_value = session
+
+        rows = self.handler.stream_query("MATCH ...", fetch_size=50, projection="tuple")
+        session.run.assert_not_called()  # لا يُنفذ شيء قبل بدء الاستهلاك
+
+        self.assertEqual(next(rows), ("A", "B", 0.9))
+        self.assertEqual(self.mock_driver.session.call_args.kwargs['fetch_size'], 50)
+        rows.close()
+        session.close.assert_called_once()
+
+        # المكان في حد الجلسات تحرر: يمكن حجز كل الأماكن من جديد
+        with self.handler._session(), self.handler._session():
+            pass
+
+        dict_rows = list(self.handler.stream_query("MATCH ...", projection="dict"))
+        self.assertEqual(dict_rows[1], {"start": "B", "end": "C", "weight": 0.8})
+
+        # الإسقاط غير الصالح يُرفض عند الاستدعاء نفسه، دون حجز مكان في حد الجلسات
+        with self.assertRaises(ValueError):
+            self.handler.stream_query("MATCH ...", projection="json")
+        with self.handler._session(), self.handler._session():
+            pass
+
+    @patch('db.async_neo4j_handler.AsyncGraphDatabase')
+    def test_07_async_stream_query_validates_on_call(self, mock_async_graph_db):
+        """يجب أن ترفض النسخة غير المتزامنة الإسقاط غير الصالح عند الاستدعاء، لا عند أول async for."""
+
+        handler = AsyncNeo4jHandler("bolt://localhost:7687", "neo4j", "password")
+
+        with self.assertRaises(ValueError):
+            handler.stream_query("MATCH ...", projection="json")
+        rows = handler.stream_query("MATCH ...", projection="dict")
+        self.assertTrue(hasattr(rows, "__anext__"))
+        mock_async_graph_db.driver.return_value.session.assert_not_called()
+
+
+class FakeRecord(dict):
+    """سجل وهمي بنفس واجهة neo4j.Record المستخدمة في الإسقاط."""
+
+    def data(self):
+        return dict(self)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import MagicMock
+from core.path_cache import enable_path_cache, disable_path_cache
+from core.verify_causal import verify_causal_path, TRUST_THRESHOLD
+from core.weights import update_causal_weight
+from db.causal_ops import create_causal_link
+
+# ----------------------------------------------------------------------
+# 1. بيانات وهمية
+# ----------------------------------------------------------------------
+
+SUCCESS_PATH_RESPONSE = [
+    {
+        "path_weight": 0.855,
+        "path_details": [
+            {"start": "Memory Leak", "end": "High CPU Utilization", "weight": 0.9},
+            {"start": "High CPU Utilization", "end": "Server Crash", "weight": 0.95}
+        ]
+    }
+]
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestVerifiedPathCache(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_handler = MagicMock()
+        self.mock_handler.execute_query.return_value = SUCCESS_PATH_RESPONSE
+        self.cache = enable_path_cache(maxsize=2, ttl=60.0)
+        self.addCleanup(disable_path_cache)
+
+    def _verify(self, cause="Memory Leak", effect="Server Crash"):
+        return verify_causal_path(self.mock_handler, cause, effect, TRUST_THRESHOLD)
+
+    def test_01_repeated_claim_hits_cache(self):
+        """يجب ألا يُعاد استعلام Neo4j لنفس الفرضية."""
+
+        first = self._verify()
+        second = self._verify()
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.mock_handler.execute_query.call_count, 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_02_weight_update_on_path_invalidates_entry(self):
+        """يجب إبطال النتيجة عند تحديث وزن رابط يمر به المسار المخزن."""
+
+        self._verify()
+        update_causal_weight(MagicMock(), SUCCESS_PATH_RESPONSE[0]['path_details'][:1], success_delta=1.0)
+        self._verify()
+
+        self.assertEqual(self.mock_handler.execute_query.call_count, 2)
+
+    def test_03_unrelated_update_keeps_entry_but_drops_negatives(self):
+        """تحديث رابط خارج المسار يُبقي النتيجة الإيجابية ويحذف النتائج السلبية."""
+
+        self._verify()
+        self.mock_handler.execute_query.return_value = []
+        self.assertIsNone(self._verify("Network Slowdown", "Server Crash"))
+
+        update_causal_weight(MagicMock(), [{"start": "X", "end": "Y", "weight": 0.5}], success_delta=1.0)
+
+        self.assertIsNotNone(self._verify())
+        self._verify("Network Slowdown", "Server Crash")
+        self.assertEqual(self.mock_handler.execute_query.call_count, 3)
+
+    def test_04_new_link_clears_cache(self):
+        """يجب تفريغ الذاكرة المؤقتة عند إنشاء رابط سببي جديد."""
+
+        self._verify()
+        create_causal_link(MagicMock(), "Memory Leak", "State", "Server Crash", "State", 0.9)
+        self._verify()
+
+        self.assertEqual(self.mock_handler.execute_query.call_count, 2)
+
+    def test_05_lru_eviction_and_ttl(self):
+        """يجب إخراج أقدم مدخل عند امتلاء الذاكرة، وانتهاء صلاحية المدخلات بعد TTL."""
+
+        self._verify("A", "B")
+        self._verify("C", "D")
+        self._verify("E", "F")
+        self._verify("A", "B")
+        self.assertEqual(self.mock_handler.execute_query.call_count, 4)
+
+        self.cache.ttl = -1.0
+        self._verify("G", "H")
+        self._verify("G", "H")
+        self.assertEqual(self.mock_handler.execute_query.call_count, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
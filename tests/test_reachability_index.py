@@ -0,0 +1,120 @@
+import itertools
+import random
+import unittest
+from unittest.mock import MagicMock
+from core.graph_engine import InMemoryCausalGraph
+from core.graph_events import notify_edges_updated, notify_edges_created, notify_graph_reloaded
+from core.reachability_index import ReachabilityIndex, enable_reachability_index, disable_reachability_index
+from core.path_cache import CACHE_MISS
+from core.verify_causal import verify_causal_path, TRUST_THRESHOLD, MAX_PATH_LENGTH
+
+# ----------------------------------------------------------------------
+# 1. بيانات وهمية
+# ----------------------------------------------------------------------
+
+SEED_EDGES = [
+    ("Memory Leak", "High CPU Utilization", 0.9),
+    ("High CPU Utilization", "Server Crash", 0.95),
+    ("Database Query Slowdown", "High Latency", 0.98),
+    ("Web Server Process", "High CPU Utilization", 0.75),
+    ("Logging Module", "Memory Leak", 0.7),
+    ("Network Slowdown", "Server Crash", 0.2),
+]
+
+SYMPTOMS = ["Server Crash", "High Latency"]
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestReachabilityIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(disable_reachability_index)
+        self.mock_handler = MagicMock()
+
+    def test_01_matches_strongest_path_on_random_graphs(self):
+        """يجب أن تطابق إجابات الفهرس نتيجة Dijkstra الأمامي لكل زوج مفهرس."""
+
+        rng = random.Random(3)
+        for _ in range(10):
+            nodes = [f"N{i}" for i in range(12)]
+            edges = [(a, b, round(rng.uniform(0.3, 1.0), 3))
+                     for a, b in itertools.permutations(nodes, 2) if rng.random() < 0.2]
+            graph = InMemoryCausalGraph(edges)
+            index = ReachabilityIndex(graph, nodes[-3:], 0.5, 4)
+
+            for cause, effect in itertools.product(nodes, nodes[-3:]):
+                if cause == effect:
+                    continue
+                expected = graph.strongest_path(cause, effect, 0.5, 4)
+                result = index.lookup(cause, effect, 0.5, 4)
+                if expected is None:
+                    self.assertIsNone(result)
+                else:
+                    self.assertAlmostEqual(result['path_weight'], expected['path_weight'])
+                    self.assertEqual(result['path_details'][-1]['end'], effect)
+                    self.assertLessEqual(result['path_length'], 4)
+
+    def test_02_verify_causal_path_is_answered_from_index(self):
+        """يجب أن يجيب الفهرس دون استعلام Neo4j، ويترك الأسئلة خارج نطاقه للاستعلام."""
+
+        enable_reachability_index(InMemoryCausalGraph(SEED_EDGES), SYMPTOMS, TRUST_THRESHOLD, MAX_PATH_LENGTH)
+
+        result = verify_causal_path(self.mock_handler, "Logging Module", "Server Crash")
+        self.assertAlmostEqual(result['path_weight'], 0.7 * 0.9 * 0.95)
+        self.assertIsNone(verify_causal_path(self.mock_handler, "Network Slowdown", "Server Crash"))
+        self.mock_handler.execute_query.assert_not_called()
+
+        # هدف غير مفهرس أو عتبة مختلفة -> الاستعلام من Neo4j
+        self.mock_handler.execute_query.return_value = []
+        verify_causal_path(self.mock_handler, "Logging Module", "Memory Leak")
+        verify_causal_path(self.mock_handler, "Logging Module", "Server Crash", threshold=0.8)
+        self.assertEqual(self.mock_handler.execute_query.call_count, 2)
+
+    def test_03_incremental_maintenance_rebuilds_only_affected_targets(self):
+        """يجب أن تنعكس تحديثات الأوزان على الفهرس مع إعادة بناء الأهداف المتأثرة فقط."""
+
+        index = enable_reachability_index(InMemoryCausalGraph(SEED_EDGES), SYMPTOMS, TRUST_THRESHOLD, MAX_PATH_LENGTH)
+        rebuilds = index.rebuilds
+
+        notify_edges_updated([{"start": "Network Slowdown", "end": "Server Crash", "weight": 0.8}])
+        self.assertEqual(index.rebuilds, rebuilds + 1)
+        self.assertAlmostEqual(index.lookup("Network Slowdown", "Server Crash", TRUST_THRESHOLD, MAX_PATH_LENGTH)['path_weight'], 0.8)
+
+        notify_edges_updated([{"start": "Memory Leak", "end": "High CPU Utilization", "weight": 0.1}])
+        self.assertIsNone(index.lookup("Logging Module", "Server Crash", TRUST_THRESHOLD, MAX_PATH_LENGTH))
+
+        notify_edges_created([{"start": "Server Crash", "end": "User Frustration", "weight": 0.9}])
+        self.assertEqual(index.rebuilds, rebuilds + 2)
+
+    def test_04_reload_rebuilds_from_handler(self):
+        """يجب أن يعيد الفهرس تحميل الرسم من Neo4j بعد إعادة تحميل الذاكرة."""
+
+        self.mock_handler.execute_read.return_value = [{"start": s, "end": t, "weight": w} for s, t, w in SEED_EDGES]
+        index = enable_reachability_index(self.mock_handler, SYMPTOMS, TRUST_THRESHOLD, MAX_PATH_LENGTH)
+
+        self.mock_handler.execute_read.return_value = [{"start": "Network Slowdown", "end": "Server Crash", "weight": 0.9}]
+        notify_graph_reloaded()
+
+        self.assertIsNone(index.lookup("Logging Module", "Server Crash", TRUST_THRESHOLD, MAX_PATH_LENGTH))
+        self.assertEqual(self.mock_handler.execute_read.call_count, 2)
+        self.assertIs(index.lookup("Logging Module", "Server Crash", 0.9, MAX_PATH_LENGTH), CACHE_MISS)
+
+    def test_05_weakened_inner_edge_of_stored_path_triggers_rebuild(self):
+        """يجب أن يعيد إضعاف رابط داخلي في مسار مخزن بناء الشجرة، حتى لو لم يكن ضمن أقوى مسار للعقدة التالية."""
+
+        graph = InMemoryCausalGraph([("u", "v", 0.9), ("v", "t", 0.5), ("v", "x", 1.0), ("x", "t", 1.0)])
+        index = ReachabilityIndex(graph, ["t"], 0.3, 2)
+        # مسار u محدود بقفزتين فيمر بـ v->t، بينما أقوى مسار لـ v هو v->x->t
+        self.assertAlmostEqual(index.lookup("u", "t", 0.3, 2)['path_weight'], 0.45)
+
+        index.apply_edges([{"start": "v", "end": "t", "weight": 0.1}])
+
+        self.assertIsNone(graph.strongest_path("u", "t", 0.3, 2))
+        self.assertIsNone(index.lookup("u", "t", 0.3, 2))
+        self.assertAlmostEqual(index.lookup("v", "t", 0.3, 2)['path_weight'], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
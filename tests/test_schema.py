@@ -0,0 +1,58 @@
+import unittest
+from unittest.mock import MagicMock
+from core.verify_causal import build_verify_path_query, build_verify_paths_batch_query
+from core.innovation_engine import INNOVATIVE_PATH_QUERY
+from core.weights import UPDATE_EDGE_WEIGHT_QUERY, BATCH_WEIGHT_UPDATE_QUERY, BATCH_WEIGHT_AND_CONFIDENCE_UPDATE_QUERY
+from db.schema import (
+    ensure_schema, SCHEMA_STATEMENTS, NODE_LABELS, BACKFILL_CAUSAL_LABEL_QUERY, COUNT_UNLABELED_CAUSAL_NODES_QUERY
+)
+
+# ----------------------------------------------------------------------
+# فئة الاختبار (مخطط الذاكرة Z)
+# ----------------------------------------------------------------------
+
+class TestSchema(unittest.TestCase):
+
+    def test_01_ensure_schema_creates_constraints_then_backfills(self):
+        """يجب إنشاء قيد لكل نوع وفهرس Causal ثم إضافة النوع المشترك للعقد القديمة."""
+
+        handler = MagicMock()
+        handler.execute_query.return_value = [{"unlabeled": 0}]
+        ensure_schema(handler)
+
+        executed = [c.args[0] for c in handler.execute_query.call_args_list]
+        self.assertEqual(executed[:-2], SCHEMA_STATEMENTS)
+        self.assertEqual(executed[-2], BACKFILL_CAUSAL_LABEL_QUERY)
+        self.assertEqual(executed[-1], COUNT_UNLABELED_CAUSAL_NODES_QUERY)
+        for label in NODE_LABELS:
+            self.assertTrue(any(f"(n:{label})" in s for s in SCHEMA_STATEMENTS), label)
+
+    def test_02_hot_queries_match_nodes_by_label(self):
+        """يجب ألا تبحث الاستعلامات الساخنة عن العقد بالاسم بدون نوع (مسح كامل)."""
+
+        hot_queries = [
+            build_verify_path_query(),
+            build_verify_paths_batch_query(),
+            INNOVATIVE_PATH_QUERY,
+            UPDATE_EDGE_WEIGHT_QUERY,
+            BATCH_WEIGHT_UPDATE_QUERY,
+            BATCH_WEIGHT_AND_CONFIDENCE_UPDATE_QUERY,
+        ]
+
+        for query in hot_queries:
+            self.assertNotRegex(query, r"\((start|target|cause|effect) \{")
+            self.assertIn(":Causal {", query)
+
+    def test_03_fails_loudly_when_nodes_stay_unlabeled(self):
+        """بدون إضافة النوع المشترك، يجب أن يرفض ensure_schema المتابعة إذا وُجدت عقد بدون Causal."""
+
+        handler = MagicMock()
+        handler.execute_query.return_value = [{"unlabeled": 3}]
+
+        with self.assertRaises(RuntimeError):
+            ensure_schema(handler, backfill=False)
+        ensure_schema(handler, backfill=False, strict=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import MagicMock
+from db.seed_loader import split_cypher_statements, load_seed_statements, load_seed_file
+from db.schema import SCHEMA_STATEMENTS, BACKFILL_CAUSAL_LABEL_QUERY
+
+# ----------------------------------------------------------------------
+# فئة الاختبار (تحميل الذاكرة الأولية)
+# ----------------------------------------------------------------------
+
+class TestSeedLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_handler = MagicMock()
+        self.tx = self.mock_handler.transaction.return_value.__enter__.return_value
+
+    def test_01_split_ignores_comments_and_quoted_semicolons(self):
+        """يجب ألا تُقسم الجمل عند الفاصلة المنقوطة داخل النصوص أو التعليقات."""
+
+        script = """
+        // تعليق; لا يُقسم
+        MERGE (a:State {name: 'A; B'});
+        /* تعليق
+           متعدد الأسطر; */
+        MERGE (b:State {name: "It\\"s; fine"})
+        SET b.level = 0.9;
+        """
+
+        statements = split_cypher_statements(script)
+
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(statements[0], "MERGE (a:State {name: 'A; B'})")
+        self.assertIn('SET b.level = 0.9', statements[1])
+
+    def test_02_statements_are_grouped_into_transactions(self):
+        """يجب إنشاء الفهارس أولاً ثم تجميع الجمل في معاملات بالحجم المحدد (ثم إضافة النوع Causal)."""
+
+        statements = [f"MERGE (n:State {{name: 'S{i}'}})" for i in range(5)]
+
+        stats = load_seed_statements(self.mock_handler, statements, statements_per_transaction=2)
+
+        self.assertEqual(stats['statements'], 5)
+        self.assertEqual(stats['transactions'], 3)
+        self.assertEqual(self.tx.run.call_count, 5)
+        self.assertEqual(self.mock_handler.execute_query.call_count, len(SCHEMA_STATEMENTS) + 1)
+
+    def test_03_schema_statements_run_outside_transactions(self):
+        """يجب تنفيذ أوامر المخطط الموجودة في السكريبت خارج معاملات الكتابة."""
+
+        statements = [
+            "MERGE (a:State {name: 'A'})",
+            "CREATE CONSTRAINT state_unique IF NOT EXISTS FOR (n:State) REQUIRE n.name IS UNIQUE",
+            "MERGE (b:State {name: 'B'})",
+        ]
+
+        stats = load_seed_statements(self.mock_handler, statements, create_indexes=False)
+
+        self.assertEqual(stats['transactions'], 2)
+        executed = [c.args[0] for c in self.mock_handler.execute_query.call_args_list]
+        self.assertEqual(executed, [statements[1], BACKFILL_CAUSAL_LABEL_QUERY])
+
+    def test_04_bundled_seed_file_is_self_contained(self):
+        """يجب أن تكون كل جملة في ملف الذاكرة الأولية مستقلة (لا تعتمد على متغيرات جملة سابقة)."""
+
+        stats = load_seed_file(self.mock_handler, create_indexes=False)
+
+        self.assertGreater(stats['statements'], 20)
+        for call in self.tx.run.call_args_list:
+            statement = call.args[0]
+            if '-[' in statement:
+                self.assertTrue(statement.startswith('MATCH'), statement)
+
+
+if __name__ == '__main__':
+    unittest.main()
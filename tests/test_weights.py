@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import MagicMock, patch
-from core.weights import update_system_confidence, LEARNING_RATE_ETA
+from core.weights import update_system_confidence, update_causal_weight, update_causal_weights_batched, LEARNING_RATE_ETA
+from core.weights import update_system_confidence_atomic, INCREMENT_CONFIDENCE_QUERY
 
 # 1. إعداد بيانات وهمية لاستجابة Neo4j (قراءة مستوى الثقة الحالي)
 MOCK_INITIAL_CONFIDENCE = [{"level": 0.80}]
@@ -130,5 +131,57 @@ class TestWeightFunctions(unittest.TestCase):
         self._assert_write_call(expected_confidence)
 
 
+    # =========================================================
+    # 4. اختبار التحديث المجمّع (Batched UNWIND Update)
+    # =========================================================
+
+    def test_06_batched_update_uses_single_round_trip(self):
+        """يجب أن يرسل التحديث المجمّع كل روابط المسار في استدعاء واحد ويعيد elementId الفعلية."""
+
+        path_details = [
+            {"start": "A", "end": "B", "weight": 0.9},
+            {"start": "B", "end": "C", "weight": 0.5},
+            {"start": "C", "end": "D", "weight": 0.05},
+        ]
+        self.mock_handler.execute_write.return_value = [{"edge_ids": ["4:x:1", "4:x:2", "4:x:3"]}]
+
+        edge_ids = update_causal_weight(self.mock_handler, path_details, success_delta=-1.0, batched=True)
+
+        self.assertEqual(edge_ids, ["4:x:1", "4:x:2", "4:x:3"])
+        self.mock_handler.execute_write.assert_called_once()
+        self.mock_handler.execute_query.assert_not_called()
+
+        sent_edges = self.mock_handler.execute_write.call_args.args[1]['edges']
+        self.assertEqual([e['new_weight'] for e in sent_edges], [0.8, 0.4, 0.0])
+
+    def test_07_batched_update_merges_confidence_write(self):
+        """يجب دمج تحديث الثقة الذاتية في نفس المعاملة عند تمرير confidence_delta."""
+
+        self.mock_handler.execute_write.return_value = [{"edge_ids": ["4:x:1"], "level": 0.91}]
+
+        result = update_causal_weights_batched(
+            self.mock_handler, [{"start": "A", "end": "B", "weight": 0.9}],
+            success_delta=1.0, eta=self.eta, confidence_delta=0.1
+        )
+
+        self.assertEqual(result, {"updated_edges": ["4:x:1"], "system_confidence": 0.91})
+        parameters = self.mock_handler.execute_write.call_args.args[1]
+        self.assertAlmostEqual(parameters['confidence_step'], 0.01, places=6)
+
+    def test_08_atomic_confidence_update_is_a_single_statement(self):
+        """يجب أن يتم التحديث الذري في جملة كتابة واحدة بدون قراءة مسبقة."""
+
+        self.mock_handler.execute_write.return_value = [{"level": 0.78}]
+
+        new_confidence = update_system_confidence_atomic(self.mock_handler, success_delta=-0.2, eta=self.eta)
+
+        self.assertEqual(new_confidence, 0.78)
+        self.mock_handler.execute_query.assert_not_called()
+        self.mock_handler.execute_read.assert_not_called()
+        query, parameters = self.mock_handler.execute_write.call_args.args
+        self.assertEqual(query, INCREMENT_CONFIDENCE_QUERY)
+        self.assertAlmostEqual(parameters['confidence_step'], -0.02, places=6)
+
+
 if __name__ == '__main__':
     unittest.main()
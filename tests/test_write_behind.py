@@ -0,0 +1,135 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+from core.bridge import process_and_learn
+from core.graph_events import subscribe, unsubscribe
+from core.weights import RELATIVE_WEIGHT_UPDATE_QUERY, INCREMENT_CONFIDENCE_QUERY
+from core.write_behind import LearningBuffer, enable_write_behind, disable_write_behind
+
+# ----------------------------------------------------------------------
+# 1. بيانات وهمية
+# ----------------------------------------------------------------------
+
+PATH = [
+    {"start": "Memory Leak", "end": "High CPU Utilization", "weight": 0.9},
+    {"start": "High CPU Utilization", "end": "Server Crash", "weight": 0.95},
+]
+
+
+def mock_handler():
+    handler = MagicMock()
+    handler.execute_read.return_value = [{'level': 0.5}]
+    tx = handler.transaction.return_value.__enter__.return_value
+
+    def run(query, parameters):
+        result = MagicMock()
+        if query == RELATIVE_WEIGHT_UPDATE_QUERY:
+            result.__iter__.return_value = [
+                {"start": e['start'], "end": e['end'], "weight": 0.5 + e['delta']} for e in parameters['edges']
+            ]
+        else:
+            result.single.return_value = {"level": round(0.5 + parameters['confidence_step'], 4)}
+        return result
+
+    tx.run.side_effect = run
+    return handler, tx
+
+# ----------------------------------------------------------------------
+# 2. فئة الاختبار
+# ----------------------------------------------------------------------
+
+class TestLearningBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(disable_write_behind)
+        self.handler, self.tx = mock_handler()
+
+    def test_01_deltas_are_coalesced_into_one_transaction(self):
+        """يجب دمج الفروقات لكل رابط وللثقة وكتابتها في معاملة واحدة."""
+
+        events = []
+        listener = lambda event, edges: events.append(edges)
+        subscribe(listener)
+        self.addCleanup(unsubscribe, listener)
+
+        buffer = LearningBuffer(self.handler, eta=0.1, background=False)
+        for _ in range(10):
+            buffer.add_edge_feedback(PATH, 1.0)
+            expected_level = buffer.add_confidence(0.1)
+
+        self.handler.transaction.assert_not_called()
+        result = buffer.flush()
+
+        self.handler.transaction.assert_called_once()
+        self.assertEqual(self.tx.run.call_count, 2)
+        sent_edges = self.tx.run.call_args_list[0].args[1]['edges']
+        self.assertEqual(len(sent_edges), 2)
+        self.assertAlmostEqual(sent_edges[0]['delta'], 1.0)
+        self.assertAlmostEqual(self.tx.run.call_args_list[1].args[1]['confidence_step'], 0.1)
+        self.assertEqual(result['system_confidence'], expected_level)
+        self.assertEqual(len(events), 1)
+        buffer.close()
+
+    def test_02_size_threshold_forces_flush(self):
+        """يجب الكتابة فوراً عند تجاوز حد الروابط المعلقة."""
+
+        buffer = LearningBuffer(self.handler, max_pending_edges=2, background=False)
+        buffer.add_edge_feedback(PATH, 1.0)
+
+        self.handler.transaction.assert_called_once()
+        self.assertEqual(buffer.pending()['edges'], 0)
+        buffer.close()
+
+    def test_03_failed_flush_keeps_deltas(self):
+        """يجب ألا تضيع الفروقات إذا فشلت الكتابة."""
+
+        buffer = LearningBuffer(self.handler, background=False)
+        buffer.add_edge_feedback(PATH, 1.0)
+        self.tx.run.side_effect = RuntimeError("deadlock")
+
+        with self.assertRaises(RuntimeError):
+            buffer.flush()
+        self.assertEqual(buffer.pending()['edges'], 2)
+
+        self.handler, self.tx = mock_handler()
+        buffer.handler = self.handler
+        buffer.close()
+        self.assertEqual(self.tx.run.call_args.args[0], RELATIVE_WEIGHT_UPDATE_QUERY)
+
+    def test_04_background_flush_respects_staleness_bound(self):
+        """يجب أن يكتب الخيط الخلفي الفروقات خلال flush_interval."""
+
+        buffer = LearningBuffer(self.handler, flush_interval=0.05)
+        buffer.add_confidence(-0.2)
+
+        deadline = time.monotonic() + 2.0
+        while buffer.flushes == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(buffer.flushes, 1)
+        self.assertEqual(self.tx.run.call_args.args[0], INCREMENT_CONFIDENCE_QUERY)
+        buffer.close()
+
+    def test_05_process_and_learn_uses_active_buffer(self):
+        """يجب ألا يكتب process_and_learn مباشرة عند تفعيل الكتابة المؤجلة."""
+
+        enable_write_behind(self.handler, flush_interval=3600)
+        llm_client = MagicMock()
+        llm_client.chat.completions.create.return_value.choices[0].message.content = \
+            '{"causal_claims": [{"cause": "Memory Leak", "effect": "Server Crash"}]}'
+        self.handler.execute_query.return_value = [
+            {"path_weight": 0.855, "path_details": PATH, "path_length": 2}
+        ]
+
+        result = process_and_learn("نص", self.handler, llm_client, feedback_delta=1.0)
+
+        self.assertEqual(result['system_confidence'], 0.51)
+        self.handler.execute_query.assert_called_once()   # استعلام التحقق فقط
+        self.handler.transaction.assert_not_called()
+
+        disable_write_behind()
+        self.handler.transaction.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()